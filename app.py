@@ -0,0 +1,69 @@
+"""
+Streaming chat UI over LoreReasoner.astream.
+
+    streamlit run app.py
+
+Every browser session shares one LoreReasoner and one asyncio loop running in a background
+thread, so all users go through the same pooled Neo4j driver and their queries interleave on
+that loop. Each session's Streamlit script thread still blocks while it waits for the next
+event of its own query (stream_events), so concurrent sessions each hold a thread until
+their answer is complete.
+"""
+import asyncio
+import threading
+import streamlit as st
+from src.pipeline.rag_engine import LoreReasoner
+
+
+@st.cache_resource
+def get_runtime():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name="lore-event-loop").start()
+    return loop, LoreReasoner()
+
+
+def stream_events(loop, reasoner, question):
+    """Bridges the reasoner's async event stream (on the shared loop) into Streamlit's script thread."""
+    events = reasoner.astream(question)
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(events.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+
+st.set_page_config(page_title="Teyvat Lore Graph", page_icon="📜")
+st.title("📜 Teyvat Lore Graph")
+
+loop, reasoner = get_runtime()
+if "history" not in st.session_state:
+    st.session_state.history = []
+
+for message in st.session_state.history:
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
+question = st.chat_input("Ask about Teyvat lore, e.g. Who are the members of the Eight Adepti?")
+if question:
+    st.session_state.history.append({"role": "user", "content": question})
+    with st.chat_message("user"):
+        st.markdown(question)
+
+    with st.chat_message("assistant"):
+        status = st.status("Searching the lore graph...")
+
+        def answer_tokens():
+            for event in stream_events(loop, reasoner, question):
+                if event["type"] == "cypher":
+                    label = f"Template query ({event['route']})" if event["route"] else "Generated Cypher"
+                    status.write(label)
+                    status.code(event["cypher"].strip(), language="cypher")
+                elif event["type"] == "rows":
+                    status.write(f"{len(event['rows'])} rows")
+                    status.json(event["rows"], expanded=False)
+                    status.update(label="Found it. Writing the answer...", state="complete")
+                elif event["type"] in ("token", "error"):
+                    yield event["text"]
+
+        answer = st.write_stream(answer_tokens())
+    st.session_state.history.append({"role": "assistant", "content": answer})
@@ -0,0 +1,89 @@
+"""
+Cold rebuild time: BulkGraphExporter writing neo4j-admin CSVs vs replaying the same
+extractions through LoreExtractor.upload (batched MERGEs).
+
+    python -m benchmarks.bench_bulk_export
+    python -m benchmarks.bench_bulk_export --chunks 20000 --upload-chunks 500
+
+Extractions are synthetic, with entities repeated across chunks so deduplication has work
+to do. The upload path runs against the recording stand-in with --latency-ms per statement
+on a sample of --upload-chunks and is extrapolated; it doesn't include the server's own
+MERGE cost, so the real gap is wider. The import itself (neo4j-admin) isn't timed.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_graph_writes import REL_TYPES
+from benchmarks.fakes import RecordingNeo4jClient, PassthroughResolver
+from src.pipeline.bulk_export import BulkGraphExporter
+from src.pipeline.extractor import LoreExtractor
+from src.utils.schema_cache import GraphSchemaCache
+
+
+def write_extractions(dir_path, n_chunks, entities_per_chunk, rels_per_chunk, n_names, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for c in range(n_chunks):
+        names = [f"Bench Entity {rng.randrange(n_names)}" for _ in range(entities_per_chunk)]
+        data = {
+            "entities": [
+                {"canonical_name": n, "aliases": [n.upper(), f"{n} ({c % 7})"], "label": "Character"} for n in names
+            ],
+            "relationships": [
+                {"source": rng.choice(names), "target": rng.choice(names), "type": rng.choice(REL_TYPES)}
+                for _ in range(rels_per_chunk)
+            ],
+        }
+        with open(os.path.join(dir_path, f"page{c // 10}_{c % 10}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        chunks.append(data)
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--entities", type=int, default=30)
+    parser.add_argument("--rels", type=int, default=40)
+    parser.add_argument("--names", type=int, default=20000, help="Distinct entity names across all chunks")
+    parser.add_argument("--upload-chunks", type=int, default=200, help="Sample replayed through upload()")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir, output_dir = os.path.join(tmp, "processed"), os.path.join(tmp, "import")
+        os.makedirs(input_dir)
+        chunks = write_extractions(input_dir, args.chunks, args.entities, args.rels, args.names)
+        rows = sum(len(c["entities"]) + len(c["relationships"]) for c in chunks)
+
+        exporter = BulkGraphExporter(entity_resolver=PassthroughResolver(), input_dir=input_dir, output_dir=output_dir)
+        start = time.perf_counter()
+        exporter.build()
+        exporter.write()
+        export_time = time.perf_counter() - start
+        csv_bytes = sum(os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir))
+        n_edges = sum(len(pairs) for pairs in exporter.edges.values())
+
+    extractor = LoreExtractor(
+        db=RecordingNeo4jClient(latency_ms=args.latency_ms), entity_resolver=PassthroughResolver(),
+        llm=object(), schema=GraphSchemaCache(path=None),
+    )
+    sample = chunks[:args.upload_chunks]
+    start = time.perf_counter()
+    for i, data in enumerate(sample):
+        extractor.upload(data, source_file=f"bench_{i}.txt")
+    upload_time = (time.perf_counter() - start) * len(chunks) / len(sample)
+
+    print(f"\n📊 {len(chunks)} extractions, {rows} rows -> {len(exporter.nodes)} nodes, {n_edges} edges")
+    print(f"   bulk export   {export_time:8.2f}s  {rows / export_time:9.0f} rows/s   CSVs {csv_bytes / 1e6:.1f} MB")
+    print(f"   upload()      {upload_time:8.2f}s  {rows / upload_time:9.0f} rows/s   "
+          f"(extrapolated from {len(sample)} chunks, {args.latency_ms:.0f} ms/statement)")
+    print(f"   speedup       {upload_time / export_time:.1f}x before the server's MERGE cost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Times offline dump ingestion and checks its memory use doesn't grow with the dump size.
+
+    python -m benchmarks.bench_dump_ingest                      # synthetic XML dumps
+    python -m benchmarks.bench_dump_ingest --dump path/to/dump  # a real export (.xml/.jsonl, .bz2/.gz)
+    python -m benchmarks.bench_dump_ingest --workers 4          # clean on a process pool
+
+Also feeds the saved fixture pages through the JSONL path and checks the text written
+matches what the live scraper's cleaner produces for the same HTML.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from xml.sax.saxutils import escape
+
+from src.pipeline.dump_ingest import WikiDumpIngestor
+from src.pipeline.html_cleaner import clean_html
+from src.pipeline.scraper import GenshinSmartScraper
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+NAMES = ["Zhongli", "Venti", "Guizhong", "Rex Lapis", "Morax", "Xiao", "Osial", "Havria", "Liyue", "Mondstadt"]
+
+WIKITEXT = """{{{{Character Infobox
+|name = {title}
+|affiliation = [[{ally}]]
+}}}}
+'''{title}''' is a figure of Teyvat lore, sworn to [[{ally}]] and an old rival of [[{rival}|the {rival}]].<ref>Archon Quest</ref>
+
+== History ==
+{body}
+
+{{| class="wikitable"
+! Name !! Role
+|-
+| {title} || Archon of [[{ally}]]
+|-
+| {rival} || Adeptus
+|}}
+
+== References ==
+{{{{Reflist}}}}
+[[Category:Characters]]
+[[Category:{ally}]]
+"""
+
+DISAMBIG = """'''{title}''' may refer to:
+* [[{ally}]]
+* [[{rival}]]
+{{{{Disambig}}}}
+"""
+
+
+def write_xml_dump(path, n_pages, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/">\n')
+        f.write("<siteinfo><sitename>Genshin Impact Wiki</sitename></siteinfo>\n")
+        for i in range(n_pages):
+            title = f"Lore Page {i}"
+            ally, rival = rng.sample(NAMES, 2)
+            body = " ".join(
+                f"In the {rng.randint(1, 6000)}th year, {rng.choice(NAMES)} met {rng.choice(NAMES)} in [[{rng.choice(NAMES)}]]."
+                for _ in range(40)
+            )
+            template = DISAMBIG if i % 25 == 0 else WIKITEXT
+            text = template.format(title=title, ally=ally, rival=rival, body=body)
+            f.write(
+                f"<page><title>{escape(title)}</title><ns>0</ns><id>{i}</id>"
+                f"<revision><id>{1000 + i}</id><text xml:space=\"preserve\">{escape(text)}</text></revision></page>\n"
+            )
+        # Non-article namespaces and redirects are skipped
+        f.write("<page><title>Talk:Zhongli</title><ns>1</ns><revision><id>1</id><text>chatter</text></revision></page>\n")
+        f.write('<page><title>Rex Lapis</title><ns>0</ns><redirect title="Zhongli" /><revision><id>2</id><text>#REDIRECT [[Zhongli]]</text></revision></page>\n')
+        f.write("</mediawiki>\n")
+
+
+def run_ingest(dump_path, workers):
+    with tempfile.TemporaryDirectory() as out:
+        scraper = GenshinSmartScraper(output_dir=os.path.join(out, "raw"), clean_workers=workers)
+        ingestor = WikiDumpIngestor(scraper=scraper)
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = ingestor.ingest(dump_path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        ingestor.close()
+    return stats, elapsed, peak
+
+
+def verify_jsonl(workdir):
+    """Fixture pages through the JSONL path must come out exactly as the live path would save them."""
+    dump = os.path.join(workdir, "fixtures.jsonl")
+    pages = {}
+    with open(dump, "w", encoding="utf-8") as f:
+        for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+            title = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding="utf-8") as page:
+                pages[title] = page.read()
+            f.write(json.dumps({"parse": {"title": title, "revid": 1, "text": {"*": pages[title]}}}) + "\n")
+
+    out = os.path.join(workdir, "jsonl_raw")
+    ingestor = WikiDumpIngestor(scraper=GenshinSmartScraper(output_dir=out), batch_size=3)
+    ingestor.ingest(dump)
+    ingestor.close()
+
+    mismatches = 0
+    for title, raw_html in pages.items():
+        try:
+            expected = clean_html(raw_html)
+        except Exception:
+            expected = None
+        path = os.path.join(out, title + ".txt")
+        actual = open(path, encoding="utf-8").read() if os.path.exists(path) else None
+        # Short pages aren't written by either path
+        if expected is not None and len(expected) < 500:
+            expected = None
+        if actual != expected:
+            mismatches += 1
+            print(f"   ❌ {title}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dump", help="Ingest this dump instead of synthetic ones")
+    parser.add_argument("--pages", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print("🔎 Fixture pages through the JSONL path...")
+        mismatches = verify_jsonl(workdir)
+        print("   ✅ identical to the live cleaner" if not mismatches else f"   {mismatches} mismatches")
+
+        dumps = [(args.dump, None)] if args.dump else []
+        for n in ([] if args.dump else args.pages):
+            path = os.path.join(workdir, f"dump_{n}.xml")
+            write_xml_dump(path, n)
+            dumps.append((path, n))
+
+        results = []
+        for path, n in dumps:
+            stats, elapsed, peak = run_ingest(path, args.workers)
+            results.append((os.path.basename(path), os.path.getsize(path), stats, elapsed, peak))
+
+    print(f"\n📊 Dump ingestion ({args.workers or 'no'} clean workers)")
+    for name, size, stats, elapsed, peak in results:
+        print(
+            f"   {name:<18} {size / 1e6:7.1f} MB  {stats['pages']:6d} pages  {stats['saved']:6d} saved  "
+            f"{stats['pages'] / elapsed:8.0f} pages/s  peak {peak / 1e6:6.1f} MB traced"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Latency, embedding calls and false merges of EntityResolver with and without the exact/alias
+first tier, replaying synthetic extractions through LoreExtractor.upload.
+
+    python -m benchmarks.bench_entity_resolver
+    python -m benchmarks.bench_entity_resolver --entities 2000 --chunks 1000 --embed-ms 0.5
+
+Each synthetic entity has a name and aliases; chunks mention entities by either, in random
+case. The embedding model is a character-trigram stand-in with a per-name delay, so
+similarly spelled *different* entities can be (wrongly) merged by the vector tier, much as
+with MiniLM. A false merge is a mention resolved to another entity's canonical name.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+from benchmarks.fakes import RecordingNeo4jClient
+from src.pipeline.extractor import LoreExtractor
+from src.utils.alias_index import AliasIndex
+from src.utils.entity_resolver import EntityResolver
+from src.utils.schema_cache import GraphSchemaCache
+
+SYLLABLES = ["ra", "zh", "on", "li", "ve", "nti", "ei", "ka", "mu", "ya", "sh", "ao", "ne", "ru", "fa", "el"]
+TITLES = ["Lord", "Archon of", "Keeper of", "the"]
+
+
+class TrigramEmbedding(EmbeddingFunction):
+    """Hashed character-trigram vectors, with `latency_ms` per embedded name."""
+    def __init__(self, latency_ms=2.0, dims=256):
+        self.latency = latency_ms / 1000
+        self.dims = dims
+        self.names_embedded = 0
+
+    def __call__(self, input):
+        time.sleep(self.latency * len(input))
+        self.names_embedded += len(input)
+        vectors = []
+        for text in input:
+            v = np.zeros(self.dims, dtype=np.float32)
+            padded = f"  {text.lower()} "
+            for i in range(len(padded) - 2):
+                v[hash(padded[i:i+3]) % self.dims] += 1
+            vectors.append(v / (np.linalg.norm(v) or 1))
+        return vectors
+
+    @staticmethod
+    def name():
+        return "bench-trigram"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return TrigramEmbedding()
+
+
+class NoAliasIndex(AliasIndex):
+    """Disables the first tier: every name goes to the embedding model."""
+    def __init__(self):
+        super().__init__(path=None)
+
+    def __len__(self):
+        return 1
+
+    def lookup(self, name):
+        return None
+
+    def add_many(self, entries):
+        return 0
+
+
+def make_entities(n, rng):
+    entities, taken = {}, set()
+    while len(entities) < n:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        aliases = [f"{rng.choice(TITLES)} {name}", f"{name}{rng.choice(SYLLABLES)}"]
+        # Every name and alias belongs to exactly one entity, so "false merge" is well defined
+        if taken.isdisjoint(a.casefold() for a in (name, *aliases)):
+            entities[name] = aliases
+            taken.update(a.casefold() for a in (name, *aliases))
+    return entities
+
+
+def make_chunks(entities, n_chunks, per_chunk, rng):
+    names = list(entities)
+    truth = {}
+    for canonical, aliases in entities.items():
+        for mention in (canonical, *aliases):
+            truth.setdefault(mention, canonical)
+    chunks = []
+    for _ in range(n_chunks):
+        picked = rng.sample(names, per_chunk)
+        mentions = []
+        for canonical in picked:
+            mention = rng.choice((canonical, *entities[canonical]))
+            mention = rng.choice((mention, mention.lower(), mention.upper()))
+            truth.setdefault(mention, canonical)
+            mentions.append((mention, entities[canonical]))
+        chunks.append({
+            "entities": [{"canonical_name": m, "aliases": a, "label": "Character"} for m, a in mentions],
+            "relationships": [],
+        })
+    return chunks, {m.casefold(): c for m, c in truth.items()}
+
+
+def run(args, alias_index, chunks, truth):
+    path = tempfile.mkdtemp()
+    try:
+        emb = TrigramEmbedding(latency_ms=args.embed_ms)
+        resolver = EntityResolver(collection_name="bench", path=path, emb_fn=emb, alias_index=alias_index)
+        extractor = LoreExtractor(
+            db=RecordingNeo4jClient(latency_ms=0), entity_resolver=resolver, llm=object(),
+            schema=GraphSchemaCache(path=None),
+        )
+        false_merges = mentions = 0
+        start = time.perf_counter()
+        for i, data in enumerate(chunks):
+            raw = [e["canonical_name"] for e in data["entities"]]
+            extractor.upload(data, source_file=f"bench_{i}.txt")
+            for mention, entity in zip(raw, data["entities"]):
+                true_entity = truth[mention.casefold()]
+                canonical_truth = truth.get(entity["canonical_name"].casefold())
+                mentions += 1
+                if canonical_truth is not None and canonical_truth != true_entity:
+                    false_merges += 1
+        elapsed = time.perf_counter() - start
+        return elapsed, emb.names_embedded, false_merges, mentions, len(resolver.collection.get(include=[])["ids"])
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--per-chunk", type=int, default=20)
+    parser.add_argument("--embed-ms", type=float, default=1.0, help="Embedding cost per name")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    entities = make_entities(args.entities, rng)
+    chunks, truth = make_chunks(entities, args.chunks, args.per_chunk, rng)
+
+    print(f"\n📊 {args.chunks} chunks x {args.per_chunk} mentions of {args.entities} entities "
+          f"(embedding {args.embed_ms:.1f} ms/name)")
+    for label, alias_index in (("vector only", NoAliasIndex()), ("alias + vector", AliasIndex(path=None))):
+        elapsed, embedded, false_merges, mentions, canonical = run(args, alias_index, [
+            {"entities": [dict(e) for e in c["entities"]], "relationships": []} for c in chunks
+        ], truth)
+        print(f"   {label:<15} {elapsed:7.2f}s  {elapsed / mentions * 1e6:7.0f} µs/mention  "
+              f"names embedded {embedded:6d}  false merges {false_merges:5d}  canonical names {canonical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+"Who is X?" lookup latency: walking the entity's relationships (the old lookup template) vs
+reading its precomputed summary (src.pipeline.summaries). Needs the Neo4j from .env.
+
+DESTRUCTIVE: it writes then deletes every Entity whose name starts with "Bench ", and its
+refreshes rewrite the summaries of any dirty node in that database. Use a scratch database
+(Enterprise: CREATE DATABASE bench); the benchmark refuses to start without --database and
+--allow-writes.
+
+    python -m benchmarks.bench_entity_summaries --database bench --allow-writes
+    python -m benchmarks.bench_entity_summaries --database bench --allow-writes --entities 20000 --hubs 5 --lookups 200
+
+Every entity is linked to a few random others and to one of --hubs hub entities, so the hubs
+collect thousands of relationships like a nation or faction page does. Also reports how long
+the incremental refresh takes for the nodes one more chunk touches.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_schema_setup import CLEANUP_CYPHER
+from benchmarks.fakes import PassthroughResolver
+from src.pipeline.extractor import LoreExtractor
+from src.pipeline.question_router import LOOKUP_CYPHER, QuestionRouter
+from src.pipeline.summaries import EntitySummarizer
+from src.utils.neo4j_client import Neo4jClient
+from src.utils.schema_cache import GraphSchemaCache
+
+# The lookup template before summaries: every relationship of the node is matched
+TRAVERSAL_LOOKUP_CYPHER = """
+CALL db.index.fulltext.queryNodes('entity_names', $search) YIELD node, score
+WITH node ORDER BY score DESC LIMIT 1
+OPTIONAL MATCH (node)-[r]-(other:Entity)
+WITH node, r, other LIMIT $limit
+RETURN node.name AS name, node.label AS label, node.aliases AS aliases,
+       collect(type(r) + ' ' + other.name) AS connections
+"""
+
+REL_TYPES = ["MEMBER_OF", "ALLY_OF", "LOCATED_IN", "SERVES"]
+
+
+def make_chunks(n_entities, n_hubs, per_chunk, rng):
+    hubs = [f"Bench Hub {h}" for h in range(n_hubs)]
+    chunks = []
+    for start in range(0, n_entities, per_chunk):
+        names = [f"Bench Entity {i}" for i in range(start, min(start + per_chunk, n_entities))]
+        relationships = [{"source": n, "target": rng.choice(hubs), "type": "MEMBER_OF"} for n in names]
+        relationships += [
+            {"source": n, "target": f"Bench Entity {rng.randrange(n_entities)}", "type": rng.choice(REL_TYPES)}
+            for n in names for _ in range(3)
+        ]
+        chunks.append({
+            "entities": [{"canonical_name": n, "aliases": [], "label": "Character"} for n in names + hubs],
+            "relationships": relationships,
+        })
+    return chunks
+
+
+def latencies_ms(db, cypher, names):
+    router = QuestionRouter(limit=50)
+    timings = []
+    for name in names:
+        params = router.route(f"Who is {name}?").params
+        start = time.perf_counter()
+        db.execute_read(cypher, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--hubs", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=100)
+    parser.add_argument("--database", help="Scratch database to run in")
+    parser.add_argument("--allow-writes", action="store_true",
+                        help="Confirms the benchmark may write and delete \"Bench \" entities in that database")
+    args = parser.parse_args()
+    if not args.database or not args.allow_writes:
+        parser.error("this writes and deletes \"Bench \" entities and refreshes dirty summaries; "
+                     "point --database at a scratch database and pass --allow-writes")
+    rng = random.Random(0)
+
+    db = Neo4jClient()
+    db.database = args.database
+    print(f"⚠️ Writing and deleting \"Bench \" entities in {args.database}.")
+    db.connect()
+    db.ensure_schema()
+    # The auto-commit session, because CALL ... IN TRANSACTIONS can't run inside a managed transaction
+    with db.driver.session(database=db.database) as session:
+        session.run(CLEANUP_CYPHER.replace("'Bench Entity '", "'Bench '")).consume()
+
+    summarizer = EntitySummarizer(db)
+    extractor = LoreExtractor(
+        db=db, entity_resolver=PassthroughResolver(), llm=object(), schema=GraphSchemaCache(path=None),
+        summaries=summarizer,
+    )
+    chunks = make_chunks(args.entities, args.hubs, 100, rng)
+    for i, data in enumerate(chunks[:-1]):
+        extractor.upload(data, source_file=f"bench_{i}.txt")
+
+    start = time.perf_counter()
+    full = summarizer.refresh()
+    full_s = time.perf_counter() - start
+    extractor.upload(chunks[-1], source_file="bench_last.txt")
+    start = time.perf_counter()
+    incremental = summarizer.refresh()
+    incremental_s = time.perf_counter() - start
+
+    hubs = [f"Bench Hub {h}" for h in range(args.hubs)]
+    entities = [f"Bench Entity {rng.randrange(args.entities)}" for _ in range(args.lookups)]
+    results = {}
+    for label, cypher in (("traversal", TRAVERSAL_LOOKUP_CYPHER), ("summary", LOOKUP_CYPHER)):
+        results[label] = (latencies_ms(db, cypher, hubs * (args.lookups // args.hubs)),
+                          latencies_ms(db, cypher, entities))
+
+    with db.driver.session(database=db.database) as session:
+        session.run(CLEANUP_CYPHER.replace("'Bench Entity '", "'Bench '")).consume()
+    db.close()
+
+    print(f"\n📊 {args.entities} entities, {args.hubs} hubs")
+    print(f"   refresh: {full} summaries in {full_s:.2f}s, then {incremental} touched by one chunk in {incremental_s:.3f}s")
+    for label, ((hub_p50, hub_p95), (ent_p50, ent_p95)) in results.items():
+        print(f"   {label:<10} hubs p50 {hub_p50:6.2f} ms  p95 {hub_p95:6.2f} ms   "
+              f"entities p50 {ent_p50:6.2f} ms  p95 {ent_p95:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+How many chunks survive malformed LLM output: the old parse-or-drop path vs validation
+with local repair and a repair prompt.
+
+    python -m benchmarks.bench_extraction_repair
+    python -m benchmarks.bench_extraction_repair --chunks 1000 --broken 0.3
+
+BrokenJSONLLM wraps CannedExtractionLLM and damages a share of its answers the way small
+local models do (fences and chatter, single quotes, trailing or missing commas, output cut
+off at the token limit, no JSON at all). Asked to repair, it returns the intact answer.
+
+Also cuts one answer off at every character and checks local repair never keeps a
+half-written name or relationship type ("Zhongl", "ALLY") as if it were real.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.fakes import CannedExtractionLLM, PassthroughResolver, RecordingNeo4jClient
+from src.models.schema import Extraction
+from src.pipeline.extractor import LoreExtractor, OUTCOMES
+from src.utils.json_repair import repair_json
+from src.utils.schema_cache import GraphSchemaCache
+
+
+def fenced(text, rng):
+    return f"Here is the extracted lore:\n```json\n{text}\n```\nLet me know if you need more!"
+
+
+def single_quoted(text, rng):
+    return text.replace('"', "'")
+
+
+def trailing_comma(text, rng):
+    return text.replace("]", ",]").replace("}", ",}", 1)
+
+
+def missing_comma(text, rng):
+    return text.replace(", ", " ", 1)
+
+
+def truncated(text, rng):
+    return text[:rng.randint(len(text) // 2, len(text) - 1)]
+
+
+def no_json(text, rng):
+    return "I could not find any lore entities in this text."
+
+
+DAMAGE = (fenced, single_quoted, trailing_comma, missing_comma, truncated, no_json)
+
+
+class BrokenJSONLLM(CannedExtractionLLM):
+    def __init__(self, broken=0.2, seed=0):
+        super().__init__()
+        self.broken = broken
+        self.rng = random.Random(seed)
+        self.last_answer = None
+        self.repair_calls = 0
+        self.damage = {d.__name__: 0 for d in DAMAGE}
+
+    def invoke(self, prompt):
+        if "Return only the corrected JSON" in prompt:
+            self.repair_calls += 1
+            return AIMessage(content=self.last_answer)
+        answer = super().invoke(prompt).content
+        self.last_answer = answer
+        if self.rng.random() < self.broken:
+            damage = self.rng.choice(DAMAGE)
+            self.damage[damage.__name__] += 1
+            answer = damage(answer, self.rng)
+        return AIMessage(content=answer)
+
+
+def old_parse(extractor, content):
+    """The pre-validation path: json.loads on the cleaned string, drop the chunk otherwise."""
+    try:
+        return json.loads(extractor.clean_json_string(content))
+    except json.JSONDecodeError:
+        return None
+
+
+def make_texts(n, rng):
+    return [
+        " ".join(f"Stub Page {rng.randrange(500)} met Lore Keeper {rng.randrange(500)}." for _ in range(5))
+        for _ in range(n)
+    ]
+
+
+def written_values(data):
+    """Every entity name, alias and relationship endpoint/type an extraction would write."""
+    values = set()
+    for entity in data["entities"]:
+        values.update([entity["canonical_name"], *entity["aliases"]])
+    for rel in data["relationships"]:
+        values.update([rel["source"], rel["target"], rel["type"]])
+    return values
+
+
+def truncated_values(answer):
+    """Cuts `answer` at every position; returns the made-up values local repair let through."""
+    intact = written_values(Extraction.from_output(json.loads(answer))[0].to_dict())
+    made_up = set()
+    for cut in range(1, len(answer)):
+        try:
+            data = Extraction.from_output(repair_json(answer[:cut]))[0].to_dict()
+        except ValueError:
+            continue
+        made_up |= written_values(data) - intact
+    return made_up
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--broken", type=float, default=0.2, help="Share of answers the LLM damages")
+    args = parser.parse_args()
+
+    texts = make_texts(args.chunks, random.Random(0))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # extract() writes data/processed relative to the working directory
+        os.chdir(workdir)
+        try:
+            llm = BrokenJSONLLM(broken=args.broken)
+            extractor = LoreExtractor(
+                db=RecordingNeo4jClient(latency_ms=0), entity_resolver=PassthroughResolver(), llm=llm,
+                schema=GraphSchemaCache(path=None),
+            )
+            old_kept = sum(old_parse(extractor, llm.invoke(extractor.build_prompt(t)).content) is not None
+                           for t in texts)
+
+            llm = extractor.llm = BrokenJSONLLM(broken=args.broken)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                new_kept = sum(extractor.extract(t, i, "bench.txt") is not None for i, t in enumerate(texts))
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+    stats = extractor.extraction_stats
+    print(f"\n📊 {args.chunks} chunks, {args.broken:.0%} of answers damaged: "
+          + ", ".join(f"{k} {v}" for k, v in llm.damage.items()))
+    print(f"   parse or drop        kept {old_kept:5d}  dropped {args.chunks - old_kept:5d}")
+    print(f"   validate + repair    kept {new_kept:5d}  dropped {args.chunks - new_kept:5d}  "
+          f"({llm.repair_calls} repair prompts, {elapsed / args.chunks * 1000:.2f} ms/chunk)")
+    print("   outcomes: " + ", ".join(f"{o} {stats[o]}" for o in OUTCOMES)
+          + f", fixed types {stats['fixed_types']}, dropped items "
+          + str(stats["dropped_entities"] + stats["dropped_relationships"]))
+
+    answer = CannedExtractionLLM().invoke("Text: " + texts[0]).content
+    made_up = truncated_values(answer)
+    print(f"   {'✅' if not made_up else '❌'} cut at each of {len(answer)} characters: "
+          + (f"made-up values {sorted(made_up)[:5]}" if made_up else "no truncated name or type kept"))
+    if made_up:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
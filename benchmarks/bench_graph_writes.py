@@ -0,0 +1,108 @@
+"""
+Compares the old per-row Neo4j writes with the batched UNWIND path in LoreExtractor.upload.
+
+    python -m benchmarks.bench_graph_writes                  # recording stand-in
+    python -m benchmarks.bench_graph_writes --live           # local Neo4j from .env
+"""
+import argparse
+import random
+import re
+import time
+
+from benchmarks.fakes import RecordingNeo4jClient, PassthroughResolver
+from src.utils.schema_cache import GraphSchemaCache
+from src.pipeline.extractor import LoreExtractor
+
+REL_TYPES = ["MEMBER_OF", "ANCESTOR_OF", "WORSHIPS", "RULES", "LOCATED_IN", "ALLY_OF"]
+
+
+def make_chunks(n_chunks, entities_per_chunk, rels_per_chunk, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for c in range(n_chunks):
+        names = [f"Bench Entity {c}_{i}" for i in range(entities_per_chunk)]
+        chunks.append({
+            "entities": [
+                {"canonical_name": n, "aliases": [n.upper()], "label": "Character"} for n in names
+            ],
+            "relationships": [
+                {"source": rng.choice(names), "target": rng.choice(names), "type": rng.choice(REL_TYPES)}
+                for _ in range(rels_per_chunk)
+            ],
+        })
+    return chunks
+
+
+def upload_per_row(db, data, source_file):
+    """The pre-batching write path: one statement per entity and per relationship."""
+    for entity in data.get('entities', []):
+        db.query("""
+        MERGE (e:Entity {name: $canonical_name})
+        ON CREATE SET
+            e.aliases = $aliases,
+            e.label = $label,
+            e.source_file = $source
+        ON MATCH SET
+            e.aliases = apoc.coll.toSet(coalesce(e.aliases, []) + coalesce($aliases, []))
+        """, parameters={**entity, "source": source_file})
+    for rel in data.get('relationships', []):
+        if not re.match(r'^[A-Z_]+$', rel['type']): continue
+        db.query(f"""
+        MERGE (a:Entity {{name: $source}})
+        MERGE (b:Entity {{name: $target}})
+        MERGE (a)-[:{rel['type']}]->(b)
+        """, parameters=rel)
+
+
+def run(db, chunks, batch_size):
+    extractor = LoreExtractor(
+        db=db, entity_resolver=PassthroughResolver(), llm=object(), batch_size=batch_size,
+        schema=GraphSchemaCache(path=None),
+    )
+    results = {}
+
+    start = time.perf_counter()
+    for i, data in enumerate(chunks):
+        upload_per_row(db, data, source_file=f"bench_{i}.txt")
+    results["per_row"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, data in enumerate(chunks):
+        extractor.upload(data, source_file=f"bench_{i}.txt")
+    results["batched"] = time.perf_counter() - start
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=50)
+    parser.add_argument("--entities", type=int, default=30)
+    parser.add_argument("--rels", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Simulated round trip for the stand-in")
+    parser.add_argument("--live", action="store_true", help="Write to the Neo4j configured in .env")
+    args = parser.parse_args()
+
+    if args.live:
+        from src.utils.neo4j_client import Neo4jClient
+        db = Neo4jClient()
+        db.connect()
+    else:
+        db = RecordingNeo4jClient(latency_ms=args.latency_ms)
+
+    chunks = make_chunks(args.chunks, args.entities, args.rels)
+    rows = sum(len(c["entities"]) + len(c["relationships"]) for c in chunks)
+    results = run(db, chunks, args.batch_size)
+
+    print(f"📊 {len(chunks)} chunks, {rows} rows, batch_size={args.batch_size}")
+    for name, elapsed in results.items():
+        print(f"   {name:<8} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/s")
+    print(f"   speedup  {results['per_row'] / results['batched']:.1f}x")
+
+    if args.live:
+        db.query("MATCH (e:Entity) WHERE e.name STARTS WITH 'Bench Entity ' DETACH DELETE e")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Checks that the lxml cleaner produces exactly the BeautifulSoup cleaner's output, then times both.
+
+    python -m benchmarks.bench_html_cleaner                       # bundled fixtures
+    python -m benchmarks.bench_html_cleaner --dir path/to/html    # any folder of saved parse HTML
+    python -m benchmarks.bench_html_cleaner --processes 4         # also time the process pool
+"""
+import argparse
+import difflib
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.pipeline.html_cleaner import clean_html, clean_html_bs4, clean_html_lxml, UnsupportedMarkup
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def run_cleaner(cleaner, raw_html):
+    """Output or exception type, so pages the reference cleaner crashes on can be compared too."""
+    try:
+        return cleaner(raw_html)
+    except Exception as e:
+        return f"<{type(e).__name__}>"
+
+
+def clean_or_error(raw_html):
+    return run_cleaner(clean_html, raw_html)
+
+
+def verify(pages):
+    mismatches = 0
+    for name, raw_html in pages:
+        expected = run_cleaner(clean_html_bs4, raw_html)
+        try:
+            actual = clean_html_lxml(raw_html)
+            note = ""
+        except UnsupportedMarkup:
+            actual = run_cleaner(clean_html, raw_html)
+            note = " (falls back to bs4)"
+        if actual == expected:
+            print(f"   ✅ {name}{note}")
+        else:
+            mismatches += 1
+            print(f"   ❌ {name}")
+            diff = difflib.unified_diff(expected.split("\n"), actual.split("\n"), "bs4", "lxml", lineterm="")
+            print("\n".join(diff))
+    return mismatches
+
+
+def time_backend(backend, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, raw_html in pages:
+            run_cleaner(lambda html: clean_html(html, backend), raw_html)
+    return time.perf_counter() - start
+
+
+def time_pool(pages, repeat, processes):
+    htmls = [raw_html for _, raw_html in pages] * repeat
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        list(pool.map(clean_or_error, htmls[:processes]))  # warm up the workers
+        start = time.perf_counter()
+        list(pool.map(clean_or_error, htmls, chunksize=8))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default=FIXTURE_DIR)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=0)
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.dir, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    print(f"🔍 Comparing cleaners on {len(pages)} pages from {args.dir}")
+    mismatches = verify(pages)
+
+    n = len(pages) * args.repeat
+    results = {backend: time_backend(backend, pages, args.repeat) for backend in ("bs4", "lxml")}
+    if args.processes:
+        results[f"lxml x{args.processes} procs"] = time_pool(pages, args.repeat, args.processes)
+
+    print(f"📊 {n} page cleanings")
+    for name, elapsed in results.items():
+        print(f"   {name:<16} {elapsed:8.3f}s  {n / elapsed:8.0f} pages/s")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} page(s) differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Re-run cost with the ingest manifest (chunk lookups per second), then checks that pages sharing
+a chunk each reach the graph even when the first page's write failed:
+
+    run 1: A.txt's upload fails, B.txt (same text) uploads the shared chunk
+    run 2: A.txt must be uploaded again, not skipped as unchanged
+
+    python -m benchmarks.bench_ingest_manifest
+    python -m benchmarks.bench_ingest_manifest --chunks 50000
+
+Writes go to RecordingNeo4jClient; nothing leaves the machine.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.fakes import CannedExtractionLLM, PassthroughResolver, RecordingNeo4jClient
+from src.pipeline.extractor import ENTITY_UPSERT_CYPHER, LoreExtractor
+from src.utils.ingest_manifest import IngestManifest, UPLOADED
+from src.utils.schema_cache import GraphSchemaCache
+
+PAGE = "Lore Keeper 1 met Stub Page 2 in the archive. " * 10
+
+
+class FailingNeo4jClient(RecordingNeo4jClient):
+    """Fails every write while `failing` is set, like a Neo4j outage mid-run."""
+    def __init__(self):
+        super().__init__(latency_ms=0)
+        self.failing = False
+
+    def query(self, cypher_query, parameters=None):
+        if self.failing:
+            raise RuntimeError("simulated write failure")
+        return super().query(cypher_query, parameters)
+
+
+def time_lookups(workdir, n):
+    manifest = IngestManifest(path=os.path.join(workdir, "lookups.sqlite"), version="bench")
+    keys = [manifest.chunk_key(f"chunk {i}") for i in range(n)]
+    for i, key in enumerate(keys):
+        manifest.save_extraction(key, f"page_{i % 100}.txt", i, {"entities": [], "relationships": []})
+        manifest.mark_uploaded(key, f"page_{i % 100}.txt")
+    start = time.perf_counter()
+    skipped = sum(manifest.lookup(key, f"page_{i % 100}.txt")[0] == UPLOADED for i, key in enumerate(keys))
+    elapsed = time.perf_counter() - start
+    manifest.close()
+    return skipped, elapsed
+
+
+def page_dir(workdir, name):
+    path = os.path.join(workdir, name.replace(".txt", ""))
+    os.makedirs(path)
+    with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+        f.write(PAGE)
+    return path
+
+
+def shared_chunk_sources(workdir):
+    """Runs the failed-write scenario; returns the pages that reached the graph and the LLM calls it took."""
+    db = FailingNeo4jClient()
+    extractor = LoreExtractor(
+        db=db, entity_resolver=PassthroughResolver(), llm=CannedExtractionLLM(),
+        manifest=IngestManifest(path=os.path.join(workdir, "shared.sqlite"), version="bench"),
+        schema=GraphSchemaCache(path=None),
+    )
+    a_dir, b_dir = page_dir(workdir, "A.txt"), page_dir(workdir, "B.txt")
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.failing = True
+        extractor.process_directory(a_dir)
+        db.failing = False
+        extractor.process_directory(b_dir)
+        extractor.process_directory(a_dir)
+    sources = {
+        row["source"] for cypher, params in db.statements if cypher == ENTITY_UPSERT_CYPHER
+        for row in params["rows"]
+    }
+    return sources, extractor.llm.calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The extractor writes data/processed relative to the working directory
+        os.chdir(workdir)
+        try:
+            skipped, elapsed = time_lookups(workdir, args.chunks)
+            sources, llm_calls = shared_chunk_sources(workdir)
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n📊 {args.chunks} chunks: {skipped} skipped as uploaded, "
+          f"{args.chunks / elapsed:,.0f} lookups/s")
+    ok = sources == {"A.txt", "B.txt"}
+    print(f"   {'✅' if ok else '❌'} shared chunk after a failed write: uploaded for {sorted(sources)} "
+          f"({llm_calls} LLM call(s))")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Write throughput and read memory of the Neo4jClient access paths. Needs the Neo4j from .env.
+
+    python -m benchmarks.bench_neo4j_client
+    python -m benchmarks.bench_neo4j_client --statements 5000 --read-rows 200000
+
+Writes: the old path (new session + auto-commit run per statement), managed write
+transactions on the reused thread session, and BulkWriter committing every --bulk statements.
+Reads: peak Python memory of materializing a large result with .data() vs iter_query.
+"""
+import argparse
+import time
+import tracemalloc
+
+from src.utils.neo4j_client import Neo4jClient
+
+WRITE_CYPHER = "MERGE (e:BenchClient {id: $id}) SET e.value = $value"
+READ_CYPHER = "UNWIND range(1, $n) AS i RETURN i AS id, 'row ' + toString(i) AS text"
+CLEANUP_CYPHER = "MATCH (e:BenchClient) DETACH DELETE e"
+
+
+def write_per_session(db, n, offset):
+    """The pre-pooling path: a fresh session and an auto-commit transaction per statement."""
+    for i in range(n):
+        with db.driver.session() as session:
+            session.run(WRITE_CYPHER, {"id": offset + i, "value": i}).data()
+
+
+def write_managed(db, n, offset):
+    for i in range(n):
+        db.execute_write(WRITE_CYPHER, {"id": offset + i, "value": i})
+
+
+def write_bulk(db, n, offset, max_statements):
+    with db.bulk_writer(max_statements=max_statements) as writer:
+        for i in range(n):
+            writer.add(WRITE_CYPHER, {"id": offset + i, "value": i})
+
+
+def peak_memory(read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = read()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--statements", type=int, default=2000)
+    parser.add_argument("--bulk", type=int, default=500, help="BulkWriter max_statements")
+    parser.add_argument("--read-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    db = Neo4jClient()
+    db.connect()
+    n = args.statements
+    print(f"\n📊 {n} single-row MERGE statements")
+    for offset, (label, write) in enumerate([
+        ("session per statement", lambda o: write_per_session(db, n, o)),
+        ("managed tx, reused session", lambda o: write_managed(db, n, o)),
+        (f"bulk writer ({args.bulk}/tx)", lambda o: write_bulk(db, n, o, args.bulk)),
+    ]):
+        start = time.perf_counter()
+        write(offset * n)
+        elapsed = time.perf_counter() - start
+        print(f"   {label:<28} {elapsed:8.3f}s  {n / elapsed:8.0f} statements/s")
+
+    params = {"n": args.read_rows}
+    print(f"\n📊 Reading {args.read_rows} rows")
+    for label, read in [
+        ("execute_read (.data())", lambda: len(db.execute_read(READ_CYPHER, params))),
+        ("iter_query", lambda: sum(1 for _ in db.iter_query(READ_CYPHER, params))),
+    ]:
+        count, elapsed, peak = peak_memory(read)
+        print(f"   {label:<28} {elapsed:8.3f}s  {count} rows  peak {peak / 1e6:8.1f} MB")
+
+    db.execute_write(CLEANUP_CYPHER)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
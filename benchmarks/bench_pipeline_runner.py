@@ -0,0 +1,156 @@
+"""
+Wall time of the full ingest run stage after stage (crawl_category, then process_directory)
+vs streamed through PipelineRunner, with simulated latency in every stage.
+
+    python -m benchmarks.bench_pipeline_runner
+    python -m benchmarks.bench_pipeline_runner --pages 200 --page-latency-ms 50 --llm-latency-ms 100
+
+The wiki is StubMediaWiki (latency per request), the LLM is CannedExtractionLLM (latency per
+chunk), names resolve through EntityResolver with the trigram embedding stand-in and writes go
+to RecordingNeo4jClient (latency per statement). Both runs use the same worker counts.
+
+Then checks the pipeline writes the same graph (the same statements, in the same order) with
+one LLM worker as with --extract-workers, with LLM latency jittered so chunks finish out of order.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_entity_resolver import TrigramEmbedding
+from benchmarks.fakes import CannedExtractionLLM, RecordingNeo4jClient
+from benchmarks.stub_wiki import StubMediaWiki
+from src.pipeline.chunker import TextChunker
+from src.pipeline.extractor import LoreExtractor
+from src.pipeline.runner import PipelineRunner
+from src.pipeline.scraper import GenshinSmartScraper
+from src.utils.entity_resolver import EntityResolver
+from src.utils.ingest_manifest import IngestManifest
+from src.utils.schema_cache import GraphSchemaCache
+
+
+class JitteredExtractionLLM(CannedExtractionLLM):
+    """CannedExtractionLLM taking anywhere between 0 and 2x latency_ms per chunk."""
+    def __init__(self, latency_ms=0.0, seed=0):
+        super().__init__()
+        self.max_latency = 2 * latency_ms / 1000
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            delay = self.rng.random() * self.max_latency
+        time.sleep(delay)
+        return super().invoke(prompt)
+
+
+def four_chars_per_token(text):
+    return max(1, len(text) // 4)
+
+
+def build(args, workdir, wiki):
+    scraper = GenshinSmartScraper(
+        output_dir=os.path.join(workdir, "raw"), base_url=wiki.url, requests_per_second=100000,
+        max_workers=args.scrape_workers,
+    )
+    db = RecordingNeo4jClient(latency_ms=args.db_latency_ms)
+    extractor = LoreExtractor(
+        db=db,
+        entity_resolver=EntityResolver(
+            collection_name="bench", path=os.path.join(workdir, "chroma"),
+            emb_fn=TrigramEmbedding(latency_ms=args.embed_latency_ms),
+        ),
+        llm=CannedExtractionLLM(latency_ms=args.llm_latency_ms),
+        manifest=IngestManifest(path=os.path.join(workdir, "manifest.sqlite"), version="bench"),
+        chunker=TextChunker(max_tokens=300, overlap_tokens=20, count_tokens=four_chars_per_token),
+        schema=GraphSchemaCache(path=None),
+    )
+    return scraper, extractor, db
+
+
+def sequential(args, workdir, wiki):
+    scraper, extractor, db = build(args, workdir, wiki)
+    start = time.perf_counter()
+    scraper.crawl_category("Lore", limit=None)
+    extractor.process_directory(scraper.output_dir, max_workers=args.extract_workers)
+    elapsed = time.perf_counter() - start
+    scraper.close()
+    return elapsed, extractor.llm.calls, len(db.statements)
+
+
+def pipelined(args, workdir, wiki):
+    scraper, extractor, db = build(args, workdir, wiki)
+    runner = PipelineRunner(scraper, extractor, extract_workers=args.extract_workers, queue_size=args.queue_size)
+    start = time.perf_counter()
+    runner.run(categories=["Lore"], limit=None, include_existing=False)
+    elapsed = time.perf_counter() - start
+    scraper.close()
+    return elapsed, extractor.llm.calls, len(db.statements)
+
+
+def written_graph(args, workdir, wiki, extract_workers):
+    """Statements one pipelined run over the saved pages sends to the graph."""
+    scraper, extractor, db = build(args, workdir, wiki)
+    extractor.llm = JitteredExtractionLLM(latency_ms=args.llm_latency_ms)
+    scraper.crawl_category("Lore", limit=None)
+    runner = PipelineRunner(scraper, extractor, extract_workers=extract_workers, queue_size=args.queue_size)
+    runner.run(categories=[], include_existing=True)
+    scraper.close()
+    return db.statements
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--page-latency-ms", type=float, default=40)
+    parser.add_argument("--llm-latency-ms", type=float, default=40)
+    parser.add_argument("--embed-latency-ms", type=float, default=1)
+    parser.add_argument("--db-latency-ms", type=float, default=2)
+    parser.add_argument("--scrape-workers", type=int, default=4)
+    parser.add_argument("--extract-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args()
+
+    results = {}
+    cwd = os.getcwd()
+    for name, run in (("stage by stage", sequential), ("pipelined", pipelined)):
+        with tempfile.TemporaryDirectory() as workdir, \
+                StubMediaWiki.generate(n_pages=args.pages, latency=args.page_latency_ms / 1000) as wiki:
+            # The extractor writes data/processed relative to the working directory
+            os.chdir(workdir)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = run(args, workdir, wiki)
+            finally:
+                os.chdir(cwd)
+        print(f"   ⏱️ {name} done")
+
+    print(f"\n📊 {args.pages} pages, {args.scrape_workers} fetch threads, {args.extract_workers} LLM workers")
+    base = results["stage by stage"][0]
+    for name, (elapsed, chunks, statements) in results.items():
+        print(f"   {name:<15} {elapsed:7.2f}s  {chunks:5d} chunks  {statements:6d} statements  "
+              f"{base / elapsed:5.2f}x")
+
+    graphs = []
+    for workers in (1, args.extract_workers):
+        with tempfile.TemporaryDirectory() as workdir, StubMediaWiki.generate(n_pages=args.pages) as wiki:
+            os.chdir(workdir)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    graphs.append(written_graph(args, workdir, wiki, workers))
+            finally:
+                os.chdir(cwd)
+    same = graphs[0] == graphs[1]
+    print(f"   {'✅' if same else '❌'} 1 vs {args.extract_workers} LLM workers: "
+          f"{'same' if same else 'different'} graph writes ({len(graphs[0])} statements)")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Replays a skewed stream of popular questions through LoreReasoner.ask with and without the
+query cache, then checks a graph write invalidates exactly the results it changed.
+
+    python -m benchmarks.bench_query_cache
+    python -m benchmarks.bench_query_cache --asks 500 --llm-ms 800 --db-ms 10   # closer to a local 7B model
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.fakes import FakeLoreGraph, SlowLoreLLM
+from src.pipeline.rag_engine import LoreReasoner
+from src.utils.query_cache import QueryCache
+from src.utils.schema_cache import GraphSchemaCache
+
+SUBJECTS = [
+    "Zhongli", "Venti", "Xiao", "Guizhong", "the Eight Adepti", "the Fatui", "Khaenri'ah", "the Abyss Order",
+    "Celestia", "Rhinedottir", "the Traveler", "Dainsleif", "Vedrfolnir", "the Tsaritsa", "Liyue Qixing",
+]
+PHRASINGS = ["Who is {}?", "who is {}", "Who is  {} ?", "Tell me about {}.", "What happened to {}?"]
+
+
+def question_stream(n, seed=0):
+    """Zipf-ish: a few questions make up most of the traffic, with small phrasing variations."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(SUBJECTS))]
+    for _ in range(n):
+        subject = rng.choices(SUBJECTS, weights)[0]
+        yield rng.choice(PHRASINGS[:3] if rng.random() < 0.8 else PHRASINGS).format(subject)
+
+
+def replay(reasoner, questions):
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        reasoner.ask(question)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def run(label, reasoner, questions):
+    llm, graph = reasoner.llm, reasoner.graph
+    calls, queries = llm.calls, len(graph.queries)
+    latencies = replay(reasoner, questions)
+    return label, latencies, llm.calls - calls, len(graph.queries) - queries
+
+
+def report(label, latencies, llm_calls, db_queries):
+    mean = sum(latencies) / len(latencies)
+    p50 = latencies[len(latencies) // 2]
+    print(
+        f"   {label:<16} mean {mean * 1000:8.1f} ms   p50 {p50 * 1000:8.2f} ms   "
+        f"LLM calls {llm_calls:5d}   DB queries {db_queries:5d}"
+    )
+
+
+def make_reasoner(args, cache):
+    graph = FakeLoreGraph(latency_ms=args.db_ms)
+    llm = SlowLoreLLM(latency_ms=args.llm_ms)
+    reasoner = LoreReasoner(graph=graph, llm=llm, cache=cache, schema=GraphSchemaCache(path=None))
+    return reasoner, graph, llm
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--asks", type=int, default=200)
+    parser.add_argument("--llm-ms", type=float, default=50.0)
+    parser.add_argument("--db-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    questions = list(question_stream(args.asks))
+
+    results = []
+
+    # No cache: max_entries=0 evicts everything as soon as it is stored
+    reasoner, graph, llm = make_reasoner(args, QueryCache(max_entries=0))
+    results.append(run("uncached", reasoner, questions))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "query_cache.sqlite")
+        reasoner, graph, llm = make_reasoner(args, QueryCache(path=path))
+        results.append(run("cached", reasoner, questions))
+
+        # A write that changes one popular question's rows: only that answer is phrased again
+        touched = reasoner.cache.get("cypher", next(k for ns, k in reasoner.cache.entries if ns == "cypher"))
+        graph.write([touched])
+        calls, before = llm.calls, len(graph.queries)
+        replay(reasoner, list(dict.fromkeys(questions)))
+        rows_requeried = sum(1 for q in graph.queries[before:] if "GraphMeta" not in q)
+        invalidation = (llm.calls - calls, rows_requeried)
+
+        # Persistent tier: a fresh process (new reasoner, same file) starts warm
+        reasoner.cache.close()
+        reasoner, graph, llm = make_reasoner(args, QueryCache(path=path))
+        graph.version = 1
+        graph.changed.add(touched)
+        results.append(run("reopened", reasoner, questions))
+        reasoner.cache.close()
+
+    print(f"\n📊 {args.asks} asks over {len(set(questions))} distinct phrasings "
+          f"(LLM {args.llm_ms:.0f} ms/call, DB {args.db_ms:.0f} ms/query)")
+    for result in results:
+        report(*result)
+    print(f"   after a write touching one query: {invalidation[0]} LLM call(s), "
+          f"{invalidation[1]} row queries re-run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Accuracy and latency of the QuestionRouter fast path against the LLM Cypher chain.
+
+    python -m benchmarks.bench_router                 # labeled questions + stand-in graph/LLM
+    python -m benchmarks.bench_router --llm-ms 2500   # closer to a local 7B model
+    python -m benchmarks.bench_router --live          # real Neo4j (.env) + Ollama: compare returned entities
+
+Offline, accuracy is measured on hand-labeled questions: a routed question counts as
+correct only if both its shape and the extracted entity name match the label; questions
+labeled None must go to the LLM. --live also runs both paths on the same questions and
+reports how often the template rows contain the entities the chain's rows do.
+"""
+import argparse
+import time
+
+from benchmarks.fakes import FakeLoreGraph, SlowLoreLLM
+from src.pipeline.question_router import QuestionRouter
+from src.pipeline.rag_engine import LoreReasoner
+from src.utils.query_cache import QueryCache
+from src.utils.schema_cache import GraphSchemaCache
+
+# (question, expected kind, expected name); kind None = must fall back to the LLM
+LABELED = [
+    ("Who is Vedrfolnir?", "lookup", "Vedrfolnir"),
+    ("Who is Zhongli?", "lookup", "Zhongli"),
+    ("who is rex lapis", "lookup", "rex lapis"),
+    ("What is Celestia?", "lookup", "Celestia"),
+    ("What are the Adepti?", "lookup", "Adepti"),
+    ("What was Khaenri'ah?", "lookup", "Khaenri'ah"),
+    ("Who was Guizhong?", "lookup", "Guizhong"),
+    ("Tell me about the Abyss Order.", "lookup", "Abyss Order"),
+    ("Describe Dainsleif", "lookup", "Dainsleif"),
+    ("What is the Irminsul?", "lookup", "Irminsul"),
+    ("Who is the Tsaritsa?", "lookup", "Tsaritsa"),
+    ("What is a Vision?", "lookup", "Vision"),
+    ("Who is in the Adventurers' Guild?", "membership", "Adventurers' Guild"),
+    ("Who are the members of the Fatui?", "membership", "Fatui"),
+    ("Who are members of the Eight Adepti", "membership", "Eight Adepti"),
+    ("List the members of the Liyue Qixing", "membership", "Liyue Qixing"),
+    ("List all members of the Knights of Favonius.", "membership", "Knights of Favonius"),
+    ("Who belongs to the Abyss Order?", "membership", "Abyss Order"),
+    ("Who is part of the Fatui Harbingers?", "membership", "Fatui Harbingers"),
+    ("Members of the Yaksha", "membership", "Yaksha"),
+    ("Who is a member of the Seven?", "membership", "Seven"),
+    ("Find Rex Lapis", "fuzzy", "Rex Lapis"),
+    ("Search for Guizhong", "fuzzy", "Guizhong"),
+    ("search Morax", "fuzzy", "Morax"),
+    ("Look up Havria", "fuzzy", "Havria"),
+    ("Find entities named Osial", "fuzzy", "Osial"),
+    ("Who is the strongest Archon?", None, None),
+    ("What is the relationship between Zhongli and Venti?", None, None),
+    ("Why did Khaenri'ah fall?", None, None),
+    ("What happened to Osial?", None, None),
+    ("How many Harbingers are there?", None, None),
+    ("Which Archon rules Liyue?", None, None),
+    ("Who killed the God of Salt?", None, None),
+    ("Where is the Guili Plains?", None, None),
+    ("Who is Inazuma's Archon?", None, None),
+    ("Who was the first Yaksha to fall?", None, None),
+    ("What did Rhinedottir create?", None, None),
+    ("When did the Cataclysm happen?", None, None),
+    # "X of Y" relations: the full-text index would still return Y (or a fuzzy near-miss)
+    ("Who is the Archon of Inazuma?", None, None),
+    ("Who is the father of Kaeya?", None, None),
+    ("What is the capital of Liyue?", None, None),
+    ("Who is in charge of the Fatui?", None, None),
+    ("Who is the ruler of Sumeru?", None, None),
+    ("Who are the children of Rhinedottir?", None, None),
+]
+
+
+def offline_accuracy(router):
+    correct = routed = wrong_route = missed = 0
+    failures = []
+    start = time.perf_counter()
+    results = [(q, router.route(q)) for q, _, _ in LABELED]
+    per_question = (time.perf_counter() - start) / len(LABELED)
+
+    for (question, kind, name), (_, route) in zip(LABELED, results):
+        if route is not None:
+            routed += 1
+        if kind is None:
+            if route is not None:
+                wrong_route += 1
+                failures.append(f"{question!r} routed as {route}, expected LLM")
+        elif route is None:
+            missed += 1
+            failures.append(f"{question!r} not routed, expected {kind}")
+        elif (route.kind, route.name.lower()) == (kind, name.lower()):
+            correct += 1
+        else:
+            wrong_route += 1
+            failures.append(f"{question!r} routed as {route}, expected {kind} {name!r}")
+    return {
+        "routed": routed, "correct": correct, "wrong": wrong_route, "missed": missed,
+        "templated": sum(1 for _, kind, _ in LABELED if kind), "per_question": per_question,
+        "failures": failures,
+    }
+
+
+def end_to_end(args, router):
+    """Mean ask() latency over the labeled questions with and without the router (no caching)."""
+    results = {}
+    for label, use_router in (("chain", False), ("router", True)):
+        graph = FakeLoreGraph(latency_ms=args.db_ms)
+        llm = SlowLoreLLM(latency_ms=args.llm_ms)
+        reasoner = LoreReasoner(
+            graph=graph, llm=llm, cache=QueryCache(max_entries=0), schema=GraphSchemaCache(path=None),
+            router=router if use_router else False,
+        )
+        start = time.perf_counter()
+        for question, _, _ in LABELED:
+            reasoner.ask(question)
+        results[label] = ((time.perf_counter() - start) / len(LABELED), llm.calls)
+    return results
+
+
+def names_in(rows):
+    """Every string value in the rows, lowercased: enough to compare which entities came back."""
+    found = set()
+    for row in rows:
+        for value in row.values():
+            values = value if isinstance(value, list) else [value]
+            found.update(v.lower() for v in values if isinstance(v, str))
+    return found
+
+
+def live_comparison(router):
+    reasoner = LoreReasoner(cache=QueryCache(max_entries=0), router=False)
+    agree = total = 0
+    template_time = chain_time = 0.0
+    for question, kind, _ in LABELED:
+        route = router.route(question)
+        if route is None:
+            continue
+        total += 1
+        start = time.perf_counter()
+        template_rows = reasoner.graph.query(route.cypher, params=route.params)
+        template_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            chain_rows = reasoner.graph.query(reasoner.generate_cypher(question))
+        except Exception as e:
+            chain_rows = []
+            print(f"   chain failed on {question!r}: {e}")
+        chain_time += time.perf_counter() - start
+
+        chain_names, template_names = names_in(chain_rows), names_in(template_rows)
+        # Agreement: the template found something, and everything the chain found (if anything)
+        # overlaps it
+        ok = bool(template_rows) and (not chain_names or bool(chain_names & template_names))
+        agree += ok
+        print(f"   {'✅' if ok else '❌'} {question!r}: template {len(template_rows)} rows, chain {len(chain_rows)} rows")
+    if total:
+        print(f"\n   live agreement {agree}/{total}; mean latency template "
+              f"{template_time / total * 1000:.0f} ms vs chain {chain_time / total * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=float, default=200.0)
+    parser.add_argument("--db-ms", type=float, default=5.0)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+    router = QuestionRouter()
+
+    accuracy = offline_accuracy(router)
+    timings = end_to_end(args, router)
+
+    print(f"\n📊 Router on {len(LABELED)} labeled questions ({accuracy['templated']} template-shaped)")
+    print(f"   routed {accuracy['routed']}, correct {accuracy['correct']}, "
+          f"wrong {accuracy['wrong']}, template-shaped but sent to LLM {accuracy['missed']}")
+    print(f"   routing cost {accuracy['per_question'] * 1e6:.1f} µs/question")
+    for failure in accuracy["failures"]:
+        print(f"   ⚠️ {failure}")
+    for label, (mean, calls) in timings.items():
+        print(f"   ask() via {label:<7} mean {mean * 1000:7.1f} ms   LLM calls {calls}  "
+              f"(LLM {args.llm_ms:.0f} ms/call)")
+
+    if args.live:
+        live_comparison(router)
+
+
+if __name__ == "__main__":
+    main()
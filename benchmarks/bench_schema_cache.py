@@ -0,0 +1,93 @@
+"""
+Measures what the schema snapshot saves LoreReasoner: introspection on startup, and prompt
+tokens per question (full introspected schema vs the compact top-K prompt schema).
+
+    python -m benchmarks.bench_schema_cache
+    python -m benchmarks.bench_schema_cache --rel-types 600 --top-k 10
+    python -m benchmarks.bench_schema_cache --live      # also time Neo4jGraph introspection on the .env graph
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fakes import FakeLoreGraph, SlowLoreLLM
+from src.pipeline.chunker import load_token_counter
+from src.pipeline.rag_engine import LoreReasoner
+from src.utils.schema_cache import GraphSchemaCache
+
+QUESTIONS = [
+    "Who are the members of the Fatui?",
+    "Which gods did Rhinedottir create?",
+    "Where is the Guili Plains located?",
+    "Who killed the Archon Osial?",
+    "Who guards the Chasm?",
+]
+
+
+def time_startup(graph, schema_path):
+    start = time.perf_counter()
+    before = len(graph.queries)
+    LoreReasoner(graph=graph, llm=SlowLoreLLM(latency_ms=0), schema=GraphSchemaCache(schema_path))
+    return time.perf_counter() - start, len(graph.queries) - before
+
+
+def time_live():
+    from langchain_neo4j import Neo4jGraph
+    from dotenv import load_dotenv
+    load_dotenv()
+    start = time.perf_counter()
+    graph = Neo4jGraph(
+        url=os.getenv("NEO4J_URI"), username=os.getenv("NEO4J_USERNAME"), password=os.getenv("NEO4J_PASSWORD")
+    )
+    introspected = time.perf_counter() - start
+    return introspected, len(graph.get_schema)
+
+
+def count_saves(schema, graph, writes):
+    """Simulates extractor writes: mostly known types, a new one now and then."""
+    saves = 0
+    known = list(graph.rel_types)
+    for i in range(writes):
+        rel_type = f"NEW_TYPE_{i}" if i % 250 == 0 else known[i % len(known)]
+        if schema.record(entity_labels=["Character"], relationship_types=[rel_type]):
+            saves += 1
+    return saves
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rel-types", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=15)
+    parser.add_argument("--db-ms", type=float, default=50.0, help="Simulated cost of one introspection query")
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    count_tokens = load_token_counter("Qwen/Qwen2.5-7B-Instruct")
+    graph = FakeLoreGraph(latency_ms=args.db_ms, n_rel_types=args.rel_types)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "graph_schema.json")
+        cold, cold_queries = time_startup(graph, path)
+        warm, warm_queries = time_startup(graph, path)
+
+        schema = GraphSchemaCache(path)
+        full_tokens = count_tokens(graph.get_schema)
+        compact = [count_tokens(schema.prompt_schema(q, top_k=args.top_k)) for q in QUESTIONS]
+        saves = count_saves(schema, graph, 1000)
+
+    print(f"\n📊 Schema snapshot ({args.rel_types} relationship types, {args.db_ms:.0f} ms per introspection query)")
+    print(f"   startup, no snapshot   {cold * 1000:8.1f} ms   {cold_queries} introspection queries")
+    print(f"   startup, snapshot      {warm * 1000:8.1f} ms   {warm_queries} introspection queries")
+    print(f"   prompt schema          full {full_tokens} tokens -> top-{args.top_k} "
+          f"{min(compact)}-{max(compact)} tokens per question")
+    print(f"   1000 extractor writes  {saves} snapshot rewrites (only when a type is new)")
+    print(f"   e.g. '{QUESTIONS[0]}' ->\n      " + schema.prompt_schema(QUESTIONS[0], top_k=args.top_k).replace("\n", "\n      "))
+
+    if args.live:
+        seconds, chars = time_live()
+        print(f"   live Neo4jGraph introspection: {seconds * 1000:.0f} ms, schema string {chars} chars")
+
+
+if __name__ == "__main__":
+    main()
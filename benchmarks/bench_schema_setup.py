@@ -0,0 +1,107 @@
+"""
+Upload throughput as the graph grows, without and with the constraints/indexes from
+Neo4jClient.ensure_schema. Needs the Neo4j from .env.
+
+DESTRUCTIVE: the first half runs with the entity_name_unique constraint and entity_label
+index DROPPED, in whichever database it runs against; it also writes then deletes
+"Bench Entity" nodes. Use a scratch database (Enterprise: CREATE DATABASE bench), and the
+benchmark refuses to start without --allow-schema-drop. The schema is recreated at the end,
+even if a round fails.
+
+    python -m benchmarks.bench_schema_setup --database bench --allow-schema-drop
+    python -m benchmarks.bench_schema_setup --database bench --allow-schema-drop --rounds 10 --chunks 100
+
+Each round uploads --chunks fresh chunks through LoreExtractor.upload. Without the
+uniqueness constraint every MERGE scans the Entity label, so rows/s falls round after
+round; with it, throughput should stay flat.
+"""
+import argparse
+import time
+
+from benchmarks.bench_graph_writes import make_chunks
+from benchmarks.fakes import PassthroughResolver
+from src.pipeline.extractor import LoreExtractor
+from src.utils.neo4j_client import Neo4jClient
+from src.utils.schema_cache import GraphSchemaCache
+
+DROP_SCHEMA_STATEMENTS = [
+    "DROP CONSTRAINT entity_name_unique IF EXISTS",
+    "DROP INDEX entity_label IF EXISTS",
+]
+CLEANUP_CYPHER = """
+MATCH (e:Entity) WHERE e.name STARTS WITH 'Bench Entity '
+CALL { WITH e DETACH DELETE e } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+
+def ingest_rounds(extractor, args):
+    throughput = []
+    for r in range(args.rounds):
+        chunks = make_chunks(args.chunks, args.entities, args.rels, seed=r)
+        # Distinct names per round so the graph actually grows
+        for chunk in chunks:
+            for entity in chunk["entities"]:
+                entity["canonical_name"] = f"{entity['canonical_name']}_r{r}"
+            for rel in chunk["relationships"]:
+                rel["source"], rel["target"] = f"{rel['source']}_r{r}", f"{rel['target']}_r{r}"
+        rows = sum(len(c["entities"]) + len(c["relationships"]) for c in chunks)
+
+        start = time.perf_counter()
+        for i, data in enumerate(chunks):
+            extractor.upload(data, source_file=f"bench_{r}_{i}.txt")
+        throughput.append(rows / (time.perf_counter() - start))
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--entities", type=int, default=30)
+    parser.add_argument("--rels", type=int, default=40)
+    parser.add_argument("--database", help="Scratch database to run in (default: NEO4J_DATABASE from .env)")
+    parser.add_argument("--allow-schema-drop", action="store_true",
+                        help="Confirms the benchmark may drop the Entity constraint/index in that database")
+    args = parser.parse_args()
+
+    db = Neo4jClient()
+    if args.database:
+        db.database = args.database
+    target = db.database or "the server's default database"
+    if not args.allow_schema_drop:
+        parser.error(f"this drops the Entity uniqueness constraint and label index in {target}; "
+                     "point --database at a scratch database and pass --allow-schema-drop")
+    print(f"⚠️ Dropping and recreating the Entity schema in {target}.")
+    db.connect()
+    extractor = LoreExtractor(
+        db=db, entity_resolver=PassthroughResolver(), llm=object(), schema=GraphSchemaCache(path=None),
+    )
+    # The auto-commit session, because CALL ... IN TRANSACTIONS can't run inside a managed transaction
+    with db.driver.session(database=db.database) as session:
+        session.run(CLEANUP_CYPHER).consume()
+
+    results = {}
+    try:
+        for statement in DROP_SCHEMA_STATEMENTS:
+            db.execute_write(statement)
+        results["no constraint"] = ingest_rounds(extractor, args)
+        with db.driver.session(database=db.database) as session:
+            session.run(CLEANUP_CYPHER).consume()
+    finally:
+        # Never leave the database without its constraint
+        db.ensure_schema()
+
+    results["ensure_schema"] = ingest_rounds(extractor, args)
+    with db.driver.session(database=db.database) as session:
+        session.run(CLEANUP_CYPHER).consume()
+    db.close()
+
+    per_round = args.chunks * args.entities
+    print(f"\n📊 rows/s per round of {args.chunks} chunks (+{per_round} entities per round)")
+    for label, throughput in results.items():
+        cells = "  ".join(f"{t:7.0f}" for t in throughput)
+        print(f"   {label:<14} {cells}   last/first {throughput[-1] / throughput[0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Startup cost of LoreExtractor / EntityResolver, and repeat-run embedding cost, each measured
+in a fresh interpreter (imports included).
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --names 2000 --embed-ms 2
+
+"construct" is what every CLI run pays now that Chroma, the embedding model, the tokenizer,
+the LLM client and Neo4j load on first use; "construct + load all" forces them all, which is
+roughly what construction used to cost (minus the Neo4j connection and the real models,
+which aren't available offline). The resolver runs resolve the same names in two processes
+with the alias tier off, so only the on-disk embedding cache can save the second run's
+embeddings (times exclude imports).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+CONSTRUCT = """
+from src.pipeline.extractor import LoreExtractor
+from src.utils.entity_resolver import EntityResolver
+from src.utils.schema_cache import GraphSchemaCache
+extractor = LoreExtractor(entity_resolver=EntityResolver(path={path!r}), schema=GraphSchemaCache(path=None))
+"""
+
+LOAD_ALL = CONSTRUCT + """
+extractor.entity_resolver.load()
+extractor.load_llm()
+extractor.chunker.count_tokens("warm up")
+"""
+
+RESOLVE = """
+from benchmarks.bench_entity_resolver import TrigramEmbedding, NoAliasIndex
+from src.utils.entity_resolver import EntityResolver
+emb = TrigramEmbedding(latency_ms={embed_ms})
+resolver = EntityResolver(path={path!r}, emb_fn=emb, alias_index=NoAliasIndex())
+begin = time.perf_counter()
+resolver.resolve_many([f"Bench Entity {{i}}" for i in range({names})])
+print(json.dumps({{"embedded": emb.names_embedded, "resolve_seconds": time.perf_counter() - begin}}))
+"""
+
+TIMED = """
+import json, time
+start = time.perf_counter()
+{body}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def measure(body):
+    out = subprocess.run(
+        [sys.executable, "-c", TIMED.format(body=body)], capture_output=True, text=True, check=True
+    ).stdout
+    result = {}
+    for line in out.splitlines():
+        if line.startswith("{"):
+            result.update(json.loads(line))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=1000)
+    parser.add_argument("--embed-ms", type=float, default=1.0, help="Embedding cost per name")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("\n📊 Startup (fresh interpreter, best of %d)" % args.repeat)
+    with tempfile.TemporaryDirectory() as path:
+        for label, body in (("construct", CONSTRUCT), ("construct + load all", LOAD_ALL)):
+            best = min(measure(body.format(path=path))["seconds"] for _ in range(args.repeat))
+            print(f"   {label:<22} {best:7.2f}s")
+
+    print(f"\n📊 Resolving {args.names} names twice, alias tier off ({args.embed_ms:.1f} ms/name embedding)")
+    with tempfile.TemporaryDirectory() as path:
+        body = RESOLVE.format(path=path, embed_ms=args.embed_ms, names=args.names)
+        for label in ("first run", "second run"):
+            result = measure(body)
+            print(f"   {label:<22} {result['resolve_seconds']:7.2f}s  names embedded {result['embedded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Time-to-first-token and concurrency of LoreReasoner.astream against blocking ask() calls.
+
+    python -m benchmarks.bench_streaming
+    python -m benchmarks.bench_streaming --users 200 --llm-ms 400 --token-ms 30
+
+Every simulated user asks a different question that needs the LLM for both Cypher and the
+answer, with caching off. The async run serves all users from one event loop; the blocking
+run uses a thread pool, which is how ask() would have to be served concurrently.
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeLoreGraph, FakeAsyncNeo4jClient, SlowLoreLLM
+from src.pipeline.rag_engine import LoreReasoner
+from src.utils.query_cache import QueryCache
+from src.utils.schema_cache import GraphSchemaCache
+
+
+def make_reasoner(args):
+    graph = FakeLoreGraph(latency_ms=args.db_ms)
+    return LoreReasoner(
+        graph=graph,
+        llm=SlowLoreLLM(latency_ms=args.llm_ms, token_ms=args.token_ms),
+        cache=QueryCache(max_entries=0),
+        schema=GraphSchemaCache(path=None),
+        async_db=FakeAsyncNeo4jClient(graph, latency_ms=args.db_ms),
+    )
+
+
+def questions(n):
+    return [f"What happened to the {i}th Harbinger?" for i in range(n)]
+
+
+async def run_async(reasoner, qs):
+    peak_threads = threading.active_count()
+
+    async def one(question):
+        nonlocal peak_threads
+        start = time.perf_counter()
+        first_token = None
+        async for event in reasoner.astream(question):
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - start
+                peak_threads = max(peak_threads, threading.active_count())
+        return first_token, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(q) for q in qs))
+    return results, time.perf_counter() - start, peak_threads
+
+
+def run_threads(reasoner, qs, workers):
+    def one(question):
+        reasoner.ask(question)
+        # Every user arrived at `start` (queueing for a thread counts), and a blocking
+        # call has nothing to show until the whole answer is back
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(one, qs))
+        peak_threads = threading.active_count()
+    return results, time.perf_counter() - start, peak_threads
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def report(label, results, wall, threads):
+    ttft = [r[0] for r in results]
+    total = [r[1] for r in results]
+    print(
+        f"   {label:<22} TTFT p50 {percentile(ttft, 0.5) * 1000:7.0f} ms  p95 {percentile(ttft, 0.95) * 1000:7.0f} ms   "
+        f"answer p95 {percentile(total, 0.95) * 1000:7.0f} ms   wall {wall:6.2f}s   threads {threads}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="Delay before an LLM call's first token")
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--db-ms", type=float, default=10.0)
+    parser.add_argument("--threads", type=int, default=16, help="Pool size for the blocking ask() run")
+    args = parser.parse_args()
+    qs = questions(args.users)
+
+    async_results = asyncio.run(run_async(make_reasoner(args), qs))
+    thread_results = run_threads(make_reasoner(args), qs, args.threads)
+
+    print(f"\n📊 {args.users} concurrent users (LLM first token {args.llm_ms:.0f} ms, "
+          f"{args.token_ms:.0f} ms/token, DB {args.db_ms:.0f} ms)")
+    report("astream, one loop", *async_results)
+    report(f"ask, {args.threads} threads", *thread_results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import re
+import json
+import asyncio
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_neo4j.graphs.graph_store import GraphStore
+
+from src.utils.schema_cache import ENTITY_LABELS_CYPHER, RELATIONSHIP_TYPES_CYPHER, PROPERTY_KEYS_CYPHER
+
+
+class RecordingNeo4jClient:
+    """
+    Stand-in for Neo4jClient that records every statement instead of sending it.
+    `latency_ms` simulates the network + transaction cost of one round trip.
+    """
+    def __init__(self, latency_ms=2.0):
+        self.latency = latency_ms / 1000
+        self.statements = []
+        self.rows_sent = 0
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def query(self, cypher_query, parameters=None):
+        self.statements.append((cypher_query, parameters))
+        if parameters and isinstance(parameters.get("rows"), list):
+            self.rows_sent += len(parameters["rows"])
+        else:
+            self.rows_sent += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return []
+
+    execute_read = execute_write = query
+
+    def write_transaction(self, transaction_function, *args):
+        return transaction_function(RecordingTransaction(self), *args)
+
+    def ensure_schema(self, timeout=300):
+        return True
+
+    def bulk_writer(self, max_statements=1000):
+        """Records each statement as its own round trip, like Neo4jClient's writer with max_statements=1."""
+        return RecordingBulkWriter(self)
+
+
+class RecordingTransaction:
+    """The `tx` handed to transaction functions: each run() is recorded like a query()."""
+    def __init__(self, client):
+        self.client = client
+
+    def run(self, cypher_query, parameters=None):
+        return RecordingResult(self.client.query(cypher_query, parameters))
+
+
+class RecordingResult:
+    def __init__(self, records):
+        self.records = records
+
+    def data(self):
+        return self.records
+
+    def consume(self):
+        pass
+
+
+class RecordingBulkWriter:
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def add(self, cypher_query, parameters=None):
+        self.client.query(cypher_query, parameters)
+
+    def flush(self):
+        pass
+
+
+class PassthroughResolver:
+    """Stand-in for EntityResolver that treats every name as already canonical."""
+    def resolve_name(self, raw_name, threshold=0.85):
+        return raw_name
+
+    def resolve_many(self, names, threshold=0.85):
+        return {name: name for name in names}
+
+    def register_aliases(self, entries):
+        return 0
+
+
+class FakeLoreGraph(GraphStore):
+    """
+    Stand-in for Neo4jGraph behind LoreReasoner: answers any Cypher with rows derived from
+    the query text and keeps the GraphMeta write counter. `write()` simulates an extractor run.
+    Schema introspection sees `n_rel_types` relationship types with Zipf-like counts.
+    """
+    def __init__(self, latency_ms=20.0, n_rel_types=40):
+        self.latency = latency_ms / 1000
+        self.version = 0
+        self.queries = []
+        self.changed = set()
+        verbs = ["MEMBER_OF", "ALLY_OF", "ENEMY_OF", "LOCATED_IN", "RULES", "CREATED", "WORSHIPS", "SERVES",
+                 "PARENT_OF", "SIBLING_OF", "FOUGHT", "KILLED", "SEALED", "FOUNDED", "WIELDS", "GUARDS"]
+        self.rel_types = {
+            (verbs[i % len(verbs)] + ("" if i < len(verbs) else f"_{i // len(verbs)}")): 1000 // (i + 1)
+            for i in range(n_rel_types)
+        }
+        self.labels = {"Character": 900, "Faction": 120, "Location": 300, "Event": 80, "Item": 200, "Deity": 15}
+
+    @property
+    def get_schema(self):
+        """Roughly the shape of Neo4jGraph's introspected schema string: one line per relationship type."""
+        lines = [
+            "Node properties:",
+            "Entity {name: STRING, aliases: LIST, label: STRING, source_file: STRING}",
+            "GraphMeta {key: STRING, version: INTEGER}",
+            "Relationship properties:",
+            "The relationships:",
+        ]
+        lines += [f"(:Entity)-[:{rel_type}]->(:Entity)" for rel_type in self.rel_types]
+        return "\n".join(lines)
+
+    @property
+    def get_structured_schema(self):
+        return {"node_props": {}, "rel_props": {}, "relationships": [], "metadata": {}}
+
+    def refresh_schema(self):
+        pass
+
+    def add_graph_documents(self, graph_documents, include_source=False):
+        pass
+
+    def write(self, touched_queries=()):
+        """Bumps the graph version; results of `touched_queries` change, the rest stay the same."""
+        self.version += 1
+        self.changed.update(touched_queries)
+
+    def query(self, query, params={}):
+        self.queries.append(query)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.rows_for(query)
+
+    def rows_for(self, query):
+        if "GraphMeta" in query:
+            return [{"version": self.version}] if self.version else []
+        if query == ENTITY_LABELS_CYPHER:
+            return [{"name": name, "count": count} for name, count in self.labels.items()]
+        if query == RELATIONSHIP_TYPES_CYPHER:
+            return [{"name": name, "count": count} for name, count in self.rel_types.items()]
+        if query == PROPERTY_KEYS_CYPHER:
+            return [{"key": key} for key in ("name", "aliases", "label", "source_file")]
+        rows = [{"e.name": f"{query[-24:]}#{i}"} for i in range(3)]
+        if query in self.changed:
+            rows.append({"e.name": f"written in v{self.version}"})
+        return rows
+
+
+class FakeAsyncNeo4jClient:
+    """AsyncNeo4jClient stand-in serving FakeLoreGraph's rows, with non-blocking latency."""
+    def __init__(self, graph, latency_ms=20.0):
+        self.graph = graph
+        self.latency = latency_ms / 1000
+
+    async def close(self):
+        pass
+
+    async def query(self, cypher_query, parameters=None):
+        self.graph.queries.append(cypher_query)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.graph.rows_for(cypher_query)
+
+
+class SlowLoreLLM(BaseChatModel):
+    """
+    Chat model stand-in that writes Cypher or an answer, and counts calls.
+    `latency_ms` is the wait before the first token (prompt processing), `token_ms` the gap
+    between streamed tokens. The async methods sleep without blocking the event loop.
+    """
+    latency_ms: float = 500.0
+    token_ms: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "slow-lore-fake"
+
+    def reply(self, messages):
+        self.calls += 1
+        prompt = messages[-1].content
+        if "Cypher Query:" in prompt:
+            question = prompt.rsplit("Question:", 1)[1].split("Cypher Query:")[0].strip()
+            return f"MATCH (e:Entity) WHERE e.name =~ '(?i).*{question.lower()}.*' RETURN e.name"
+        return f"Here is what the lore says ({len(prompt)} chars of context)."
+
+    def tokens(self, text):
+        return [word + " " for word in text.split(" ")[:-1]] + [text.split(" ")[-1]]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self.reply(messages)
+        time.sleep((self.latency_ms + self.token_ms * len(self.tokens(text))) / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self.reply(messages)
+        await asyncio.sleep((self.latency_ms + self.token_ms * len(self.tokens(text))) / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self.reply(messages)
+        time.sleep(self.latency_ms / 1000)
+        for token in self.tokens(text):
+            time.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self.reply(messages)
+        await asyncio.sleep(self.latency_ms / 1000)
+        for token in self.tokens(text):
+            await asyncio.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class CannedExtractionLLM:
+    """
+    Stand-in for the extractor's ChatOllama: answers every prompt with JSON built from the
+    chunk text, so runs are deterministic. Every multi-word capitalized name ("Stub Page 12")
+    becomes a Character, and each name is linked to the next one it appears with.
+    `latency_ms` simulates generation time.
+    """
+    NAME = re.compile(r"\b[A-Z][a-z]+(?: [A-Z0-9][a-z0-9]*)+\b")
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+        self.model = "canned-extraction"
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        text = prompt.rsplit("Text:", 1)[-1]
+        names = list(dict.fromkeys(self.NAME.findall(text)))
+        if self.latency:
+            time.sleep(self.latency)
+        data = {
+            "entities": [{"canonical_name": n, "aliases": [n.upper()], "label": "Character"} for n in names],
+            "relationships": [
+                {"source": a, "target": b, "type": "ALLY_OF"} for a, b in zip(names, names[1:])
+            ],
+        }
+        return AIMessage(content=json.dumps(data))
@@ -0,0 +1,263 @@
+"""
+Stage and end-to-end throughput of the pipeline against local stand-ins, with a saved
+baseline to catch regressions.
+
+    python -m benchmarks.run                       # run every stage, print the metrics
+    python -m benchmarks.run --stages scrape,query
+    python -m benchmarks.run --save-baseline       # write benchmarks/baseline.json
+    python -m benchmarks.run --check               # compare with the baseline; exit 1 on regressions
+
+Nothing leaves the machine: the wiki is StubMediaWiki, the extraction LLM answers with
+canned JSON (CannedExtractionLLM), embeddings come from the trigram stand-in, Neo4j writes
+go to RecordingNeo4jClient and questions are answered over FakeLoreGraph. The stand-ins add
+no latency, so the numbers measure the pipeline's own overhead. Everything runs inside a
+temporary directory, so data/ is never touched.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_entity_resolver import TrigramEmbedding, make_entities, make_chunks
+from benchmarks.bench_router import LABELED
+from benchmarks.fakes import (
+    CannedExtractionLLM, FakeLoreGraph, PassthroughResolver, RecordingNeo4jClient, SlowLoreLLM,
+)
+from benchmarks.stub_wiki import StubMediaWiki
+from src.pipeline.chunker import TextChunker
+from src.pipeline.extractor import LoreExtractor
+from src.pipeline.rag_engine import LoreReasoner
+from src.pipeline.scraper import GenshinSmartScraper
+from src.utils.entity_resolver import EntityResolver
+from src.utils.ingest_manifest import IngestManifest
+from src.utils.query_cache import QueryCache
+from src.utils.schema_cache import GraphSchemaCache
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# metric -> (unit, whether higher is better)
+METRICS = {
+    "scrape.pages_per_s": ("pages/s", True),
+    "chunk.chunks_per_s": ("chunks/s", True),
+    "extract.chunks_per_s": ("chunks/s", True),
+    "extract.statements_per_chunk": ("statements", False),
+    "resolve.names_per_s": ("names/s", True),
+    "query.p50_ms": ("ms", False),
+    "query.p95_ms": ("ms", False),
+    "pipeline.pages_per_s": ("pages/s", True),
+}
+
+
+def four_chars_per_token(text):
+    """Deterministic token count, so chunking doesn't depend on a downloaded tokenizer."""
+    return max(1, len(text) // 4)
+
+
+def scrape(wiki, output_dir):
+    """Crawls the stub wiki's whole category; returns the number of saved pages and seconds taken."""
+    scraper = GenshinSmartScraper(
+        output_dir=output_dir, base_url=wiki.url, requests_per_second=100000, max_workers=4,
+    )
+    start = time.perf_counter()
+    scraper.crawl_category("Lore", limit=None)
+    elapsed = time.perf_counter() - start
+    scraper.close()
+    return len(os.listdir(output_dir)), elapsed
+
+
+def make_extractor(workdir, db, entity_resolver):
+    return LoreExtractor(
+        db=db, entity_resolver=entity_resolver, llm=CannedExtractionLLM(),
+        manifest=IngestManifest(path=os.path.join(workdir, "manifest.sqlite"), version="bench"),
+        chunker=TextChunker(count_tokens=four_chars_per_token), schema=GraphSchemaCache(path=None),
+    )
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def stage_scrape(args, workdir):
+    with StubMediaWiki.generate(n_pages=args.pages) as wiki:
+        pages, elapsed = scrape(wiki, os.path.join(workdir, "raw"))
+    return {"scrape.pages_per_s": pages / elapsed}
+
+
+def stage_chunk(args, workdir):
+    raw_dir = os.path.join(workdir, "raw")
+    if not os.path.isdir(raw_dir):
+        stage_scrape(args, workdir)
+    chunker = TextChunker(max_tokens=args.chunk_tokens, overlap_tokens=args.chunk_tokens // 15,
+                          count_tokens=four_chars_per_token)
+    chunks = 0
+    start = time.perf_counter()
+    for name in sorted(os.listdir(raw_dir)):
+        with open(os.path.join(raw_dir, name), "r", encoding="utf-8") as f:
+            chunks += sum(1 for _ in chunker.iter_chunks(f))
+    return {"chunk.chunks_per_s": chunks / (time.perf_counter() - start)}
+
+
+def stage_extract(args, workdir):
+    raw_dir = os.path.join(workdir, "raw")
+    if not os.path.isdir(raw_dir):
+        stage_scrape(args, workdir)
+    db = RecordingNeo4jClient(latency_ms=0)
+    extractor = make_extractor(workdir, db, PassthroughResolver())
+    start = time.perf_counter()
+    extractor.process_directory(raw_dir, force=True)
+    elapsed = time.perf_counter() - start
+    chunks = extractor.llm.calls
+    return {
+        "extract.chunks_per_s": chunks / elapsed,
+        "extract.statements_per_chunk": len(db.statements) / chunks,
+    }
+
+
+def stage_resolve(args, workdir):
+    rng = random.Random(0)
+    entities = make_entities(args.entities, rng)
+    chunks, _ = make_chunks(entities, args.resolve_chunks, 20, rng)
+    resolver = EntityResolver(
+        collection_name="bench", path=os.path.join(workdir, "chroma"), emb_fn=TrigramEmbedding(latency_ms=0),
+    )
+    mentions = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        names = [e["canonical_name"] for e in chunk["entities"]]
+        resolver.resolve_many(names)
+        resolver.register_aliases((e["canonical_name"], e["aliases"]) for e in chunk["entities"])
+        mentions += len(names)
+    return {"resolve.names_per_s": mentions / (time.perf_counter() - start)}
+
+
+def stage_query(args, workdir):
+    reasoner = LoreReasoner(
+        graph=FakeLoreGraph(latency_ms=0), llm=SlowLoreLLM(latency_ms=0), cache=QueryCache(max_entries=0),
+        schema=GraphSchemaCache(path=None),
+    )
+    latencies = []
+    for _ in range(args.query_rounds):
+        for question, _, _ in LABELED:
+            start = time.perf_counter()
+            reasoner.ask(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {"query.p50_ms": percentile(latencies, 0.5), "query.p95_ms": percentile(latencies, 0.95)}
+
+
+def stage_pipeline(args, workdir):
+    """Scrape -> chunk/extract -> resolve -> upload -> answer questions, end to end."""
+    workdir = os.path.join(workdir, "pipeline")
+    os.makedirs(workdir)
+    raw_dir = os.path.join(workdir, "raw")
+    start = time.perf_counter()
+    with StubMediaWiki.generate(n_pages=args.pages) as wiki:
+        pages, _ = scrape(wiki, raw_dir)
+    resolver = EntityResolver(
+        collection_name="bench", path=os.path.join(workdir, "chroma"), emb_fn=TrigramEmbedding(latency_ms=0),
+    )
+    make_extractor(workdir, RecordingNeo4jClient(latency_ms=0), resolver).process_directory(raw_dir)
+    stage_query(argparse.Namespace(query_rounds=1), workdir)
+    return {"pipeline.pages_per_s": pages / (time.perf_counter() - start)}
+
+
+STAGES = {
+    "scrape": stage_scrape,
+    "chunk": stage_chunk,
+    "extract": stage_extract,
+    "resolve": stage_resolve,
+    "query": stage_query,
+    "pipeline": stage_pipeline,
+}
+
+
+def run_stages(args, names):
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The extractor writes data/processed relative to the working directory
+        os.chdir(workdir)
+        try:
+            for name in names:
+                # The stages' own progress output would drown the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    metrics = STAGES[name](args, workdir)
+                results.update(metrics)
+                print(f"   ⏱️ {name} done")
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints every metric against the baseline; returns the names of the ones that regressed."""
+    regressions = []
+    for metric, value in results.items():
+        unit, higher_is_better = METRICS[metric]
+        base = baseline.get(metric)
+        if base is None:
+            print(f"   {metric:<30} {value:12.2f} {unit:<10} (no baseline)")
+            continue
+        change = (value - base) / base if base else 0.0
+        worse = -change if higher_is_better else change
+        regressed = worse > tolerance
+        if regressed:
+            regressions.append(metric)
+        print(f"   {'❌' if regressed else '✅'} {metric:<28} {value:12.2f} {unit:<10} "
+              f"baseline {base:12.2f}  {change:+7.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of: " + ", ".join(STAGES))
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--chunk-tokens", type=int, default=300, help="Small, so each stub page makes several chunks")
+    parser.add_argument("--entities", type=int, default=500)
+    parser.add_argument("--resolve-chunks", type=int, default=200)
+    parser.add_argument("--query-rounds", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a metric is worse than the baseline by more than --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.stages.split(",") if n.strip()]
+    unknown = set(names) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print(f"🏁 Running {', '.join(names)}...")
+    results = run_stages(args, names)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+
+    print(f"\n📊 Results (tolerance {args.tolerance:.0%})")
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        # Merge, so saving a subset of stages keeps the others' baseline
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "machine": f"{platform.platform()} / Python {platform.python_version()}",
+                "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "metrics": {**baseline, **results},
+            }, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    if args.check and regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+A tiny local MediaWiki API stand-in, enough for GenshinSmartScraper:
+list=categorymembers (with cmcontinue paging), prop=info|revisions and action=parse.
+
+    with StubMediaWiki.generate(n_pages=200) as wiki:
+        scraper = GenshinSmartScraper(base_url=wiki.url, ...)
+"""
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+PAGE_TEMPLATE = """
+<div class="mw-parser-output">
+<p><b>{title}</b> is a figure of Teyvat lore, sworn to {ally} and an old rival of {rival}.</p>
+<h2>History</h2>
+<p>{body}</p>
+<table class="wikitable"><tr><th>Name</th><th>Role</th></tr>
+<tr><td>{title}</td><td>Archon of {ally}</td></tr>
+<tr><td>{rival}</td><td>Adeptus<sup>[1]</sup></td></tr></table>
+<h2>References</h2>
+<p>Ignored footer text.</p>
+</div>
+"""
+
+
+class StubMediaWiki:
+    def __init__(self, pages, categories, page_size=50, latency=0.0):
+        """pages: {title: html}, categories: {category name: [titles]}"""
+        self.pages = pages
+        # Bump an entry (or call edit()) to simulate a wiki edit
+        self.revisions = {title: 1 for title in pages}
+        self.categories = categories
+        self.page_size = page_size
+        self.latency = latency
+        self.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = None
+
+    @classmethod
+    def generate(cls, n_pages=100, category="Lore", **kwargs):
+        titles = [f"Stub Page {i}" for i in range(n_pages)]
+        pages = {}
+        for i, title in enumerate(titles):
+            body = " ".join(
+                f"In the year {y} {title} met {titles[(i + y) % n_pages]} near the ruins."
+                for y in range(12)
+            )
+            pages[title] = PAGE_TEMPLATE.format(
+                title=title, ally=titles[(i + 1) % n_pages], rival=titles[(i + 2) % n_pages], body=body
+            )
+        return cls(pages, {category: titles}, **kwargs)
+
+    def handler_class(self):
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+                wiki.requests.append(query)
+                if wiki.latency:
+                    import time
+                    time.sleep(wiki.latency)
+                body = json.dumps(wiki.respond(query)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def respond(self, query):
+        action = query.get("action")
+        if action == "query" and query.get("list") == "categorymembers":
+            return self.category_members(query)
+        if action == "query" and "revisions" in query.get("prop", "").split("|"):
+            return self.page_info(query)
+        if action == "parse":
+            return self.parse(query)
+        return {"error": {"code": "badaction", "info": f"Unsupported request {query}"}}
+
+    def category_members(self, query):
+        titles = self.categories.get(query["cmtitle"].removeprefix("Category:"), [])
+        start = int(query.get("cmcontinue") or 0)
+        size = min(int(query.get("cmlimit", 10)), self.page_size)
+        result = {"query": {"categorymembers": [{"ns": 0, "title": t} for t in titles[start:start + size]]}}
+        if start + size < len(titles):
+            result["continue"] = {"cmcontinue": str(start + size), "continue": "-||"}
+        return result
+
+    def edit(self, title, html=None):
+        if html is not None:
+            self.pages[title] = html
+        self.revisions[title] += 1
+
+    def page_info(self, query):
+        pages = {}
+        for i, title in enumerate(query["titles"].split("|")):
+            if title in self.pages:
+                revid = self.revisions[title]
+                pages[str(i + 1)] = {"pageid": i + 1, "ns": 0, "title": title, "lastrevid": revid, "revisions": [{"revid": revid}]}
+            else:
+                pages[str(-(i + 1))] = {"ns": 0, "title": title, "missing": ""}
+        return {"batchcomplete": "", "query": {"pages": pages}}
+
+    def parse(self, query):
+        title = query["page"]
+        if title not in self.pages:
+            return {"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}
+        return {"parse": {
+            "title": title,
+            "revid": self.revisions[title],
+            "text": {"*": self.pages[title]},
+            "categories": [{"sortkey": "", "*": "Lore"}],
+            "properties": [],
+        }}
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,5 +1,52 @@
+import os
+import argparse
+
+# The scraper's "Gold Mines" for lore
+DEFAULT_CATEGORIES = ["Lore", "Book Collections", "Factions", "Gods"]
+
+
 def main():
-    print("Hello from teyvat-lore-graph!")
+    parser = argparse.ArgumentParser(
+        description="Scrape the wiki and build the lore graph in one pipelined run (scrape -> chunk -> extract -> resolve -> write)."
+    )
+    parser.add_argument("categories", nargs="*", default=DEFAULT_CATEGORIES, help="Wiki categories to crawl")
+    parser.add_argument("--limit", type=int, default=10, help="Pages per category (0 = all)")
+    parser.add_argument("--refresh", action="store_true", help="Only re-parse pages edited since the last crawl")
+    parser.add_argument("--no-crawl", action="store_true", help="Only extract the pages already in --raw-dir")
+    parser.add_argument("--skip-existing", action="store_true", help="Don't queue the pages already in --raw-dir")
+    parser.add_argument("--force", action="store_true", help="Re-extract chunks the ingest manifest already has")
+    parser.add_argument("--raw-dir", default="data/raw")
+    parser.add_argument("--requests-per-second", type=float, default=2.0)
+    parser.add_argument("--scrape-workers", type=int, default=4, help="Threads fetching pages")
+    parser.add_argument("--clean-workers", type=int, default=0, help="Processes cleaning HTML (0 = on the fetch threads)")
+    parser.add_argument("--chunk-workers", type=int, default=1, help="Threads reading and splitting pages")
+    parser.add_argument("--extract-workers", type=int, default=int(os.getenv("OLLAMA_NUM_PARALLEL", "1")),
+                        help="Concurrent LLM calls (match OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Items buffered in front of each stage")
+    args = parser.parse_args()
+
+    # Imported here so --help doesn't load the whole pipeline
+    from src.pipeline.scraper import GenshinSmartScraper
+    from src.pipeline.extractor import LoreExtractor
+    from src.pipeline.runner import PipelineRunner
+
+    scraper = GenshinSmartScraper(
+        output_dir=args.raw_dir, requests_per_second=args.requests_per_second,
+        max_workers=args.scrape_workers, clean_workers=args.clean_workers,
+    )
+    extractor = LoreExtractor()
+    runner = PipelineRunner(
+        scraper, extractor, chunk_workers=args.chunk_workers, extract_workers=args.extract_workers,
+        queue_size=args.queue_size,
+    )
+    try:
+        runner.run(
+            categories=[] if args.no_crawl else args.categories, limit=args.limit or None,
+            only_changed=args.refresh, include_existing=not args.skip_existing, force=args.force,
+        )
+    finally:
+        scraper.close()
+        extractor.db.close()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+import re
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
 from typing import List, Optional
 
 class RelationShip(BaseModel):
@@ -9,4 +10,115 @@ class RelationShip(BaseModel):
 class LoreEntity(BaseModel):
     name: str
     label: str
-    category: Optional[str] = None
\ No newline at end of file
+    category: Optional[str] = None
+
+# Passive types the extraction prompt asks for in the active voice: flipped instead of dropped
+INVERSE_TYPES = {"DESCENDED_FROM": "ANCESTOR_OF", "WORSHIPPED_BY": "WORSHIPS"}
+
+
+def clean_str(value):
+    if not isinstance(value, str):
+        raise ValueError("expected a string")
+    return " ".join(value.split())
+
+
+class ExtractedEntity(LoreEntity):
+    """LoreEntity as the extraction prompt returns it: {"canonical_name", "aliases", "label"}."""
+    model_config = ConfigDict(populate_by_name=True)
+
+    name: str = Field(alias="canonical_name", min_length=1)
+    label: Optional[str] = None
+    aliases: List[str] = []
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def check_name(cls, value):
+        return clean_str(value)
+
+    @field_validator("label", mode="before")
+    @classmethod
+    def check_label(cls, value):
+        return clean_str(value) or None if isinstance(value, str) else None
+
+    @field_validator("aliases", mode="before")
+    @classmethod
+    def check_aliases(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [clean_str(a) for a in value if isinstance(a, str) and a.strip()]
+
+
+class ExtractedRelationship(RelationShip):
+    """RelationShip as the extraction prompt returns it: {"source", "target", "type"}."""
+    model_config = ConfigDict(populate_by_name=True)
+
+    source: str = Field(min_length=1)
+    target: str = Field(min_length=1)
+    relation_type: str = Field(alias="type")
+
+    @field_validator("source", "target", mode="before")
+    @classmethod
+    def check_endpoint(cls, value):
+        return clean_str(value)
+
+    @field_validator("relation_type", mode="before")
+    @classmethod
+    def check_type(cls, value):
+        """"member of" / "Member-Of" -> MEMBER_OF; types are interpolated into Cypher, so nothing else gets through."""
+        rel_type = re.sub(r"[^A-Za-z]+", "_", clean_str(value)).strip("_").upper()
+        if not rel_type:
+            raise ValueError("relationship type has no letters")
+        return rel_type
+
+    @model_validator(mode="after")
+    def activate(self):
+        if self.relation_type in INVERSE_TYPES:
+            self.source, self.target = self.target, self.source
+            self.relation_type = INVERSE_TYPES[self.relation_type]
+        return self
+
+
+class Extraction(BaseModel):
+    entities: List[ExtractedEntity] = []
+    relationships: List[ExtractedRelationship] = []
+
+    @classmethod
+    def from_output(cls, data):
+        """
+        Validates parsed LLM output item by item, so one bad entity doesn't cost the chunk.
+        Returns (extraction, counts of dropped entities/relationships and rewritten types).
+        Raises ValueError if the output isn't an extraction at all.
+        """
+        if not isinstance(data, dict) or not ({"entities", "relationships"} & data.keys()):
+            raise ValueError('expected an object with "entities" and "relationships" lists')
+        counts = {"dropped_entities": 0, "dropped_relationships": 0, "fixed_types": 0}
+        extraction = cls()
+        for field, model, dropped in (
+            ("entities", ExtractedEntity, "dropped_entities"),
+            ("relationships", ExtractedRelationship, "dropped_relationships"),
+        ):
+            items = data.get(field) or []
+            if not isinstance(items, list):
+                items = [items]
+            for item in items:
+                try:
+                    getattr(extraction, field).append(model.model_validate(item))
+                except ValidationError:
+                    counts[dropped] += 1
+                    continue
+                if field == "relationships" and item.get("type") != extraction.relationships[-1].relation_type:
+                    counts["fixed_types"] += 1
+        return extraction, counts
+
+    def to_dict(self):
+        """The plain JSON shape the rest of the pipeline (manifest, upload, bulk export) uses."""
+        return {
+            "entities": [
+                {"canonical_name": e.name, "aliases": e.aliases, "label": e.label} for e in self.entities
+            ],
+            "relationships": [
+                {"source": r.source, "target": r.target, "type": r.relation_type} for r in self.relationships
+            ],
+        }
@@ -0,0 +1,235 @@
+"""
+Offline rebuild of the lore graph: every extraction in data/processed becomes CSV files for
+
+    neo4j-admin database import full
+
+which writes the store directly instead of going through transactions, so a cold rebuild
+skips the MERGE path (LoreExtractor.upload) entirely.
+
+    python -m src.pipeline.bulk_export
+    python -m src.pipeline.bulk_export --input data/processed --output data/import
+"""
+import argparse
+import csv
+import glob
+import heapq
+import json
+import os
+import time
+
+from src.pipeline.extractor import valid_extraction
+from src.pipeline.summaries import neighbor_lines
+
+ARRAY_DELIMITER = "|"
+NODE_HEADER = [
+    "name:ID(Entity)", "aliases:string[]", "label", "source_file", "source_files:string[]",
+    "neighbors:string[]", "degree:int", "summary_dirty:boolean", ":LABEL",
+]
+RELATIONSHIP_HEADER = [":START_ID(Entity)", ":END_ID(Entity)", ":TYPE"]
+META_HEADER = ["key:ID(GraphMeta)", "version:long", ":LABEL"]
+
+
+def source_file_for(json_path):
+    """data/processed/Zhongli_3.json was written for chunk 3 of Zhongli.txt."""
+    stem = os.path.splitext(os.path.basename(json_path))[0]
+    return stem.rsplit("_", 1)[0] + ".txt"
+
+
+def clean_value(value):
+    """Keeps one-line fields: the importer would otherwise need --multiline-fields."""
+    return " ".join(str(value).split())
+
+
+class BulkGraphExporter:
+    """
+    Builds the whole graph in memory from the saved extractions, with the same semantics as
+    uploading them one by one: names go through the entity resolver, a node keeps the label and
+    source_file it was first seen with, aliases and source_files are merged, and each
+    (source, type, target) edge is written once. Entity summaries are computed here too,
+    since every edge is already in memory. The lore graph's extractions fit comfortably in memory, so nodes and
+    edges are deduplicated in dicts/sets rather than with an external sort.
+    """
+    def __init__(self, entity_resolver=None, input_dir="data/processed", output_dir="data/import", resolve_batch=1024,
+                 top_n=10):
+        if entity_resolver is None:
+            from src.utils.entity_resolver import EntityResolver
+            entity_resolver = EntityResolver()
+        self.entity_resolver = entity_resolver
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.resolve_batch = resolve_batch
+        self.top_n = top_n
+        # canonical name -> {"aliases": {alias: None}, "label": ..., "source_file": ..., "source_files": {file: None}}
+        self.nodes = {}
+        # relationship type -> {(source, target)}
+        self.edges = {}
+        self.stats = {"files": 0, "failed": 0, "entities": 0, "relationships": 0}
+
+    def load(self):
+        """Reads every extraction; returns [(source_file, entities, relationships)] with raw names."""
+        extractions = []
+        for path in sorted(glob.glob(os.path.join(self.input_dir, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   ⚠️ Skipping {os.path.basename(path)}: {e}")
+                self.stats["failed"] += 1
+                continue
+            entities, relationships = valid_extraction(data)
+            extractions.append((source_file_for(path), entities, relationships))
+            self.stats["files"] += 1
+        return extractions
+
+    def resolve(self, extractions):
+        """
+        Resolves every distinct name in batches of resolve_batch, in the order upload() would
+        have met them, so earlier names still become the canonical ones.
+        """
+        names = {}
+        for _, entities, relationships in extractions:
+            for entity in entities:
+                names[entity["canonical_name"]] = None
+            for rel in relationships:
+                names[rel["source"]] = None
+                names[rel["target"]] = None
+        names = list(names)
+
+        resolved = {}
+        for i in range(0, len(names), self.resolve_batch):
+            resolved.update(self.entity_resolver.resolve_many(names[i:i+self.resolve_batch]))
+            print(f"   🔍 Resolved {min(i + self.resolve_batch, len(names))}/{len(names)} names")
+        return resolved
+
+    def build(self):
+        extractions = self.load()
+        resolved = self.resolve(extractions)
+
+        for source_file, entities, relationships in extractions:
+            for entity in entities:
+                name = clean_value(resolved[entity["canonical_name"]])
+                if not name:
+                    continue
+                node = self.node(name)
+                if node["label"] is None:
+                    node["label"] = entity.get("label")
+                    node["source_file"] = source_file
+                node["source_files"][source_file] = None
+                for alias in entity.get("aliases") or []:
+                    node["aliases"][clean_value(alias).replace(ARRAY_DELIMITER, "/")] = None
+                self.stats["entities"] += 1
+
+            for rel in relationships:
+                source = clean_value(resolved[rel["source"]])
+                target = clean_value(resolved[rel["target"]])
+                if not source or not target:
+                    continue
+                # Relationship endpoints become (name-only) nodes, as MERGE would make them
+                self.node(source)
+                self.node(target)
+                self.edges.setdefault(rel["type"], set()).add((source, target))
+                self.stats["relationships"] += 1
+
+        # So incremental extraction after the import resolves these aliases without embeddings
+        self.entity_resolver.register_aliases(
+            (name, list(node["aliases"])) for name, node in self.nodes.items() if node["aliases"]
+        )
+
+    def node(self, name):
+        node = self.nodes.get(name)
+        if node is None:
+            node = self.nodes[name] = {"aliases": {}, "label": None, "source_file": None, "source_files": {}}
+        return node
+
+    def summaries(self):
+        """name -> (neighbors, degree), as EntitySummarizer would compute them after the import."""
+        # name -> {(type, outgoing): [neighbor names]}
+        adjacency = {}
+        for rel_type, pairs in self.edges.items():
+            for source, target in pairs:
+                adjacency.setdefault(source, {}).setdefault((rel_type, True), []).append(target)
+                adjacency.setdefault(target, {}).setdefault((rel_type, False), []).append(source)
+        degree = {name: sum(len(names) for names in groups.values()) for name, groups in adjacency.items()}
+
+        summaries = {}
+        for name, groups in adjacency.items():
+            summary = [
+                # Best-connected neighbors first, then by name so the output is stable
+                (rel_type, outgoing, len(names), heapq.nsmallest(self.top_n, names, key=lambda n: (-degree[n], n)))
+                for (rel_type, outgoing), names in groups.items()
+            ]
+            neighbors = [line.replace(ARRAY_DELIMITER, "/") for line in neighbor_lines(summary, self.top_n)]
+            summaries[name] = (neighbors, degree[name])
+        return summaries
+
+    def write(self):
+        """Writes nodes.csv, graph_meta.csv and one relationships_<TYPE>.csv per type; returns the import command."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(self.output_dir, "relationships_*.csv")):
+            os.remove(old)
+
+        summaries = self.summaries()
+        nodes_path = os.path.join(self.output_dir, "nodes.csv")
+        with open(nodes_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(NODE_HEADER)
+            for name, node in self.nodes.items():
+                neighbors, degree = summaries.get(name, ([], 0))
+                writer.writerow([
+                    name, ARRAY_DELIMITER.join(a for a in node["aliases"] if a),
+                    node["label"] or "", node["source_file"] or "",
+                    ARRAY_DELIMITER.join(f.replace(ARRAY_DELIMITER, "/") for f in node["source_files"]),
+                    ARRAY_DELIMITER.join(neighbors), degree, "false", "Entity",
+                ])
+
+        # A fresh store starts its version counter past any cached results from the old graph
+        meta_path = os.path.join(self.output_dir, "graph_meta.csv")
+        with open(meta_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(META_HEADER)
+            writer.writerow(["graph", int(time.time()), "GraphMeta"])
+
+        rel_paths = []
+        for rel_type in sorted(self.edges):
+            path = os.path.join(self.output_dir, f"relationships_{rel_type}.csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(RELATIONSHIP_HEADER)
+                for source, target in sorted(self.edges[rel_type]):
+                    writer.writerow([source, target, rel_type])
+            rel_paths.append(path)
+
+        return self.import_command(nodes_path, meta_path, rel_paths)
+
+    def import_command(self, nodes_path, meta_path, rel_paths, database="neo4j"):
+        args = [
+            "neo4j-admin database import full",
+            f"--nodes={nodes_path}", f"--nodes={meta_path}",
+            *(f"--relationships={path}" for path in rel_paths),
+            f"--array-delimiter='{ARRAY_DELIMITER}'",
+            "--overwrite-destination", database,
+        ]
+        return " \\\n    ".join(args)
+
+    def run(self):
+        start = time.time()
+        print(f"📦 Building graph from {self.input_dir}...")
+        self.build()
+        command = self.write()
+        n_edges = sum(len(pairs) for pairs in self.edges.values())
+        print(f"✅ {self.stats['files']} extractions -> {len(self.nodes)} nodes, {n_edges} edges "
+              f"in {len(self.edges)} relationship types ({time.time() - start:.1f}s)")
+        if self.stats["failed"]:
+            print(f"   ⚠️ {self.stats['failed']} unreadable extraction files skipped")
+        print("\nStop the database, then import (replaces the database):\n")
+        print(command)
+        print("\nStart it again and create the constraints and indexes: python -m src.utils.neo4j_client")
+        return command
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="data/processed")
+    parser.add_argument("--output", default="data/import")
+    args = parser.parse_args()
+    BulkGraphExporter(input_dir=args.input, output_dir=args.output).run()
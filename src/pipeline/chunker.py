@@ -0,0 +1,177 @@
+import re
+
+TABLE_START = "[TABLE_DATA]"
+TABLE_END = "[/TABLE_DATA]"
+
+# Sentence boundary: closing punctuation followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def load_token_counter(tokenizer_name):
+    """
+    Returns a callable text -> token count using the model's Hugging Face tokenizer.
+    Falls back to a 4-chars-per-token estimate if the tokenizer can't be loaded (e.g. offline).
+    """
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        print(f"⚠️ Could not load tokenizer '{tokenizer_name}' ({e}). Estimating 4 chars per token.")
+        return lambda text: max(1, len(text) // 4)
+
+
+class TextChunker:
+    """
+    Streams scraped pages into LLM-sized chunks.
+    Paragraphs and whole [TABLE_DATA] blocks are never cut unless a single one is bigger
+    than the budget; then tables are split by rows and paragraphs by sentences.
+    Up to overlap_tokens from the end of each chunk (whole blocks, or the closing sentences /
+    table rows of a big one) are repeated at the start of the next.
+    """
+    def __init__(self, max_tokens=3000, overlap_tokens=200, tokenizer_name="Qwen/Qwen2.5-7B-Instruct", count_tokens=None):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer_name = tokenizer_name
+        # The tokenizer (and transformers) load on the first count, not on construction
+        self.token_counter = count_tokens
+
+    def count_tokens(self, text):
+        if self.token_counter is None:
+            self.token_counter = load_token_counter(self.tokenizer_name)
+        return self.token_counter(text)
+
+    def iter_blocks(self, lines):
+        """Yields paragraphs and complete [TABLE_DATA] blocks from an iterable of lines (e.g. a file handle)."""
+        buffer = []
+        in_table = False
+        for line in lines:
+            stripped = line.strip()
+
+            if in_table:
+                buffer.append(stripped)
+                if stripped == TABLE_END:
+                    yield "\n".join(buffer)
+                    buffer, in_table = [], False
+                continue
+
+            if stripped == TABLE_START:
+                if buffer:
+                    yield "\n".join(buffer)
+                buffer, in_table = [stripped], True
+            elif stripped:
+                buffer.append(stripped)
+            elif buffer:
+                yield "\n".join(buffer)
+                buffer = []
+
+        if buffer:
+            # An unterminated table still gets closed so the model sees a well-formed block
+            if in_table:
+                buffer.append(TABLE_END)
+            yield "\n".join(buffer)
+
+    def split_block(self, block):
+        """Yields (text, tokens) pieces of a block, each within max_tokens."""
+        tokens = self.count_tokens(block)
+        if tokens <= self.max_tokens:
+            yield block, tokens
+            return
+
+        if block.startswith(TABLE_START):
+            rows = [row for row in block.split("\n")[1:-1] if row.strip()]
+            wrap = lambda part: f"{TABLE_START}\n{part}\n{TABLE_END}"
+            # Leave room for the tags that get repeated on every piece
+            budget = self.max_tokens - self.count_tokens(wrap(""))
+            for part in self.pack(rows, "\n", budget):
+                yield wrap(part), self.count_tokens(wrap(part))
+        else:
+            sentences = SENTENCE_END.split(block)
+            for part in self.pack(sentences, " ", self.max_tokens):
+                yield part, self.count_tokens(part)
+
+    def pack(self, units, separator, budget):
+        """Greedily joins units (rows/sentences) up to budget tokens, hard-splitting any oversized unit by words."""
+        current, current_tokens = [], 0
+        for unit in units:
+            tokens = self.count_tokens(unit)
+            if tokens > budget:
+                if current:
+                    yield separator.join(current)
+                    current, current_tokens = [], 0
+                yield from self.split_words(unit, budget)
+                continue
+            if current and current_tokens + tokens > budget:
+                yield separator.join(current)
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += tokens
+        if current:
+            yield separator.join(current)
+
+    def split_words(self, text, budget):
+        current, current_tokens = [], 0
+        for word in text.split():
+            tokens = self.count_tokens(word)
+            if current and current_tokens + tokens > budget:
+                yield " ".join(current)
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += tokens
+        if current:
+            yield " ".join(current)
+
+    def iter_chunks(self, lines):
+        """Lazily yields chunk strings; only the chunk being built is held in memory."""
+        current, current_tokens = [], 0
+
+        for block in self.iter_blocks(lines):
+            for piece, tokens in self.split_block(block):
+                if current and current_tokens + tokens > self.max_tokens:
+                    yield "\n\n".join(text for text, _ in current)
+                    current = self.overlap_tail(current)
+                    current_tokens = sum(t for _, t in current)
+                    if current_tokens + tokens > self.max_tokens:
+                        current, current_tokens = [], 0
+                current.append((piece, tokens))
+                current_tokens += tokens
+
+        # Every reset above is followed by a new piece, so `current` is never just overlap
+        if current:
+            yield "\n\n".join(text for text, _ in current)
+
+    def overlap_tail(self, pieces):
+        """Trailing pieces totalling at most overlap_tokens, carried into the next chunk."""
+        tail, tokens = [], 0
+        for text, count in reversed(pieces):
+            if tokens + count > self.overlap_tokens:
+                # The last piece alone is too big: carry its closing sentences / table rows instead
+                if not tail:
+                    partial = self.tail_of(text, self.overlap_tokens)
+                    if partial:
+                        tail = [(partial, self.count_tokens(partial))]
+                break
+            tail.insert(0, (text, count))
+            tokens += count
+        return tail
+
+    def tail_of(self, text, budget):
+        is_table = text.startswith(TABLE_START)
+        if is_table:
+            units, separator = text.split("\n")[1:-1], "\n"
+            budget -= self.count_tokens(f"{TABLE_START}\n\n{TABLE_END}")
+        else:
+            units, separator = SENTENCE_END.split(text), " "
+
+        kept, tokens = [], 0
+        for unit in reversed(units):
+            count = self.count_tokens(unit)
+            if tokens + count > budget:
+                break
+            kept.insert(0, unit)
+            tokens += count
+
+        if not kept:
+            return None
+        joined = separator.join(kept)
+        return f"{TABLE_START}\n{joined}\n{TABLE_END}" if is_table else joined
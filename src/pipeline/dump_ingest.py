@@ -0,0 +1,358 @@
+import argparse
+import bz2
+import gzip
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from src.pipeline.scraper import GenshinSmartScraper
+from src.pipeline.html_cleaner import clean_html
+
+# --- Wikitext -> the HTML shape `action=parse` returns, so the same cleaner applies ---
+COMMENT = re.compile(r"<!--.*?-->", re.S)
+REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+CATEGORY_LINK = re.compile(r"\[\[\s*Category\s*:\s*([^\]|]+)(?:\|[^\]]*)?\]\]", re.I)
+TEMPLATE_PARAMETER = re.compile(r"\{\{\{[^{}]*\}\}\}")
+MAGIC_WORD = re.compile(r"__[A-Z]+__")
+HEADING = re.compile(r"^(={2,6})\s*(.*?)\s*\1\s*$")
+EXTERNAL_LINK = re.compile(r"\[(?:https?:)?//[^\s\]]+(?:\s+([^\]]*))?\]")
+BOLD_ITALIC = re.compile(r"'{2,5}")
+LIST_PREFIX = re.compile(r"^[*#:;]+\s*")
+MEDIA_PREFIXES = ("file:", "image:", "media:")
+
+
+TEMPLATE_BRACES = re.compile(r"\{\{|\}\}")
+LINK_BRACKETS = re.compile(r"\[\[|\]\]")
+
+
+def strip_templates(text):
+    """Removes {{templates}} (nested ones too) and returns (text, names of the top-level templates)."""
+    text = TEMPLATE_PARAMETER.sub("", text)
+    out, names = [], []
+    depth, start = 0, 0
+    for match in TEMPLATE_BRACES.finditer(text):
+        if match.group() == "{{":
+            if depth == 0:
+                out.append(text[start:match.start()])
+                name_start = match.end()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                names.append(re.split(r"[|}\n]", text[name_start:match.end()], 1)[0].strip())
+                start = match.end()
+    if depth == 0:
+        out.append(text[start:])
+    return "".join(out), names
+
+
+def replace_links(text):
+    """[[Target|label]] -> label, [[Target]] -> Target; File/Image embeds (and their captions) are dropped."""
+    out, depth, start, open_at = [], 0, 0, 0
+    for match in LINK_BRACKETS.finditer(text):
+        if match.group() == "[[":
+            if depth == 0:
+                open_at = match.start()
+            depth += 1
+            continue
+        if depth == 0:
+            continue
+        depth -= 1
+        if depth:
+            # Links nested inside an image caption close before the image does
+            continue
+        out.append(text[start:open_at])
+        inner = text[open_at + 2:match.start()]
+        if not inner.lower().lstrip(":").startswith(MEDIA_PREFIXES):
+            target, _, label = inner.partition("|")
+            out.append(replace_links(label) if label else target.lstrip(":"))
+        start = match.end()
+    out.append(text[start:])
+    return "".join(out)
+
+
+def inline(text):
+    text = replace_links(text)
+    text = EXTERNAL_LINK.sub(lambda m: m.group(1) or "", text)
+    return BOLD_ITALIC.sub("", text)
+
+
+def table_cells(line, separator):
+    """Splits a `|`/`!` row line into (attributes, content) cells; `attr=... | content` keeps its attributes."""
+    cells = []
+    for cell in line[1:].split(separator * 2):
+        attrs, bar, content = cell.partition("|")
+        if bar and "=" in attrs and "[[" not in attrs:
+            cells.append((" " + attrs.strip(), inline(content.strip())))
+        else:
+            cells.append(("", inline(cell.strip())))
+    return cells
+
+
+def wikitext_to_html(wikitext):
+    """
+    Minimal wikitext renderer: headings, paragraphs, list items and {| tables |}.
+    Templates (infoboxes, navboxes) and references are dropped, like the junk the cleaner
+    strips from the live HTML. Inline HTML is passed through for the cleaner to handle.
+    """
+    parts = ['<div class="mw-parser-output">']
+    paragraph = []
+    row_open = []  # one flag per open table: is a <tr> open?
+
+    def flush():
+        if paragraph:
+            parts.append("<p>" + "\n".join(paragraph) + "</p>")
+            paragraph.clear()
+
+    for raw_line in wikitext.split("\n"):
+        line = raw_line.strip()
+
+        if line.startswith("{|"):
+            flush()
+            # Table attributes pass through: the cleaner's translation-table check reads class/width
+            attrs = line[2:].strip()
+            parts.append(f"<table {attrs}>" if attrs else "<table>")
+            row_open.append(False)
+            continue
+        if row_open:
+            if line.startswith("|}"):
+                if row_open[-1]:
+                    parts.append("</tr>")
+                row_open.pop()
+                parts.append("</table>")
+            elif line.startswith("|-"):
+                if row_open[-1]:
+                    parts.append("</tr>")
+                parts.append("<tr>")
+                row_open[-1] = True
+            elif line.startswith("|+"):
+                parts.append("<caption>" + inline(line[2:].strip()) + "</caption>")
+            elif line.startswith(("!", "|")):
+                if not row_open[-1]:
+                    parts.append("<tr>")
+                    row_open[-1] = True
+                tag = "th" if line.startswith("!") else "td"
+                separator = "!" if tag == "th" else "|"
+                parts.extend(f"<{tag}{attrs}>{cell}</{tag}>" for attrs, cell in table_cells(line, separator))
+            elif line:
+                # Continuation of the previous cell's content
+                parts.append(inline(line))
+            continue
+
+        heading = HEADING.match(line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            parts.append(f"<h{level}>{inline(heading.group(2))}</h{level}>")
+        elif not line:
+            flush()
+        elif LIST_PREFIX.match(line):
+            flush()
+            parts.append("<p>" + inline(LIST_PREFIX.sub("", line)) + "</p>")
+        else:
+            paragraph.append(inline(line))
+
+    flush()
+    # Close anything an unterminated table left open
+    for is_open in reversed(row_open):
+        parts.append("</tr></table>" if is_open else "</table>")
+    parts.append("</div>")
+    return "\n".join(parts)
+
+
+def wikitext_to_parse(title, wikitext, revid=None):
+    """Builds the subset of an `action=parse` result that GenshinSmartScraper's filters read."""
+    text = COMMENT.sub("", wikitext)
+    text = REF.sub("", text)
+
+    # Categories come back from the API with underscores, and the filters see them that way
+    categories = [{"*": name.strip().replace(" ", "_")} for name in CATEGORY_LINK.findall(text)]
+    text = CATEGORY_LINK.sub("", text)
+
+    text, templates = strip_templates(text)
+    properties = []
+    if "__DISAMBIG__" in text or any("disambig" in name.lower() for name in templates):
+        properties.append({"name": "disambiguation"})
+    text = MAGIC_WORD.sub("", text)
+
+    return {
+        "title": title,
+        "revid": revid,
+        "text": {"*": wikitext_to_html(text)},
+        "categories": categories,
+        "properties": properties,
+    }
+
+
+def clean_page(raw_html, backend):
+    """clean_html that reports failures instead of raising, so one bad page can't sink a pool batch."""
+    try:
+        return clean_html(raw_html, backend), None
+    except Exception as e:
+        return None, e
+
+
+def open_dump(path):
+    """Opens a dump as a binary stream, decompressing .bz2/.gz on the fly."""
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_xml_pages(path):
+    """
+    Streams (title, parse) from a MediaWiki XML export (Special:Export / dumpBackup.php).
+    Each <page> is discarded once handled, so memory stays flat however big the dump is.
+    Only main-namespace articles are yielded; redirects are skipped.
+    """
+    with open_dump(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or local_name(elem.tag) != "page":
+                continue
+
+            fields = {local_name(child.tag): child for child in elem}
+            revision = fields.get("revision")
+            if fields.get("ns") is not None and fields["ns"].text == "0" and "redirect" not in fields \
+                    and revision is not None:
+                title = fields["title"].text
+                rev_fields = {local_name(child.tag): child for child in revision}
+                revid = rev_fields.get("id")
+                wikitext = rev_fields["text"].text if "text" in rev_fields else ""
+                yield title, wikitext_to_parse(
+                    title, wikitext or "", int(revid.text) if revid is not None else None
+                )
+
+            elem.clear()
+            root.clear()
+
+
+def iter_jsonl_pages(path):
+    """
+    Streams (title, parse) from a JSONL file with one `action=parse` result per line,
+    either the whole API response ({"parse": {...}}) or just the "parse" object.
+    """
+    with open_dump(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"⚠️ Skipping line {line_no} of {path}: {e}")
+                continue
+            if "error" in record:
+                print(f"⚠️ API Error on line {line_no}: {record['error'].get('info')}")
+                continue
+            parse = record.get("parse", record)
+            if "text" not in parse or "title" not in parse:
+                print(f"⚠️ Skipping line {line_no} of {path}: not a parse result")
+                continue
+            if isinstance(parse["text"], str):
+                # formatversion=2 responses carry the HTML as a plain string
+                parse = {**parse, "text": {"*": parse["text"]}}
+            yield parse["title"], parse
+
+
+class WikiDumpIngestor:
+    """
+    Rebuilds data/raw from a local dump instead of the live API: a MediaWiki XML export
+    (optionally .bz2/.gz) or a JSONL file of `action=parse` results.
+    Pages go through the scraper's own filters, cleaner and file layout, and are cleaned
+    in batches (on the scraper's process pool when it has one) while the next batch is read.
+    """
+    def __init__(self, scraper=None, output_dir="data/raw", clean_workers=0, batch_size=64):
+        self.scraper = scraper or GenshinSmartScraper(output_dir=output_dir, clean_workers=clean_workers)
+        self.batch_size = batch_size
+
+    def close(self):
+        self.scraper.close()
+
+    def iter_pages(self, path):
+        name = path.lower()
+        for suffix in (".bz2", ".gz"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        if name.endswith((".jsonl", ".json", ".ndjson")):
+            return iter_jsonl_pages(path)
+        return iter_xml_pages(path)
+
+    def ingest(self, path):
+        """Streams every page in the dump to output_dir. Returns counts of pages read/saved/skipped/failed."""
+        print(f"📦 Ingesting dump: {path}")
+        stats = {"pages": 0, "saved": 0, "skipped": 0, "failed": 0}
+        batch = []
+        in_flight = None
+
+        for title, parse in self.iter_pages(path):
+            stats["pages"] += 1
+            raw_html = self.scraper.filter_parse(title, parse)
+            if raw_html is None:
+                stats["skipped"] += 1
+                self.record(title, parse.get("revid"))
+                continue
+            batch.append((title, parse.get("revid"), raw_html))
+
+            if len(batch) >= self.batch_size:
+                # Start cleaning this batch before writing the previous one: at most two batches in memory
+                cleaning = (batch, self.clean_batch(batch))
+                if in_flight:
+                    self.write_batch(*in_flight, stats)
+                in_flight, batch = cleaning, []
+
+        if in_flight:
+            self.write_batch(*in_flight, stats)
+        if batch:
+            self.write_batch(batch, self.clean_batch(batch), stats)
+
+        print(f"✅ Dump ingested: {stats['saved']} saved, {stats['skipped']} skipped, "
+              f"{stats['failed']} failed, {stats['pages']} pages read.")
+        return stats
+
+    def clean_batch(self, batch):
+        """Cleaned text for each page in the batch; lazy when a process pool does the work."""
+        htmls = [raw_html for _, _, raw_html in batch]
+        backends = [self.scraper.clean_backend] * len(htmls)
+        if self.scraper.clean_pool:
+            chunksize = max(1, len(htmls) // (self.scraper.clean_workers * 4))
+            return self.scraper.clean_pool.map(clean_page, htmls, backends, chunksize=chunksize)
+        return map(clean_page, htmls, backends)
+
+    def write_batch(self, batch, cleaned, stats):
+        for (title, revid, _), (clean_content, error) in zip(batch, cleaned):
+            if error:
+                # Not recorded, so a live crawl still picks the page up
+                print(f"⚠️ Error processing {title}: {error}")
+                stats["failed"] += 1
+                continue
+            if self.scraper.save_page(title, clean_content):
+                stats["saved"] += 1
+            else:
+                stats["skipped"] += 1
+            self.record(title, revid)
+
+    def record(self, title, revid):
+        """Same bookkeeping as a live crawl, so a later `--refresh` only fetches pages edited since the dump."""
+        self.scraper.save_revid(title, revid)
+        self.scraper.state.mark_visited(self.scraper.page_url(title))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build data/raw from a local wiki dump (XML export or parse JSONL).")
+    parser.add_argument("dump", help="Path to a .xml / .jsonl dump, optionally .bz2 or .gz compressed")
+    parser.add_argument("--output-dir", default="data/raw")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes used for HTML cleaning")
+    args = parser.parse_args()
+
+    ingestor = WikiDumpIngestor(output_dir=args.output_dir, clean_workers=args.workers)
+    try:
+        ingestor.ingest(args.dump)
+    finally:
+        ingestor.close()
@@ -3,62 +3,307 @@ import json
 import time
 import glob
 import re
-from langchain_ollama import ChatOllama # CHANGED: Switched from Google to Ollama
-from src.utils.neo4j_client import Neo4jClient
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.utils.neo4j_client import Neo4jClient, BUMP_GRAPH_VERSION_CYPHER
 from src.utils.entity_resolver import EntityResolver
+from src.utils.ingest_manifest import IngestManifest, UPLOADED
+from src.utils.schema_cache import GraphSchemaCache
+from src.utils.metrics import metrics
+from src.utils.json_repair import repair_json
+from src.models.schema import Extraction
+from src.pipeline.chunker import TextChunker
+from src.pipeline.summaries import EntitySummarizer
+
+# UNWIND lets one round trip MERGE a whole batch of rows instead of one row per call.
+ENTITY_UPSERT_CYPHER = """
+UNWIND $rows AS row
+MERGE (e:Entity {name: row.canonical_name})
+ON CREATE SET
+    e.aliases = row.aliases,
+    e.label = row.label,
+    e.source_file = row.source,
+    e.source_files = [row.source],
+    e.summary_dirty = true
+ON MATCH SET
+    e.aliases = apoc.coll.toSet(coalesce(e.aliases, []) + coalesce(row.aliases, [])),
+    e.source_files = apoc.coll.toSet(coalesce(e.source_files, []) + row.source)
+"""
+
+# Relationship types can't be parameterized, so there is one statement per type.
+# A new relationship changes both endpoints' neighbor summaries (src.pipeline.summaries).
+RELATIONSHIP_UPSERT_CYPHER = """
+UNWIND $rows AS row
+MERGE (a:Entity {{name: row.source}})
+MERGE (b:Entity {{name: row.target}})
+MERGE (a)-[:{rel_type}]->(b)
+ON CREATE SET a.summary_dirty = true, b.summary_dirty = true
+"""
+
+# Second chance for output that neither parses nor repairs locally: the model only fixes
+# its own answer, which is far shorter than re-reading the chunk.
+REPAIR_PROMPT = """
+The JSON below should match this schema, but it is invalid ({error}).
+Return only the corrected JSON. Keep every entity and relationship it contains; do not add new ones.
+
+Schema:
+{{"entities": [{{"canonical_name": "Name", "aliases": ["Alias1"], "label": "Type"}}],
+ "relationships": [{{"source": "Name1", "target": "Name2", "type": "RELATIONSHIP_TYPE"}}]}}
+
+JSON:
+{output}
+"""
+# Long broken outputs are truncated from the front: the end is usually where it broke
+MAX_REPAIR_CHARS = 12000
+
+# How each chunk's LLM output was turned into an extraction (or not)
+OUTCOMES = ("valid", "repaired_locally", "repaired_by_llm", "failed")
+
+# Properties ENTITY_UPSERT_CYPHER sets, reported to the schema snapshot
+ENTITY_PROPERTY_KEYS = ("name", "aliases", "label", "source_file", "source_files")
+
+def valid_extraction(data):
+    """The entities and relationships of one extraction that are fit to write (named, typed)."""
+    entities = [e for e in data.get('entities', []) if e.get('canonical_name')]
+    relationships = [
+        r for r in data.get('relationships', [])
+        if r.get('source') and r.get('target') and re.match(r'^[A-Z_]+$', r.get('type') or "")
+    ]
+    return entities, relationships
 
 class LoreExtractor:
-    def __init__(self):
-        self.db = Neo4jClient()
-        self.db.connect()
+    def __init__(self, db=None, entity_resolver=None, llm=None, batch_size=500, manifest=None, chunker=None, schema=None,
+                 summaries=None):
+        # Neo4jClient connects on its first query, and the schema setup waits for the first
+        # write (prepare_graph), so a run with nothing to write never connects
+        self.db = db or Neo4jClient()
+        self.graph_lock = threading.Lock()
+        self.graph_ready = False
+
+        self.entity_resolver = entity_resolver or EntityResolver()
+
+        # Max rows sent in one UNWIND statement
+        self.batch_size = batch_size
+
+        # Created on first process_directory() so the version reflects the configured model
+        self.manifest = manifest
 
-        self.entity_resolver = EntityResolver()
+        # Labels/relationship types we write are reported here, for LoreReasoner's prompt schema
+        self.schema = schema or GraphSchemaCache()
+
+        # Refreshes the neighbor summaries of the entities a run touched, once it's done
+        self.summaries = summaries or EntitySummarizer(self.db)
         
+        # Created on first use (load_llm), so constructing an extractor doesn't import langchain_ollama
+        self.llm = llm
+
+        # ~3000 text tokens + prompt leaves room in the 8k window for the JSON answer
+        self.chunker = chunker or TextChunker(max_tokens=3000, overlap_tokens=200)
+
+        # Parse/repair outcomes and validation drops; extract() runs on worker threads
+        self.stats_lock = threading.Lock()
+        self.extraction_stats = dict.fromkeys(
+            OUTCOMES + ("json_failures", "schema_failures", "dropped_entities", "dropped_relationships", "fixed_types"), 0
+        )
+
+    def load_llm(self):
         # CHANGED: Initialize Local LLM
+        from langchain_ollama import ChatOllama # CHANGED: Switched from Google to Ollama
         # "format": "json" is CRITICAL. It forces the model to only output valid JSON.
         # temperature=0 makes it deterministic (less creative, more precise).
+        # num_ctx pins the 8k window the chunk budget below is sized for.
         self.llm = ChatOllama(
             model="qwen2.5:7b", 
             temperature=0,
-            format="json" 
+            format="json",
+            num_ctx=8192
         )
+        return self.llm
+
+    def chunk_text(self, text):
+        """Splits an in-memory string with the same rules process_directory streams files with."""
+        return list(self.chunker.iter_chunks(text.splitlines()))
 
-    def chunk_text(self, text, chunk_size=6000):
-        # CHANGED: Local models have smaller context windows than Gemini.
-        # Reduced chunk_size to 6000 chars to be safe for 8k context window.
-        return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+    def record(self, **counts):
+        with self.stats_lock:
+            for name, n in counts.items():
+                self.extraction_stats[name] += n
+        for name, n in counts.items():
+            metrics.count(f"extract.{name}", n)
 
     def clean_json_string(self, json_str):
         """Helper to strip markdown if the model adds it despite instructions."""
         json_str = json_str.replace("```json", "").replace("```", "").strip()
         return json_str
 
-    def process_directory(self, dir_path="data/raw"):
+    def process_directory(self, dir_path="data/raw", max_workers=1, max_pending=None, force=False):
+        """
+        Extracts every .txt file in dir_path.
+        Chunks already recorded in the ingest manifest are skipped (or re-uploaded from their
+        cached JSON) instead of going back to the LLM; force=True re-extracts everything.
+        With max_workers > 1, chunks are sent to the LLM from a thread pool while this thread
+        acts as the single graph writer, uploading results in submission order. At most
+        max_pending chunks (default 2 * max_workers) are in flight at once.
+        """
+        self.prepare(force=force)
+
         files = glob.glob(os.path.join(dir_path, "*.txt"))
         print(f"📂 Found {len(files)} files. Starting Local Extraction (Qwen 2.5 7B)...")
 
+        # filename -> (file hash, every chunk made it into the graph)
+        self.file_status = {}
+
+        if max_workers <= 1:
+            pool, max_pending = None, 1
+        else:
+            max_pending = max_pending or 2 * max_workers
+            pool = ThreadPoolExecutor(max_workers=max_workers)
+            print(f"   ⚡ Running {max_workers} extraction workers ({max_pending} chunks in flight max).")
+
+        pending = deque()
+        try:
+            for filename, i, chunk in self.iter_chunks(files):
+                pending.append(self.submit_chunk(pool, chunk, i, filename))
+                # Backpressure: wait for the oldest chunk before reading further ahead
+                if len(pending) >= max_pending:
+                    self.write_result(*pending.popleft())
+                # No time.sleep() needed! You own the hardware.
+
+            while pending:
+                self.write_result(*pending.popleft())
+        finally:
+            if pool:
+                pool.shutdown()
+
+        for filename, (file_hash, complete) in self.file_status.items():
+            if complete:
+                self.manifest.mark_file_done(filename, file_hash)
+        self.finish()
+
+    def prepare(self, force=False):
+        """Run setup shared by process_directory and the pipeline runner: manifest, force flag."""
+        if self.manifest is None:
+            self.manifest = IngestManifest(version=self.prompt_version())
+        self.force = force
+
+    def prepare_graph(self):
+        """Constraints, indexes and the schema snapshot, once, before the first write."""
+        with self.graph_lock:
+            if self.graph_ready:
+                return
+            try:
+                self.db.ensure_schema()
+                if self.schema.is_empty():
+                    self.schema.refresh(self.db.execute_read)
+            finally:
+                # Not retried per chunk: without the schema the writes still work, only slower
+                self.graph_ready = True
+
+    def finish(self):
+        if self.graph_ready:
+            try:
+                self.summaries.refresh()
+            except Exception as e:
+                # Lookups fall back to traversing until the next refresh succeeds
+                print(f"⚠️ Entity summary refresh failed: {e}")
+        self.schema.flush()
+        if any(self.extraction_stats[o] for o in OUTCOMES):
+            print("\n🩹 LLM output: " + ", ".join(f"{k} {v}" for k, v in self.extraction_stats.items()))
+        metrics.flush()
+
+    def prompt_version(self):
+        """Identifies the prompt + model combination that produced a cached extraction."""
+        model = getattr(self.llm or self.load_llm(), "model", "")
+        return hashlib.sha256(f"{model}\0{self.build_prompt('')}".encode("utf-8")).hexdigest()[:16]
+
+    def iter_chunks(self, files):
+        """Yields (filename, chunk_index, chunk) for every chunk of every changed file."""
         for filepath in files:
             filename = os.path.basename(filepath)
             print(f"\n📖 Reading {filename}...")
-            
+
             try:
+                file_hash = self.changed_file_hash(filepath)
+                if file_hash is None:
+                    continue
+
+                self.file_status[filename] = (file_hash, True)
+                # Chunks are read lazily, so big book collections never sit in memory whole
                 with open(filepath, "r", encoding="utf-8") as f:
-                    content = f.read()
+                    for i, chunk in enumerate(self.chunker.iter_chunks(f)):
+                        print(f"   🤖 Processing chunk {i+1} of {filename}...")
+                        yield filename, i, chunk
 
-                if len(content) < 100: continue
+            except Exception as e:
+                print(f"   ❌ Error processing {filename}: {e}")
+                if filename in self.file_status:
+                    self.file_status[filename] = (self.file_status[filename][0], False)
 
-                chunks = self.chunk_text(content)
-                print(f"   🧩 Split into {len(chunks)} chunks.")
+    def changed_file_hash(self, filepath):
+        """The file's hash if it needs extracting, None if it's unchanged or too small to bother."""
+        file_hash = IngestManifest.file_hash(filepath)
+        if not self.force and self.manifest.is_file_done(os.path.basename(filepath), file_hash):
+            print(f"   ♻️ {os.path.basename(filepath)} unchanged since last run, skipping.")
+            return None
+        if os.path.getsize(filepath) < 100:
+            return None
+        return file_hash
 
-                for i, chunk in enumerate(chunks):
-                    print(f"   🤖 Processing chunk {i+1}/{len(chunks)}...")
-                    self.extract_and_upload(chunk, chunk_index=i, source_file=filename)
-                    # No time.sleep() needed! You own the hardware.
+    def lookup_chunk(self, text, source_file):
+        """(key, status, cached extraction) for a chunk of source_file; status None means it needs the LLM."""
+        key = self.manifest.chunk_key(text)
+        status, data = (None, None) if self.force else self.manifest.lookup(key, source_file)
+        return key, status, data
 
-            except Exception as e:
-                print(f"   ❌ Error processing {filename}: {e}")
+    def submit_chunk(self, pool, text, chunk_index, source_file):
+        """
+        Returns (future, source_file, chunk_index, key, status) for one chunk.
+        The LLM only runs when the manifest has no usable extraction for this exact text.
+        """
+        key, status, data = self.lookup_chunk(text, source_file)
+
+        if status is not None:
+            future = Future()
+            future.set_result(data)
+        elif pool is None:
+            future = Future()
+            future.set_result(self.extract(text, chunk_index=chunk_index, source_file=source_file))
+        else:
+            future = pool.submit(self.extract, text, chunk_index=chunk_index, source_file=source_file)
+        return future, source_file, chunk_index, key, status
+
+    def write_result(self, future, source_file, chunk_index, key, status):
+        data = None if status == UPLOADED else future.result()
+        if not self.write_extraction(data, source_file, chunk_index, key, status):
+            # Leave the file unfinished so the next run retries this chunk
+            self.file_status[source_file] = (self.file_status[source_file][0], False)
+
+    def write_extraction(self, data, source_file, chunk_index, key, status, plan=None):
+        """
+        Caches a fresh extraction in the manifest and uploads it (from `plan`, if it was
+        already resolved). Returns True once the chunk is in the graph.
+        """
+        if status == UPLOADED:
+            print(f"      ♻️ Chunk {chunk_index+1} of {source_file} unchanged, skipping.")
+            metrics.count("extract.unchanged_chunks")
+            return True
+        if data is None:
+            return False
+        if status is None:
+            self.manifest.save_extraction(key, source_file, chunk_index, data)
+        if self.upload_and_report(data, source_file, plan=plan):
+            self.manifest.mark_uploaded(key, source_file)
+            return True
+        return False
 
     def extract_and_upload(self, text, chunk_index=0, source_file="Unknown"):
+        data = self.extract(text, chunk_index=chunk_index, source_file=source_file)
+        if data is not None:
+            self.upload_and_report(data, source_file)
+
+    def build_prompt(self, text):
         # SIMPLIFIED PROMPT: Smaller models need less "fluff" and more concrete examples.
         prompt = f"""
         Extract Genshin Impact lore entities and relationships from the text below.
@@ -86,64 +331,188 @@ class LoreExtractor:
         Text:
         {text}
         """
+        return prompt
+
+    def extract(self, text, chunk_index=0, source_file="Unknown"):
+        """
+        Runs the LLM on one chunk and saves the parsed JSON to data/processed.
+        Returns the extraction dict, or None if the chunk had to be skipped.
+        Safe to call from worker threads: it never touches Neo4j or the resolver.
+        """
+        prompt = self.build_prompt(text)
 
         try:
-            response = self.llm.invoke(prompt)
-            clean_content = self.clean_json_string(response.content)
-            data = json.loads(clean_content)
+            response = self.invoke("llm.invoke", prompt)
+            data = self.parse_extraction(response.content)
+            if data is None:
+                print(f"      ⚠️ Model failed to generate valid JSON, even after repair. Skipping chunk.")
+                metrics.count("extract.skipped_chunks")
+                return None
 
             os.makedirs("data/processed", exist_ok=True)
-            json.dump(data, open(f"data/processed/{source_file.replace('.txt', '')}_{chunk_index}.json", "w", encoding="utf-8"), indent=2, ensure_ascii=False)
-
-            # 1. Upload Entities
-            count_ent = 0
-            for entity in data.get('entities', []):
-                original_name = entity.get('canonical_name', "")
-
-                resolved_name = self.entity_resolver.resolve_name(original_name)
-
-                if resolved_name != original_name:
-                    print(f"      🔍 Resolved '{original_name}' to '{resolved_name}'")
-                    entity['canonical_name'] = resolved_name
-                
-                entity_cypher = """
-                MERGE (e:Entity {name: $canonical_name})
-                ON CREATE SET
-                    e.aliases = $aliases,
-                    e.label = $label,
-                    e.source_file = $source
-                ON MATCH SET
-                    e.aliases = apoc.coll.toSet(coalesce(e.aliases, []) + coalesce($aliases, []))
-
-                """
-                entity['source'] = source_file
-                self.db.query(entity_cypher, parameters=entity)
-                count_ent += 1
-
-            # 2. Upload Relationships
-            count_rel = 0
-            for rel in data.get('relationships', []):
-                if not rel.get('source') or not rel.get('target'): continue
-                if not re.match(r'^[A-Z_]+$', rel['type']): continue
-                
-                rel['source'] = self.entity_resolver.resolve_name(rel['source'])
-                rel['target'] = self.entity_resolver.resolve_name(rel['target'])
-
-                rel_cypher = f"""
-                MERGE (a:Entity {{name: $source}})
-                MERGE (b:Entity {{name: $target}})
-                MERGE (a)-[:{rel['type']}]->(b)
-                """
-                self.db.query(rel_cypher, parameters=rel)
-                count_rel += 1
-            
-            print(f"      ✅ Extracted {count_ent} entities, {count_rel} relations.")
+            with open(f"data/processed/{source_file.replace('.txt', '')}_{chunk_index}.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            return data
+
+        except Exception as e:
+            print(f"      ⚠️ LLM Error: {e}")
+            metrics.count("extract.llm_errors")
+        metrics.count("extract.skipped_chunks")
+        return None
+
+    def invoke(self, span, prompt):
+        with metrics.timer(span):
+            response = (self.llm or self.load_llm()).invoke(prompt)
+        usage = getattr(response, "usage_metadata", None) or {}
+        metrics.count("llm.input_tokens", usage.get("input_tokens", 0))
+        metrics.count("llm.output_tokens", usage.get("output_tokens", 0))
+        return response
+
+    def parse_extraction(self, output):
+        """
+        LLM output -> validated extraction dict, or None. Tries, in order: the output as is,
+        local JSON repair, then one short repair prompt built from the broken output.
+        """
+        try:
+            data = json.loads(self.clean_json_string(output))
+        except ValueError as e:
+            error = e
+            self.record(json_failures=1)
+        else:
+            try:
+                return self.validate(data, "valid")
+            except ValueError as e:
+                # Valid JSON, but not an extraction (e.g. a bare list or the wrong keys)
+                error = e
+                self.record(schema_failures=1)
+
+        try:
+            return self.validate(repair_json(output), "repaired_locally")
+        except ValueError as e:
+            error = e
+
+        print(f"      🩹 Asking the model to repair its JSON ({str(error)[:80]})...")
+        repair = REPAIR_PROMPT.format(error=str(error)[:200], output=output[-MAX_REPAIR_CHARS:])
+        try:
+            repaired = self.invoke("llm.repair", repair).content
+        except Exception as e:
+            print(f"      ⚠️ LLM Error during repair: {e}")
+            metrics.count("extract.llm_errors")
+            self.record(failed=1)
+            return None
+        try:
+            try:
+                data = json.loads(self.clean_json_string(repaired))
+            except ValueError:
+                data = repair_json(repaired)
+            return self.validate(data, "repaired_by_llm")
+        except ValueError:
+            self.record(failed=1)
+            return None
 
-        except json.JSONDecodeError:
-            print(f"      ⚠️ Model failed to generate valid JSON. Skipping chunk.")
+    def validate(self, data, outcome):
+        """Checks parsed output against the Extraction model; raises ValueError if it isn't one."""
+        extraction, counts = Extraction.from_output(data)
+        self.record(**{outcome: 1}, **counts)
+        return extraction.to_dict()
+
+    def upload_and_report(self, data, source_file, plan=None):
+        """Uploads one chunk's extraction; returns True if it reached the graph."""
+        try:
+            with metrics.timer("extract.upload"):
+                plan = plan or self.plan_upload(data, source_file=source_file)
+                count_ent, count_rel = self.write_plan(plan)
+            print(f"      ✅ Extracted {count_ent} entities, {count_rel} relations.")
+            metrics.count("extract.chunks")
+            metrics.count("extract.entities", count_ent)
+            metrics.count("extract.relationships", count_rel)
+            return True
         except Exception as e:
             print(f"      ⚠️ Neo4j Error: {e}")
+            metrics.count("extract.upload_failures")
+            return False
+
+    def upload(self, data, source_file="Unknown"):
+        """
+        Resolves names and writes one chunk's extraction with batched UNWIND statements.
+        Returns (entity_count, relationship_count).
+        """
+        return self.write_plan(self.plan_upload(data, source_file=source_file))
+
+    def plan_upload(self, data, source_file="Unknown"):
+        """
+        The resolver half of upload(): resolves every name in the chunk and returns the rows
+        to write. `data` itself is left as the LLM produced it.
+        """
+        entities, relationships = valid_extraction(data)
+
+        # Resolve every name in the chunk in one batch (entities first, as they were before)
+        names = [e['canonical_name'] for e in entities]
+        for rel in relationships:
+            names += [rel['source'], rel['target']]
+        resolved = self.entity_resolver.resolve_many(names)
+
+        # 1. Entities
+        entity_rows = []
+        for entity in entities:
+            original_name = entity['canonical_name']
+            resolved_name = resolved[original_name]
+
+            if resolved_name != original_name:
+                print(f"      🔍 Resolved '{original_name}' to '{resolved_name}'")
+
+            entity_rows.append({
+                "canonical_name": resolved_name,
+                "aliases": entity.get('aliases'),
+                "label": entity.get('label'),
+                "source": source_file,
+            })
+
+        # Aliases the LLM listed resolve without the embedding model next time
+        self.entity_resolver.register_aliases(
+            (row['canonical_name'], row['aliases'] or []) for row in entity_rows
+        )
+
+        # 2. Relationships, grouped by type
+        rels_by_type = {}
+        for rel in relationships:
+            rels_by_type.setdefault(rel['type'], []).append(
+                {"source": resolved[rel['source']], "target": resolved[rel['target']]}
+            )
+        return {"entity_rows": entity_rows, "rels_by_type": rels_by_type}
+
+    def write_plan(self, plan):
+        """The graph-writer half of upload(): one chunk's rows from plan_upload -> Neo4j."""
+        self.prepare_graph()
+        entity_rows, rels_by_type = plan["entity_rows"], plan["rels_by_type"]
+        rel_types = [rel_type for rel_type, rows in rels_by_type.items() for _ in rows]
+
+        # One transaction per chunk: its entities, relationships and the version bump commit together
+        # (max_statements=None: never split, however many statements a large chunk needs)
+        with self.db.bulk_writer(max_statements=None) as writer:
+            self.write_rows(writer, ENTITY_UPSERT_CYPHER, entity_rows)
+            for rel_type, rows in rels_by_type.items():
+                self.write_rows(writer, RELATIONSHIP_UPSERT_CYPHER.format(rel_type=rel_type), rows)
+
+            # Tell query caches (LoreReasoner) that results read before this write are stale
+            if entity_rows or rel_types:
+                writer.add(BUMP_GRAPH_VERSION_CYPHER)
+
+        if entity_rows or rel_types:
+            self.schema.record(
+                entity_labels=[row["label"] for row in entity_rows],
+                relationship_types=rel_types,
+                property_keys=ENTITY_PROPERTY_KEYS if entity_rows else (),
+            )
+
+        return len(entity_rows), len(rel_types)
+
+    def write_rows(self, writer, cypher, rows):
+        """Queues rows for an UNWIND statement in slices of batch_size."""
+        for i in range(0, len(rows), self.batch_size):
+            writer.add(cypher, {"rows": rows[i:i+self.batch_size]})
 
 if __name__ == "__main__":
     extractor = LoreExtractor()
-    extractor.process_directory()
\ No newline at end of file
+    # Match the number of requests the Ollama server will run in parallel
+    extractor.process_directory(max_workers=int(os.getenv("OLLAMA_NUM_PARALLEL", "1")))
\ No newline at end of file
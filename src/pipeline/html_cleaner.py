@@ -0,0 +1,269 @@
+import re
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional: without it every page goes through BeautifulSoup
+    etree = None
+
+def clean_soup(soup):
+    """
+    Advanced cleaning: Handles Tables, Notes, and Junk.
+    Reference implementation on a BeautifulSoup tree; the lxml backend must match it exactly.
+    """
+    # 1. REMOVE JUNK (Expanded list)
+    junk_selectors = [
+        "script", "style", "nav", "footer", "aside",
+        ".navbox", ".wds-global-footer", ".reflist", 
+        ".license-description", ".toc", ".mw-editsection", 
+        "sup", # Citations [1]
+        "#catlinks",
+        ".caption", # Image captions often interrupt sentences
+        "th.language-name", # Hides the language table headers
+    ]
+    
+    for selector in junk_selectors:
+        for element in soup.select(selector):
+            element.decompose()
+
+    # 2. LOCATE CONTENT
+    content = soup.find("div", class_="mw-parser-output")
+    if not content:
+        return ""
+
+    # 3. SMART TABLE HANDLING
+    # We convert tables into a linear format: "Header: Cell, Header: Cell"
+    for table in content.find_all("table"):
+        # If it's a massive translation table, just kill it.
+        if "wikitable" in table.get("class", []) and "width" in table.attrs:
+            # Heuristic: Translation tables often have specific width attributes or specific headers
+            headers = [th.get_text().strip() for th in table.find_all("th")]
+            if "Language" in headers or "Chinese" in str(table):
+                table.decompose()
+                continue
+
+        # Otherwise, preserve useful tables (like the Ancient Name list)
+        rows = []
+        headers = [th.get_text().strip() for th in table.find_all("th")]
+        
+        for tr in table.find_all("tr"):
+            cells = [td.get_text(separator=" ").strip() for td in tr.find_all("td")]
+            if cells:
+                # Pair header with cell if possible
+                row_str = " | ".join(cells)
+                rows.append(row_str)
+        
+        # Replace the HTML table with this text representation
+        new_text = "\n".join(rows)
+        table.replace_with(f"\n[TABLE_DATA]\n{new_text}\n[/TABLE_DATA]\n")
+
+    # 4. REMOVE FOOTERS (References, etc)
+    for header in content.find_all(['h2', 'h3']):
+        header_text = header.get_text().strip().lower()
+        if any(x in header_text for x in ["references", "navigation", "see also", "external links", "change history", "other languages", "notes"]):
+            # Cut off everything after this header
+            for sibling in header.find_next_siblings():
+                sibling.decompose()
+            header.decompose()
+            break
+
+    # 5. TEXT EXTRACTION & REGEX CLEANING
+    text = content.get_text(separator="\n")
+    
+    # Remove [Note 1], [1], etc.
+    text = re.sub(r"\[\s*(Note\s*)?\d+\s*\]", "", text)
+    # Remove the "↑" arrows from notes
+    text = re.sub(r"↑", "", text)
+    # Collapse whitespace
+    text = re.sub(r"\n\s*\n", "\n\n", text)
+    
+    return text.strip()
+
+
+def clean_html_bs4(raw_html):
+    return clean_soup(BeautifulSoup(raw_html, "html.parser"))
+
+
+# --- lxml backend ---------------------------------------------------------------------------
+# Same output as clean_soup, but one C-level parse plus a single walk over the tree instead of a
+# select() pass per junk selector, repeated find_all()s per table and three regex passes.
+# The constants below mirror clean_soup's selectors and keywords, plus the BeautifulSoup
+# behaviours its output depends on.
+
+JUNK_TAGS = {"script", "style", "nav", "footer", "aside", "sup"}
+JUNK_CLASSES = {"navbox", "wds-global-footer", "reflist", "license-description", "toc", "mw-editsection", "caption"}
+JUNK_IDS = {"catlinks"}
+FOOTER_KEYWORDS = ["references", "navigation", "see also", "external links", "change history", "other languages", "notes"]
+
+# BeautifulSoup doesn't count strings inside these as text (RubyTextString, TemplateString, ...)
+HIDDEN_STRING_TAGS = {"rt", "rp", "template"}
+# ...and collapses whitespace-only strings to "\n" or " " everywhere except inside these
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+NOTE_MARKER = re.compile(r"\[\s*(Note\s*)?\d+\s*\]")
+BLANK_LINES = re.compile(r"\n\s*\n")
+
+
+class UnsupportedMarkup(Exception):
+    """Raised for markup where BeautifulSoup's in-place edits have effects the walk doesn't model."""
+
+
+def is_junk(el):
+    tag = el.tag
+    if tag in JUNK_TAGS:
+        return True
+    classes = el.get("class")
+    if classes:
+        tokens = classes.split()
+        if not JUNK_CLASSES.isdisjoint(tokens):
+            return True
+        if tag == "th" and "language-name" in tokens:
+            return True
+    return el.get("id") in JUNK_IDS
+
+
+def soup_string(text, preserve):
+    """A text node as BeautifulSoup would have stored it."""
+    if preserve or text.strip(ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def find_all(el, tag):
+    """Descendant elements named `tag` in document order, skipping junk subtrees (like find_all after decompose)."""
+    for child in el:
+        if not isinstance(child.tag, str) or is_junk(child):
+            continue
+        if child.tag == tag:
+            yield child
+        yield from find_all(child, tag)
+
+
+def strings(el, out, preserve=False, hidden=False):
+    """Appends el's text nodes to `out`, like Tag.strings."""
+    preserve = preserve or el.tag in PRESERVE_WHITESPACE_TAGS
+    hidden = hidden or el.tag in HIDDEN_STRING_TAGS
+    if el.text and not hidden:
+        out.append(soup_string(el.text, preserve))
+    for child in el:
+        if isinstance(child.tag, str) and not is_junk(child):
+            strings(child, out, preserve, hidden)
+        if child.tail and not hidden:
+            out.append(soup_string(child.tail, preserve))
+    return out
+
+
+def markup(el, out):
+    """Enough of str(tag) to answer substring checks: tags, attributes, text and comments."""
+    if isinstance(el.tag, str):
+        out.append("<" + el.tag)
+        for key, value in el.attrib.items():
+            out.append(f' {key}="{value}"')
+        out.append(">")
+        if el.text:
+            out.append(el.text)
+        for child in el:
+            if isinstance(child.tag, str) and is_junk(child):
+                pass
+            else:
+                markup(child, out)
+            if child.tail:
+                out.append(child.tail)
+        out.append(f"</{el.tag}>")
+    elif el.text:
+        out.append(f"<!--{el.text}-->")
+    return out
+
+
+def is_translation_table(table, preserve, hidden):
+    if "wikitable" not in (table.get("class") or "").split() or "width" not in table.attrib:
+        return False
+    headers = ["".join(strings(th, [], preserve, hidden)).strip() for th in find_all(table, "th")]
+    return "Language" in headers or "Chinese" in "".join(markup(table, []))
+
+
+def table_text(table, preserve, hidden):
+    """The [TABLE_DATA] string clean_soup swaps in for a table, or None if the table is dropped."""
+    nested = list(find_all(table, "table"))
+    if nested:
+        # clean_soup decomposes translation tables before reaching the tables inside them,
+        # then trips over the destroyed inner ones; let it handle (and report) those pages itself.
+        for t in [table] + nested:
+            if is_translation_table(t, preserve, hidden) and any(True for _ in find_all(t, "table")):
+                raise UnsupportedMarkup("translation table with nested tables")
+
+    if is_translation_table(table, preserve, hidden):
+        return None
+
+    rows = []
+    for tr in find_all(table, "tr"):
+        cells = [" ".join(strings(td, [], preserve, hidden)).strip() for td in find_all(tr, "td")]
+        if cells:
+            rows.append(" | ".join(cells))
+    new_text = "\n".join(rows)
+    return f"\n[TABLE_DATA]\n{new_text}\n[/TABLE_DATA]\n"
+
+
+def is_footer_header(header, preserve, hidden):
+    if any(True for _ in find_all(header, "table")):
+        raise UnsupportedMarkup("table inside a section header")
+    header_text = "".join(strings(header, [], preserve, hidden)).strip().lower()
+    return any(x in header_text for x in FOOTER_KEYWORDS)
+
+
+def walk(el, out, state, preserve=False, hidden=False):
+    """
+    Single pass over the content div: skips junk, swaps tables for their text, and drops
+    everything after the first footer header, appending text nodes to `out` in order.
+    """
+    preserve = preserve or el.tag in PRESERVE_WHITESPACE_TAGS
+    hidden = hidden or el.tag in HIDDEN_STRING_TAGS
+    if el.text and not hidden:
+        out.append(soup_string(el.text, preserve))
+
+    cutting = False
+    for child in el:
+        tag = child.tag
+        if isinstance(tag, str) and not is_junk(child):
+            if tag == "table":
+                # Tables were replaced by plain strings before the footer cut, so they survive it
+                text = table_text(child, preserve, hidden)
+                if text is not None:
+                    out.append(text)
+            elif cutting:
+                pass
+            elif tag in ("h2", "h3") and not state["cut"] and is_footer_header(child, preserve, hidden):
+                # The header and every following sibling element go; sibling text nodes stay
+                state["cut"] = cutting = True
+            else:
+                walk(child, out, state, preserve, hidden)
+        # Removing an element never removes the text that follows it
+        if child.tail and not hidden:
+            out.append(soup_string(child.tail, preserve))
+    return out
+
+
+def clean_html_lxml(raw_html):
+    root = etree.HTML(raw_html)
+    if root is None:
+        return ""
+
+    content = next((div for div in find_all(root, "div") if "mw-parser-output" in (div.get("class") or "").split()), None)
+    if content is None:
+        return ""
+
+    text = "\n".join(walk(content, [], {"cut": False}))
+    text = NOTE_MARKER.sub("", text).replace("↑", "")
+    text = BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def clean_html(raw_html, backend="lxml"):
+    """Cleans one page of `action=parse` HTML. Top-level so it can run in a process pool."""
+    if backend == "lxml" and etree is not None:
+        try:
+            return clean_html_lxml(raw_html)
+        except (UnsupportedMarkup, ValueError, etree.ParserError):
+            pass
+    return clean_html_bs4(raw_html)
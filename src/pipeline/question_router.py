@@ -0,0 +1,153 @@
+import re
+import unicodedata
+
+# Parameterized versions of the question shapes the Cypher prompt teaches the LLM.
+# All of them find the entity through the `entity_names` full-text index (name + aliases).
+# The fuzzy index nearly always returns something, so membership and lookup only answer for a
+# hit whose name or an alias is the asked name ($key, see name_key) with a score of at least
+# $min_score; anything else comes back empty and goes to the LLM.
+MEMBERSHIP_CYPHER = """
+CALL db.index.fulltext.queryNodes('entity_names', $search) YIELD node, score
+WHERE score >= $min_score
+  AND (apoc.text.clean(node.name) = $key OR any(alias IN coalesce(node.aliases, []) WHERE apoc.text.clean(alias) = $key))
+WITH node AS group ORDER BY score DESC LIMIT 1
+MATCH (group)-[r]-(member:Entity)
+RETURN group.name AS group, member.name AS member, type(r) AS relationship
+LIMIT $limit
+"""
+
+# Reads the precomputed summary (src.pipeline.summaries): one index lookup, no traversal.
+# Only a node whose summary hasn't been computed yet, or is stale, walks its relationships.
+LOOKUP_CYPHER = """
+CALL db.index.fulltext.queryNodes('entity_names', $search) YIELD node, score
+WHERE score >= $min_score
+  AND (apoc.text.clean(node.name) = $key OR any(alias IN coalesce(node.aliases, []) WHERE apoc.text.clean(alias) = $key))
+WITH node ORDER BY score DESC LIMIT 1
+RETURN node.name AS name, node.label AS label, node.aliases AS aliases,
+       node.source_files AS source_files,
+       CASE WHEN node.neighbors IS NULL OR node.summary_dirty
+            THEN [(node)-[r]-(other:Entity) | type(r) + ' ' + other.name][..$limit]
+            ELSE node.neighbors
+       END AS connections
+"""
+
+FUZZY_CYPHER = """
+CALL db.index.fulltext.queryNodes('entity_names', $search) YIELD node, score
+RETURN node.name AS name, node.label AS label, node.aliases AS aliases, score
+LIMIT $limit
+"""
+
+# (kind, pattern, cypher): first match wins, so the specific shapes come before "who is X"
+ROUTES = [
+    ("membership", re.compile(
+        r"^(?:who (?:is|are) (?:in|part of|a member of|members of)"
+        r"|who (?:are )?(?:the )?members of"
+        r"|(?:list|name|show)(?: all)?(?: of)?(?: the)? members of"
+        r"|who belongs? to"
+        r"|members of)\s+(?P<name>.+)$"
+    ), MEMBERSHIP_CYPHER),
+    ("lookup", re.compile(
+        r"^(?:(?:who|what) (?:is|are|was|were)|tell me about|describe)\s+(?P<name>.+)$"
+    ), LOOKUP_CYPHER),
+    ("fuzzy", re.compile(
+        r"^(?:find|search(?: for)?|look up|lookup)(?: entities| entity)?(?: named| called)?\s+(?P<name>.+)$"
+    ), FUZZY_CYPHER),
+]
+
+# A name containing any of these is more than a lookup ("Who is the strongest Archon?",
+# "What is the relationship between X and Y?"): leave it to the LLM.
+NOT_A_NAME = {
+    "and", "or", "between", "relationship", "related", "why", "how", "when", "where", "which", "many",
+    "much", "strongest", "weakest", "oldest", "youngest", "first", "last", "most", "least", "best",
+    "not", "without", "after", "before", "during", "than", "did", "does", "do",
+    # Prepositions relate the entity to something else ("Who is in charge of the Fatui?")
+    "in", "at", "on", "from", "with", "for", "by", "to", "into", "under", "over", "behind", "near",
+    "against", "within", "among",
+}
+# "X of Y" is a name ("Knights of Favonius") unless X names a relation to Y
+# ("the father of Kaeya", "the Archon of Inazuma", "the capital of Liyue")
+RELATIONAL_NOUNS = {
+    "father", "mother", "parent", "parents", "son", "daughter", "child", "children", "brother", "sister",
+    "sibling", "siblings", "wife", "husband", "spouse", "friend", "friends", "enemy", "enemies", "rival",
+    "ally", "allies", "capital", "ruler", "leader", "head", "archon", "god", "goddess", "creator",
+    "founder", "owner", "master", "servant", "charge", "home", "origin",
+}
+MAX_NAME_WORDS = 5
+
+LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
+
+def name_key(name):
+    """Python twin of apoc.text.clean: lowercase letters and digits only, accents stripped."""
+    decomposed = unicodedata.normalize("NFD", name)
+    return "".join(c for c in decomposed if c.isalnum() and not unicodedata.combining(c)).lower()
+
+
+def lucene_query(name):
+    """
+    Full-text query for a name: the exact phrase boosted, plus each word with fuzzy matching.
+    Fuzzy terms skip the analyzer, so they're lowercased and split into plain words here.
+    """
+    terms = re.findall(r"\w+", name.lower())
+    fuzzy = " ".join(f"{t}~" if len(t) > 3 else t for t in terms)
+    if len(terms) > 1:
+        phrase = LUCENE_SPECIAL.sub(r"\\\1", name)
+        return f'"{phrase}"^3 {fuzzy}'
+    return fuzzy
+
+
+class RoutedQuery:
+    def __init__(self, kind, name, cypher, params):
+        self.kind = kind
+        self.name = name
+        self.cypher = cypher
+        self.params = params
+
+    def __repr__(self):
+        return f"RoutedQuery({self.kind!r}, {self.name!r})"
+
+
+class QuestionRouter:
+    """
+    Recognizes the common question shapes (membership, entity lookup, name search) and fills
+    a precompiled Cypher query for them, so LoreReasoner can skip LLM Cypher generation.
+    route() returns None for anything else, and the question goes to the LLM chain.
+    """
+    def __init__(self, limit=50, min_score=0.5):
+        self.limit = limit
+        # Full-text hits scoring lower never answer from a template, even with a matching name
+        self.min_score = min_score
+
+    def route(self, question):
+        text = re.sub(r"\s+", " ", question).strip().rstrip("?!. ").strip()
+        lowered = text.lower()
+        for kind, pattern, cypher in ROUTES:
+            match = pattern.match(lowered)
+            if not match:
+                continue
+            # Take the name from the original text so its casing/apostrophes survive
+            name = self.clean_name(text[match.start("name"):])
+            if not self.looks_like_name(name):
+                return None
+            params = {"search": lucene_query(name), "key": name_key(name), "min_score": self.min_score,
+                      "limit": self.limit}
+            return RoutedQuery(kind, name, cypher, params)
+        return None
+
+    def clean_name(self, name):
+        name = name.strip(" \"'“”‘’")
+        # "the Fatui" -> "Fatui"; index matching doesn't need the article
+        return re.sub(r"^(?:the|a|an)\s+", "", name, flags=re.I)
+
+    def looks_like_name(self, name):
+        original = re.findall(r"[\w'’-]+", name)
+        words = [w.lower() for w in original]
+        # "Inazuma's Archon" describes someone rather than naming them
+        possessive = any(w.endswith(("'s", "’s")) for w in words)
+        if not (0 < len(words) <= MAX_NAME_WORDS) or possessive or NOT_A_NAME.intersection(words):
+            return False
+        # In "X of Y", X must be capitalized like a name and not a relation
+        return not any(
+            word == "of" and (i == 0 or original[i - 1][0].islower() or words[i - 1] in RELATIONAL_NOUNS)
+            for i, word in enumerate(words)
+        )
@@ -1,21 +1,35 @@
 import os
 from langchain_neo4j import Neo4jGraph, GraphCypherQAChain
+from langchain_neo4j.chains.graph_qa.cypher import extract_cypher
 from langchain_core.prompts import PromptTemplate
 from langchain_ollama import ChatOllama
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
+from src.utils.neo4j_client import AsyncNeo4jClient, GRAPH_VERSION_CYPHER
+from src.utils.query_cache import QueryCache, normalize_question, fingerprint
+from src.utils.schema_cache import GraphSchemaCache
+from src.pipeline.question_router import QuestionRouter
 
 load_dotenv()
 
 class LoreReasoner:
-    def __init__(self):
-        self.graph = Neo4jGraph(
+    def __init__(self, graph=None, llm=None, cache=None, cache_path=None, schema=None, schema_top_k=15,
+                 router=None, async_db=None):
+        # No schema introspection on startup: the prompt schema comes from the on-disk snapshot
+        self.graph = graph or Neo4jGraph(
             url=os.getenv("NEO4J_URI"),
             username=os.getenv("NEO4J_USERNAME"),
-            password=os.getenv("NEO4J_PASSWORD")
+            password=os.getenv("NEO4J_PASSWORD"),
+            refresh_schema=False
         )
 
-        self.llm = ChatOllama(
+        # Only a first run (no snapshot on disk yet) pays for a full introspection
+        self.schema = schema or GraphSchemaCache()
+        if self.schema.is_empty():
+            self.schema.refresh(self.graph.query)
+        self.schema_top_k = schema_top_k
+
+        self.llm = llm or ChatOllama(
             model="qwen2.5:7b",
             temperature=0.3,
             
@@ -43,7 +57,12 @@ class LoreReasoner:
             CALL db.index.fulltext.queryNodes('entity_names', 'Adventurers Guild') 
             YIELD node, score 
             RETURN node.name
-        5. Examples: 
+        5. **Single entities**: Entities usually carry a precomputed `neighbors` list ("TYPE -> Name") and `source_files`.
+           For "Who is X?" return those instead of matching `-[r]-`, but when `e.neighbors IS NULL OR e.summary_dirty`
+           the summary is missing or stale, so fall back to matching the relationships.
+           - Example: MATCH (e:Entity) WHERE e.name = 'Vedrfolnir' RETURN e.name, e.label, e.aliases, e.source_files,
+             CASE WHEN e.neighbors IS NULL OR e.summary_dirty THEN [(e)-[r]-(o:Entity) | type(r) + ' ' + o.name][..50] ELSE e.neighbors END AS connections
+        6. Examples: 
         Question: Who is in the Adventurers' Guild?
         Cypher: MATCH (m:Entity)-[r]-(g:Entity) WHERE g.name =~ '(?i).*Adventurer.*Guild.*' RETURN m.name, type(r)
 
@@ -74,26 +93,188 @@ class LoreReasoner:
             top_k=50
         )
 
+        # Layered answer cache: question -> Cypher, Cypher -> rows (tied to the graph version
+        # the extractor bumps on every write), and (question, rows) -> phrased answer.
+        # A repeat question on an unchanged graph never reaches the LLM.
+        self.cache = cache or QueryCache(path=cache_path)
+
+        # Common question shapes skip LLM Cypher generation entirely; router=False disables it
+        self.router = QuestionRouter(limit=self.chain.top_k) if router is None else router
+
+        # Pooled async driver behind aask()/astream(); it only connects on first use
+        self.async_db = async_db or AsyncNeo4jClient()
+
     def get_dynamic_schema(self):
-        # This query fetches all unique relationship types actually in your DB
-        result = self.graph.query("CALL db.relationshipTypes()")
-        rel_types = [row['relationshipType'] for row in result]
-        
-        # This fetches all property keys (like 'name', 'aliases', 'label')
-        props = self.graph.query("CALL db.propertyKeys()")
-        prop_keys = [row['propertyKey'] for row in props]
+        # Served from the schema snapshot instead of db.relationshipTypes() / db.propertyKeys() each call
+        self.schema.reload_if_changed()
+        rel_types = list(self.schema.data["relationship_types"])
+        prop_keys = self.schema.data["property_keys"]
 
         return f"Existing Relationships: {rel_types}\nAvailable Properties: {prop_keys}"
 
+    def graph_version(self):
+        rows = self.graph.query(GRAPH_VERSION_CYPHER)
+        return rows[0]["version"] if rows else 0
+
+    def prompt_schema(self, question):
+        """Compact schema with only the relationship types most relevant to this question."""
+        self.schema.reload_if_changed()
+        return self.schema.prompt_schema(question, top_k=self.schema_top_k)
+
+    def generate_cypher(self, question, schema=None):
+        """The chain's first LLM call: question + schema -> Cypher."""
+        generated = self.chain.cypher_generation_chain.invoke(
+            {"question": question, "schema": schema or self.prompt_schema(question)}
+        )
+        return extract_cypher(generated)
+
+    def routed_rows(self, question, version):
+        """
+        Rows from the router's template query, or None if the question didn't match a template,
+        the query failed (e.g. no `entity_names` index) or found no entity by that name; the LLM path handles those.
+        """
+        routed = self.router.route(question) if self.router else None
+        if routed is None:
+            return None
+
+        rows_key = fingerprint([routed.cypher, routed.params])
+        rows = self.cache.get("rows", rows_key, version=version)
+        if rows is None:
+            try:
+                rows = self.graph.query(routed.cypher, params=routed.params)
+            except Exception as e:
+                print(f"⚠️ Template query failed, falling back to the LLM: {e}")
+                return None
+            self.cache.set("rows", rows_key, rows, version=version)
+
+        if not rows:
+            return None
+        print(f"🧭 Routed as {routed.kind}: {routed.name}")
+        return rows
+
     def ask(self, question):
+        """
+        Same steps as GraphCypherQAChain (generate Cypher, run it, phrase the rows),
+        with each step's result looked up in the cache first. Questions the router
+        recognizes use a template query instead of the Cypher-generating LLM call.
+        """
         try:
             print(f"🤔 Thinking: {question}")
-            # .invoke returns a dict, we want the 'result' key
-            response = self.chain.invoke({"query": question})
-            return response['result']
+            key = normalize_question(question)
+            version = self.graph_version()
+
+            rows = self.routed_rows(question, version)
+            if rows is None:
+                # Cypher only depends on the question and the schema it was written against
+                schema = self.prompt_schema(question)
+                cypher_key = f"{fingerprint(schema)}:{key}"
+                cypher = self.cache.get("cypher", cypher_key)
+                if cypher is None:
+                    cypher = self.generate_cypher(question, schema)
+                    self.cache.set("cypher", cypher_key, cypher)
+                print(f"🧾 Cypher: {cypher}")
+
+                rows = self.cache.get("rows", cypher, version=version)
+                if rows is None:
+                    rows = self.graph.query(cypher)[:self.chain.top_k] if cypher else []
+                    self.cache.set("rows", cypher, rows, version=version)
+
+            # Unchanged rows after a graph write still reuse the phrased answer
+            answer_key = f"{key}:{fingerprint(rows)}"
+            answer = self.cache.get("answer", answer_key)
+            if answer is None:
+                answer = self.chain.qa_chain.invoke({"question": question, "context": rows})
+                self.cache.set("answer", answer_key, answer)
+            else:
+                print("⚡ Answered from cache")
+            return answer
         except Exception as e:
             return f"I tripped over a vine (Graph Error): {e}"
 
+    # --- Async API: the same steps as ask(), for serving many users from one event loop ---
+
+    async def agraph_version(self):
+        rows = await self.async_db.query(GRAPH_VERSION_CYPHER)
+        return rows[0]["version"] if rows else 0
+
+    async def arouted_rows(self, question, version):
+        """Async routed_rows(): returns (routed query, rows), with rows None when the LLM path is needed."""
+        routed = self.router.route(question) if self.router else None
+        if routed is None:
+            return None, None
+
+        rows_key = fingerprint([routed.cypher, routed.params])
+        rows = self.cache.get("rows", rows_key, version=version)
+        if rows is None:
+            try:
+                rows = await self.async_db.query(routed.cypher, routed.params)
+            except Exception as e:
+                print(f"⚠️ Template query failed, falling back to the LLM: {e}")
+                return routed, None
+            self.cache.set("rows", rows_key, rows, version=version)
+
+        if not rows:
+            return routed, None
+        print(f"🧭 Routed as {routed.kind}: {routed.name}")
+        return routed, rows
+
+    async def astream(self, question):
+        """
+        Async generator of events, each yielded as soon as it is available:
+            {"type": "cypher", "cypher": ..., "route": template kind or None}
+            {"type": "rows", "rows": [...]}
+            {"type": "token", "text": ...}    pieces of the answer as the LLM writes them
+            {"type": "answer", "text": ...}   the full answer, last
+        A failure ends the stream with {"type": "error", "text": ...}.
+        """
+        try:
+            print(f"🤔 Thinking: {question}")
+            key = normalize_question(question)
+            version = await self.agraph_version()
+
+            routed, rows = await self.arouted_rows(question, version)
+            if rows is not None:
+                yield {"type": "cypher", "cypher": routed.cypher, "route": routed.kind}
+            else:
+                schema = self.prompt_schema(question)
+                cypher_key = f"{fingerprint(schema)}:{key}"
+                cypher = self.cache.get("cypher", cypher_key)
+                if cypher is None:
+                    generated = await self.chain.cypher_generation_chain.ainvoke(
+                        {"question": question, "schema": schema}
+                    )
+                    cypher = extract_cypher(generated)
+                    self.cache.set("cypher", cypher_key, cypher)
+                yield {"type": "cypher", "cypher": cypher, "route": None}
+
+                rows = self.cache.get("rows", cypher, version=version)
+                if rows is None:
+                    rows = (await self.async_db.query(cypher))[:self.chain.top_k] if cypher else []
+                    self.cache.set("rows", cypher, rows, version=version)
+            yield {"type": "rows", "rows": rows}
+
+            answer_key = f"{key}:{fingerprint(rows)}"
+            answer = self.cache.get("answer", answer_key)
+            if answer is not None:
+                yield {"type": "token", "text": answer}
+            else:
+                pieces = []
+                async for piece in self.chain.qa_chain.astream({"question": question, "context": rows}):
+                    if piece:
+                        pieces.append(piece)
+                        yield {"type": "token", "text": piece}
+                answer = "".join(pieces)
+                self.cache.set("answer", answer_key, answer)
+            yield {"type": "answer", "text": answer}
+        except Exception as e:
+            yield {"type": "error", "text": f"I tripped over a vine (Graph Error): {e}"}
+
+    async def aask(self, question):
+        """ask() for asyncio callers: awaits the whole answer without blocking the event loop."""
+        async for event in self.astream(question):
+            if event["type"] in ("answer", "error"):
+                return event["text"]
+
 if __name__ == "__main__":
     bot = LoreReasoner()
     
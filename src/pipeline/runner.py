@@ -0,0 +1,300 @@
+"""
+Runs the whole ingest as one streaming pipeline instead of separate scripts:
+
+    scrape -> chunk -> extract (LLM) -> resolve -> write (Neo4j)
+
+Each stage runs on its own threads and reads from a bounded queue, so a page is being
+extracted while the next one downloads and the previous chunk is written. The wall time
+approaches that of the slowest stage rather than the sum of all of them. A full queue blocks
+the stage feeding it (backpressure), so memory stays bounded however far the crawl runs ahead.
+
+Progress is checkpointed the way the separate scripts already do it: the crawl state records
+visited pages, saved pages stay in output_dir, and the ingest manifest records every chunk that
+reached the graph. Ctrl-C stops the crawl and chunking, lets chunks already in flight finish,
+and the next run picks up from there (a second Ctrl-C exits immediately).
+"""
+import os
+import glob
+import queue
+import signal
+import threading
+import time
+
+from src.utils.ingest_manifest import UPLOADED
+from src.utils.metrics import metrics
+
+# Sent once per worker thread to shut a stage down
+STOP = object()
+
+
+class Stage:
+    """A pool of worker threads applying `handle` to every item put on its bounded inbox."""
+    def __init__(self, name, handle, workers=1, queue_size=8):
+        self.name = name
+        self.handle = handle
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.items = 0
+        self.busy = 0.0
+        self.threads = [
+            threading.Thread(target=self.work, name=f"pipeline-{name}-{i}", daemon=True) for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, item):
+        """Blocks while the inbox is full: this is where backpressure reaches the stage upstream."""
+        self.inbox.put(item)
+
+    def close(self):
+        """Lets the workers finish what's queued, then waits for them to exit."""
+        for _ in self.threads:
+            self.inbox.put(STOP)
+        for thread in self.threads:
+            thread.join()
+
+    def work(self):
+        while True:
+            item = self.inbox.get()
+            if item is STOP:
+                return
+            start = time.perf_counter()
+            try:
+                with metrics.timer(f"pipeline.{self.name}"):
+                    self.handle(item)
+            except Exception as e:
+                print(f"   ❌ {self.name} stage error: {e}")
+                metrics.count(f"pipeline.{self.name}_errors")
+            with self.lock:
+                self.items += 1
+                self.busy += time.perf_counter() - start
+
+
+class FileTracker:
+    """
+    Marks a file done in the ingest manifest once all of its chunks reached the graph.
+    Chunks finish out of order across the extraction workers, so they're counted per file.
+    """
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self.lock = threading.Lock()
+        # (filename, file hash) -> [expected chunks (None while still chunking), finished, all ok]
+        self.files = {}
+        self.done = 0
+        self.incomplete = 0
+
+    def start(self, file_id):
+        with self.lock:
+            self.files[file_id] = [None, 0, True]
+
+    def expect(self, file_id, chunks, ok):
+        with self.lock:
+            entry = self.files[file_id]
+            entry[0] = chunks
+            entry[2] = entry[2] and ok
+            self.check(file_id)
+
+    def chunk_done(self, file_id, ok):
+        with self.lock:
+            entry = self.files[file_id]
+            entry[1] += 1
+            entry[2] = entry[2] and ok
+            self.check(file_id)
+
+    def check(self, file_id):
+        expected, finished, ok = self.files[file_id]
+        if expected is None or finished < expected:
+            return
+        del self.files[file_id]
+        if ok:
+            self.manifest.mark_file_done(*file_id)
+            self.done += 1
+        else:
+            # Left unfinished, so the next run retries the chunks that didn't make it
+            self.incomplete += 1
+
+
+class ChunkOrder:
+    """
+    Hands jobs to `release` in the order they were numbered, however the extraction workers
+    finish them, so the resolver and writer see chunks in the order process_directory would
+    (file by file, chunk by chunk). Jobs finished early wait here for the ones before them.
+    """
+    def __init__(self, release):
+        self.release = release
+        self.lock = threading.Lock()
+        self.numbered = 0
+        self.next = 0
+        self.waiting = {}
+
+    def number(self):
+        with self.lock:
+            self.numbered += 1
+            return self.numbered - 1
+
+    def done(self, job):
+        # Released under the lock, so two workers can't put consecutive jobs out of order
+        with self.lock:
+            self.waiting[job["seq"]] = job
+            while self.next in self.waiting:
+                self.release(self.waiting.pop(self.next))
+                self.next += 1
+
+
+class PipelineRunner:
+    """
+    Connects a GenshinSmartScraper and a LoreExtractor with bounded queues.
+    Concurrency per stage: the scraper's own max_workers fetch pages, chunk_workers read and
+    split files, extract_workers call the LLM (match OLLAMA_NUM_PARALLEL). Resolution and
+    writing stay on one thread each: EntityResolver isn't thread-safe, and a single writer
+    keeps chunk transactions from contending for the same nodes' locks. Chunks reach them in
+    the order they were read (ChunkOrder), so the graph doesn't depend on the worker count.
+    """
+    def __init__(self, scraper, extractor, chunk_workers=1, extract_workers=1, queue_size=8):
+        self.scraper = scraper
+        self.extractor = extractor
+        self.stopping = threading.Event()
+        self.seen_lock = threading.Lock()
+        self.seen = set()
+        self.tracker = None
+
+        self.chunk_stage = Stage("chunk", self.chunk_file, workers=chunk_workers, queue_size=queue_size)
+        # Enough queued chunks to keep every LLM worker busy while the next file is chunked
+        self.extract_stage = Stage("extract", self.extract_chunk, workers=extract_workers,
+                                   queue_size=max(queue_size, 2 * extract_workers))
+        self.resolve_stage = Stage("resolve", self.resolve_chunk, queue_size=queue_size)
+        self.write_stage = Stage("write", self.write_chunk, queue_size=queue_size)
+        self.order = ChunkOrder(self.resolve_stage.put)
+        self.stages = [self.chunk_stage, self.extract_stage, self.resolve_stage, self.write_stage]
+
+    def stop(self):
+        """Graceful shutdown: no new pages or chunks; what's already in flight is finished."""
+        if not self.stopping.is_set():
+            print("\n⏸️ Stopping: finishing chunks in flight (Ctrl-C again to quit now)...")
+        self.stopping.set()
+        self.scraper.stop()
+
+    def run(self, categories=(), limit=50, only_changed=False, include_existing=True, force=False):
+        """
+        Crawls `categories` and streams every saved page through extraction into the graph.
+        include_existing=True also feeds the pages already in the scraper's output_dir, which is
+        how pages saved by an interrupted run get extracted (unchanged ones are skipped).
+        """
+        start = time.perf_counter()
+        self.extractor.prepare(force=force)
+        self.tracker = FileTracker(self.extractor.manifest)
+        for stage in self.stages:
+            stage.start()
+
+        handler = None
+        if threading.current_thread() is threading.main_thread():
+            handler = signal.signal(signal.SIGINT, self.on_interrupt)
+        try:
+            if include_existing:
+                existing = sorted(glob.glob(os.path.join(self.scraper.output_dir, "*.txt")))
+                print(f"📂 Queueing {len(existing)} pages already on disk...")
+                for filepath in existing:
+                    if self.stopping.is_set():
+                        break
+                    self.chunk_stage.put(filepath)
+            for category in categories:
+                if self.stopping.is_set():
+                    break
+                self.scraper.crawl_category(category, limit=limit, only_changed=only_changed,
+                                            on_page=self.chunk_stage.put)
+
+            # Each stage drains before the next one is told to stop
+            for stage in self.stages:
+                stage.close()
+        finally:
+            if handler is not None:
+                signal.signal(signal.SIGINT, handler)
+
+        self.extractor.finish()
+        self.report(time.perf_counter() - start)
+
+    def on_interrupt(self, signum, frame):
+        if self.stopping.is_set():
+            raise KeyboardInterrupt
+        self.stop()
+
+    def report(self, wall):
+        print(f"\n🏁 Pipeline finished in {wall:.1f}s: {self.tracker.done} files completed, "
+              f"{self.tracker.incomplete} left for the next run.")
+        for stage in self.stages:
+            workers = len(stage.threads)
+            print(f"   ⏱️ {stage.name:<8} {stage.items:6d} items  {stage.busy:8.1f}s busy "
+                  f"({workers} worker{'s' if workers > 1 else ''})")
+
+    # --- Stage handlers ---
+
+    def chunk_file(self, filepath):
+        """Splits one saved page; chunks with a usable manifest entry skip the LLM stage."""
+        if self.stopping.is_set():
+            # Still drained, so scraper threads blocked on put() can finish
+            return
+        filename = os.path.basename(filepath)
+        file_hash = self.extractor.changed_file_hash(filepath)
+        if file_hash is None:
+            return
+        file_id = (filename, file_hash)
+        with self.seen_lock:
+            # Queued twice (already on disk, then re-saved by the crawl with the same text)
+            if file_id in self.seen:
+                return
+            self.seen.add(file_id)
+
+        print(f"\n📖 Reading {filename}...")
+        self.tracker.start(file_id)
+        chunks, ok = 0, True
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                for i, text in enumerate(self.extractor.chunker.iter_chunks(f)):
+                    if self.stopping.is_set():
+                        ok = False
+                        break
+                    key, status, data = self.extractor.lookup_chunk(text, filename)
+                    job = {"file_id": file_id, "source_file": filename, "index": i, "text": text,
+                           "key": key, "status": status, "data": data, "plan": None, "failed": False,
+                           "seq": self.order.number()}
+                    chunks += 1
+                    if status is None:
+                        self.extract_stage.put(job)
+                    else:
+                        self.order.done(job)
+        except Exception as e:
+            print(f"   ❌ Error processing {filename}: {e}")
+            ok = False
+        self.tracker.expect(file_id, chunks, ok)
+
+    def extract_chunk(self, job):
+        print(f"   🤖 Processing chunk {job['index']+1} of {job['source_file']}...")
+        try:
+            job["data"] = self.extractor.extract(job["text"], chunk_index=job["index"], source_file=job["source_file"])
+        finally:
+            # Even a failed chunk takes its turn, or every chunk after it would wait forever
+            self.order.done(job)
+
+    def resolve_chunk(self, job):
+        if job["status"] != UPLOADED and job["data"] is not None:
+            try:
+                job["plan"] = self.extractor.plan_upload(job["data"], source_file=job["source_file"])
+            except Exception as e:
+                print(f"      ⚠️ Resolver Error: {e}")
+                job["failed"] = True
+        self.write_stage.put(job)
+
+    def write_chunk(self, job):
+        ok = False
+        try:
+            if job["failed"]:
+                # Keep the LLM's answer, so the retry doesn't pay for it again
+                if job["status"] is None and job["data"] is not None:
+                    self.extractor.manifest.save_extraction(job["key"], job["source_file"], job["index"], job["data"])
+            else:
+                ok = self.extractor.write_extraction(job["data"], job["source_file"], job["index"],
+                                                     job["key"], job["status"], plan=job["plan"])
+        finally:
+            self.tracker.chunk_done(job["file_id"], ok)
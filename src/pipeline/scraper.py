@@ -1,99 +1,184 @@
 import os
+import sys
+import threading
 import requests
-import time
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import re
+import multiprocessing
+from urllib.parse import urljoin, quote
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.utils.rate_limiter import TokenBucket
+from src.utils.crawl_state import CrawlState
+from src.pipeline.html_cleaner import clean_soup, clean_html
+from src.utils.metrics import metrics
 
 class GenshinSmartScraper:
-    def __init__(self, output_dir="data/raw"):
-        self.base_url = "https://genshin-impact.fandom.com"
+    def __init__(self, output_dir="data/raw", base_url="https://genshin-impact.fandom.com",
+                 requests_per_second=2.0, max_workers=4, state_dir=None,
+                 clean_backend="lxml", clean_workers=0):
+        self.base_url = base_url
+        self.api_url = urljoin(self.base_url, "/api.php")
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        # Keep track of what we've seen so we don't scrape the same page twice
-        self.visited_urls = set()
 
-    def clean_text(self, soup):
+        # One pooled session for every request: keep-alive instead of a new TCP/TLS handshake per page.
+        # Retries back off on 429/5xx and honour Retry-After.
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Replaces the old fixed time.sleep(1): shared by all worker threads
+        self.rate_limiter = TokenBucket(rate=requests_per_second)
+
+        # Keep track of what we've seen so we don't scrape the same page twice (persisted across runs)
+        if state_dir is None:
+            state_dir = os.path.join(os.path.dirname(os.path.normpath(output_dir)), "crawl_state")
+        self.state = CrawlState(state_dir)
+        self.visited_urls = self.state.visited
+
+        # HTML cleaning is CPU-bound: with clean_workers > 0 it runs in its own process pool,
+        # so fetch threads only wait on the network and cleaning scales across cores.
+        self.clean_backend = clean_backend
+        self.clean_workers = clean_workers
+        self.clean_pool = None
+        if clean_workers > 0:
+            self.clean_pool = ProcessPoolExecutor(
+                max_workers=clean_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        # Set by stop(): workers finish their current page and the crawl returns early
+        self.stopping = threading.Event()
+
+    def stop(self):
+        """Asks a running crawl_category to wind down; its progress stays in the crawl state."""
+        self.stopping.set()
+
+    def close(self):
+        if self.clean_pool:
+            self.clean_pool.shutdown()
+        self.state.close()
+
+    def clean_html(self, raw_html):
+        """Raw `action=parse` HTML -> clean text, on the process pool if there is one."""
+        with metrics.timer("scrape.clean"):
+            if self.clean_pool:
+                return self.clean_pool.submit(clean_html, raw_html, self.clean_backend).result()
+            return clean_html(raw_html, self.clean_backend)
+
+    def api_get(self, params):
+        """Rate-limited GET against the MediaWiki API, returning the decoded JSON."""
+        self.rate_limiter.acquire()
+        response = self.session.get(self.api_url, params=params, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def page_url(self, page_title):
+        return urljoin(self.base_url, "/wiki/" + quote(page_title.replace(" ", "_")))
+
+    def safe_filename(self, page_title):
+        return page_title.replace(" ", "_").replace("/", "_").replace(":", "_")
+
+    def revid_path(self, page_title):
+        """Sidecar next to the page's .txt holding the revision it was scraped from."""
+        return os.path.join(self.output_dir, self.safe_filename(page_title) + ".revid")
+
+    def stored_revid(self, page_title):
+        try:
+            with open(self.revid_path(page_title), "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def save_revid(self, page_title, revid):
+        if revid is None:
+            return
+        with open(self.revid_path(page_title), "w", encoding="utf-8") as f:
+            f.write(str(revid))
+
+    def fetch_revisions(self, titles, batch_size=50):
         """
-        Advanced cleaning: Handles Tables, Notes, and Junk.
+        Latest revision ID per title, asking for up to 50 titles per request (the API limit).
+        Missing pages map to None. Redirects/normalization are followed back to the requested title.
         """
-        # 1. REMOVE JUNK (Expanded list)
-        junk_selectors = [
-            "script", "style", "nav", "footer", "aside",
-            ".navbox", ".wds-global-footer", ".reflist", 
-            ".license-description", ".toc", ".mw-editsection", 
-            "sup", # Citations [1]
-            "#catlinks",
-            ".caption", # Image captions often interrupt sentences
-            "th.language-name", # Hides the language table headers
-        ]
-        
-        for selector in junk_selectors:
-            for element in soup.select(selector):
-                element.decompose()
-
-        # 2. LOCATE CONTENT
-        content = soup.find("div", class_="mw-parser-output")
-        if not content:
-            return ""
-
-        # 3. SMART TABLE HANDLING
-        # We convert tables into a linear format: "Header: Cell, Header: Cell"
-        for table in content.find_all("table"):
-            # If it's a massive translation table, just kill it.
-            if "wikitable" in table.get("class", []) and "width" in table.attrs:
-                # Heuristic: Translation tables often have specific width attributes or specific headers
-                headers = [th.get_text().strip() for th in table.find_all("th")]
-                if "Language" in headers or "Chinese" in str(table):
-                    table.decompose()
+        latest = {}
+        for i in range(0, len(titles), batch_size):
+            batch = titles[i:i+batch_size]
+            data = self.api_get({
+                "action": "query",
+                "prop": "info|revisions",
+                "rvprop": "ids",
+                "titles": "|".join(batch),
+                "redirects": 1,
+                "format": "json"
+            })
+            query = data.get("query", {})
+
+            # requested title -> title the API reports the page under
+            renamed = {}
+            for key in ("normalized", "redirects"):
+                for item in query.get(key, []):
+                    renamed[item["from"]] = item["to"]
+
+            by_title = {}
+            for page in query.get("pages", {}).values():
+                if "missing" in page:
                     continue
+                revisions = page.get("revisions") or [{}]
+                by_title[page["title"]] = page.get("lastrevid") or revisions[0].get("revid")
 
-            # Otherwise, preserve useful tables (like the Ancient Name list)
-            rows = []
-            headers = [th.get_text().strip() for th in table.find_all("th")]
-            
-            for tr in table.find_all("tr"):
-                cells = [td.get_text(separator=" ").strip() for td in tr.find_all("td")]
-                if cells:
-                    # Pair header with cell if possible
-                    row_str = " | ".join(cells)
-                    rows.append(row_str)
-            
-            # Replace the HTML table with this text representation
-            new_text = "\n".join(rows)
-            table.replace_with(f"\n[TABLE_DATA]\n{new_text}\n[/TABLE_DATA]\n")
-
-        # 4. REMOVE FOOTERS (References, etc)
-        for header in content.find_all(['h2', 'h3']):
-            header_text = header.get_text().strip().lower()
-            if any(x in header_text for x in ["references", "navigation", "see also", "external links", "change history", "other languages", "notes"]):
-                # Cut off everything after this header
-                for sibling in header.find_next_siblings():
-                    sibling.decompose()
-                header.decompose()
-                break
-
-        # 5. TEXT EXTRACTION & REGEX CLEANING
-        text = content.get_text(separator="\n")
-        
-        # Remove [Note 1], [1], etc.
-        text = re.sub(r"\[\s*(Note\s*)?\d+\s*\]", "", text)
-        # Remove the "↑" arrows from notes
-        text = re.sub(r"↑", "", text)
-        # Collapse whitespace
-        text = re.sub(r"\n\s*\n", "\n\n", text)
-        
-        return text.strip()
+            for title in batch:
+                final = title
+                # Bounded so a redirect loop can't spin forever
+                for _ in range(len(renamed)):
+                    if final not in renamed:
+                        break
+                    final = renamed[final]
+                latest[title] = by_title.get(final)
+        return latest
+
+    def changed_titles(self, titles):
+        """Titles whose current revision differs from the one their saved text came from."""
+        latest = self.fetch_revisions(titles)
+        changed = [t for t in titles if latest.get(t) is None or latest[t] != self.stored_revid(t)]
+        print(f"🔁 {len(changed)}/{len(titles)} pages changed since the last crawl.")
+        return changed
+
+    def clean_text(self, soup):
+        """
+        Advanced cleaning: Handles Tables, Notes, and Junk.
+        Works on a BeautifulSoup tree; the crawler itself goes through `clean_html`.
+        """
+        with metrics.timer("scrape.clean"):
+            return clean_soup(soup)
 
     def scrape_page(self, page_title):
         """
         Fetches page content via API, but filters out 'Junk' pages (Lists, Disambiguations).
+        Returns the saved file path, or None if the page was skipped or failed.
         """
-        api_url = urljoin(self.base_url, "/api.php")
-        
+        try:
+            return self.fetch_page(page_title)
+        except Exception as e:
+            print(f"⚠️ Error processing {page_title}: {e}")
+
+    def fetch_page(self, page_title):
+        """scrape_page without the error handling: network/API failures raise."""
+        with metrics.timer("scrape.page"):
+            return self.fetch_parsed_page(page_title)
+
+    def fetch_parsed_page(self, page_title):
+        """The action=parse request, junk filters, cleaning and save for one page."""
         params = {
             "action": "parse",
             "page": page_title,
@@ -104,97 +189,181 @@ class GenshinSmartScraper:
         
         print(f"📄 API Fetching: {page_title}...")
         
-        try:
-            response = requests.get(api_url, headers=self.headers, params=params)
-            data = response.json()
-            
-            if "error" in data:
-                print(f"⚠️ API Error: {data['error'].get('info')}")
-                return
-            
-            # --- THE SMART FILTER ---
-            # 1. Check Categories
-            categories = data["parse"].get("categories", [])
-            # Extract just the category names (hidden in the dict)
-            cat_names = [c.get("*", "").lower() for c in categories]
-            
-            # Define "Banned" keywords
-            banned_keywords = ["disambiguation", "list of", "navigation", "timeline", "overviews"]
-            
-            if any(keyword in cat_name for cat_name in cat_names for keyword in banned_keywords):
-                print(f"🛑 Skipping '{page_title}' (It looks like a {cat_names})")
-                return
-
-            # 2. Check for "Disambiguation" Property (The official API flag)
-            properties = data["parse"].get("properties", [])
-            prop_names = [p.get("name") for p in properties]
-            if "disambiguation" in prop_names:
-                print(f"🛑 Skipping '{page_title}' (It is a Disambiguation page)")
-                return
-            # ------------------------
-
-            # If we passed the checks, process the text!
-            raw_html = data["parse"]["text"]["*"]
-            soup = BeautifulSoup(raw_html, "html.parser")
-            clean_content = self.clean_text(soup)
-
-            # Extra Check: If text is too short, it's probably an empty stub
-            if len(clean_content) < 500: 
-                print(f"⚠️ Skipping '{page_title}' (Content too short: {len(clean_content)} chars)")
-                return
-
-            # Save file
-            safe_filename = page_title.replace(" ", "_").replace("/", "_").replace(":", "_") + ".txt"
-            filepath = os.path.join(self.output_dir, safe_filename)
-            
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(clean_content)
-            
-            print(f"✅ Saved {safe_filename}")
-            time.sleep(1)
+        data = self.api_get(params)
+        
+        if "error" in data:
+            print(f"⚠️ API Error: {data['error'].get('info')}")
+            metrics.count("scrape.api_errors")
+            return
 
-        except Exception as e:
-            print(f"⚠️ Error processing {page_title}: {e}")
+        filepath = self.process_parse(page_title, data["parse"])
+        # Remember the revision even for filtered pages, so a refresh doesn't parse them again
+        self.save_revid(page_title, data["parse"].get("revid"))
+        return filepath
 
-    def crawl_category(self, category_name, limit=50):
-        """
-        Smart Harvester: Uses the MediaWiki API to get category members.
-        This bypasses HTML/CSS changes and JavaScript lazy-loading.
-        """
-        print(f"🔍 Asking API for Category: {category_name}...")
+    def process_parse(self, page_title, parse):
+        """Applies the junk-page filters to an `action=parse` result, then cleans and saves the text."""
+        raw_html = self.filter_parse(page_title, parse)
+        if raw_html is None:
+            return
+        return self.save_page(page_title, self.clean_html(raw_html))
+
+    def filter_parse(self, page_title, parse):
+        """The junk-page filters: returns the page HTML, or None if the page should be skipped."""
+        # --- THE SMART FILTER ---
+        # 1. Check Categories
+        categories = parse.get("categories", [])
+        # Extract just the category names (hidden in the dict)
+        cat_names = [c.get("*", "").lower() for c in categories]
         
-        # The hidden MediaWiki API endpoint
-        api_url = urljoin(self.base_url, "/api.php")
+        # Define "Banned" keywords
+        banned_keywords = ["disambiguation", "list of", "navigation", "timeline", "overviews"]
         
+        if any(keyword in cat_name for cat_name in cat_names for keyword in banned_keywords):
+            print(f"🛑 Skipping '{page_title}' (It looks like a {cat_names})")
+            metrics.count("scrape.skipped_pages")
+            return
+
+        # 2. Check for "Disambiguation" Property (The official API flag)
+        properties = parse.get("properties", [])
+        prop_names = [p.get("name") for p in properties]
+        if "disambiguation" in prop_names:
+            print(f"🛑 Skipping '{page_title}' (It is a Disambiguation page)")
+            metrics.count("scrape.skipped_pages")
+            return
+        # ------------------------
+
+        # If we passed the checks, process the text!
+        return parse["text"]["*"]
+
+    def save_page(self, page_title, clean_content):
+        """Writes a page's cleaned text to output_dir, unless it's too short to be worth extracting."""
+        # Extra Check: If text is too short, it's probably an empty stub
+        if len(clean_content) < 500: 
+            print(f"⚠️ Skipping '{page_title}' (Content too short: {len(clean_content)} chars)")
+            metrics.count("scrape.skipped_pages")
+            return
+
+        # Save file
+        safe_filename = self.safe_filename(page_title) + ".txt"
+        filepath = os.path.join(self.output_dir, safe_filename)
+        
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(clean_content)
+        
+        print(f"✅ Saved {safe_filename}")
+        metrics.count("scrape.pages_saved")
+        return filepath
+
+    def crawl_page(self, page_title, skip_visited=True, on_page=None):
+        """
+        Scrapes one page and records it as visited, unless the fetch failed (so a resume retries it).
+        on_page(filepath) is called for every page that was saved.
+        """
+        url = self.page_url(page_title)
+        if self.stopping.is_set() or (skip_visited and url in self.visited_urls):
+            return
+        try:
+            filepath = self.fetch_page(page_title)
+            self.state.mark_visited(url)
+            if filepath and on_page:
+                on_page(filepath)
+        except Exception as e:
+            print(f"⚠️ Error processing {page_title}: {e}")
+            metrics.count("scrape.page_errors")
+
+    def fetch_category_members(self, category_name, cmcontinue=None, cmlimit=500):
+        """One page of category members: returns (titles, next cmcontinue token or None)."""
         # API parameters to get category members
         params = {
             "action": "query",
             "list": "categorymembers",
             "cmtitle": f"Category:{category_name}",
-            "cmlimit": limit,       # How many to fetch
+            "cmlimit": cmlimit,     # How many to fetch (500 is the API max for normal users)
             "cmnamespace": 0,       # Namespace 0 means "Main Articles" only (filters out User/Talk pages automatically!)
             "format": "json"
         }
-        
+        if cmcontinue:
+            params["cmcontinue"] = cmcontinue
+
+        data = self.api_get(params)
+        members = data.get("query", {}).get("categorymembers", [])
+        next_token = data.get("continue", {}).get("cmcontinue")
+        return [page["title"] for page in members], next_token
+
+    def crawl_category(self, category_name, limit=50, resume=True, only_changed=False, on_page=None):
+        """
+        Smart Harvester: Uses the MediaWiki API to get category members.
+        This bypasses HTML/CSS changes and JavaScript lazy-loading.
+
+        Follows `cmcontinue` until the category (or `limit` members; None = all) is exhausted,
+        scraping each listing page's members on a thread pool. Progress is saved to the crawl
+        state after every listing page and every scraped page, so a re-run resumes.
+        resume=False restarts the listing; pages already visited are still skipped
+        until `self.state.reset()` is called.
+
+        only_changed=True is the refresh mode: every listed page is checked with batched
+        revision queries and only pages whose revid differs from their `.revid` sidecar are
+        parsed again (visited or not). A finished category is listed again from the start.
+
+        on_page(filepath) is called from the worker threads for each saved page; a blocking
+        callback (a full queue downstream) holds the crawl back. After stop(), the crawl
+        returns once in-flight pages are done, without marking the category finished.
+        """
+        print(f"🔍 Asking API for Category: {category_name}...")
+
+        entry = self.state.category(category_name)
+        if not resume or (only_changed and entry["done"]):
+            entry.update({"cmcontinue": None, "pending": [], "listed": 0, "done": False})
+        if entry["done"]:
+            print(f"✅ Category '{category_name}' already crawled (resume=False to crawl it again).")
+            return
+        if entry["pending"] or entry["cmcontinue"]:
+            print(f"⏯️ Resuming '{category_name}': {entry['listed']} pages listed so far.")
+
         try:
-            response = requests.get(api_url, headers=self.headers, params=params)
-            data = response.json()
-            
-            members = data.get("query", {}).get("categorymembers", [])
-            
-            if not members:
-                print(f"⚠️ API found 0 pages for '{category_name}'. Check the spelling!")
-                return
-                
-            print(f"🔗 API found {len(members)} pages. Starting download...")
-            
-            # Loop through the results and scrape the actual text
-            for page in members:
-                page_title = page["title"]
-                
-                self.scrape_page(page_title)
-                
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                while True:
+                    # Scrape whatever was listed but not finished (including leftovers from an interrupted run)
+                    if only_changed:
+                        todo = self.changed_titles(entry["pending"]) if entry["pending"] else []
+                        list(pool.map(lambda t: self.crawl_page(t, skip_visited=False, on_page=on_page), todo))
+                    else:
+                        todo = [t for t in entry["pending"] if self.page_url(t) not in self.visited_urls]
+                        list(pool.map(lambda t: self.crawl_page(t, on_page=on_page), todo))
+                    if self.stopping.is_set():
+                        # Unvisited pending pages are picked up by the next run
+                        self.state.save()
+                        print(f"⏸️ Stopped crawling '{category_name}'.")
+                        return
+                    entry["pending"] = []
+                    self.state.save()
+
+                    remaining = None if limit is None else limit - entry["listed"]
+                    listing_finished = entry["listed"] > 0 and not entry["cmcontinue"]
+                    if listing_finished or remaining == 0:
+                        break
+
+                    titles, next_token = self.fetch_category_members(
+                        category_name,
+                        cmcontinue=entry["cmcontinue"],
+                        cmlimit=min(500, remaining) if remaining else 500,
+                    )
+                    if not titles and entry["listed"] == 0:
+                        print(f"⚠️ API found 0 pages for '{category_name}'. Check the spelling!")
+                        return
+
+                    print(f"🔗 API listed {len(titles)} pages. Starting download...")
+                    titles = titles[:remaining] if remaining else titles
+                    entry["pending"] = titles
+                    entry["listed"] += len(titles)
+                    entry["cmcontinue"] = next_token
+                    self.state.save()
+
+            entry["done"] = True
+            self.state.save()
             print(f"✅ Finished category '{category_name}'.")
+            metrics.flush()
 
         except Exception as e:
             print(f"⚠️ Failed to query API: {e}")
@@ -210,5 +379,8 @@ if __name__ == "__main__":
         "Gods"
     ]
     
+    # `--refresh` re-parses only pages edited since the last crawl
+    refresh = "--refresh" in sys.argv
     for cat in target_categories:
-        scraper.crawl_category(cat, limit=10)
\ No newline at end of file
+        scraper.crawl_category(cat, limit=10, only_changed=refresh)
+    scraper.close()
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Precomputed entity summaries, so "Who is X?" is one index lookup instead of a traversal.
+
+Every Entity carries, as node properties:
+- neighbors: up to top_n "TYPE -> Name" / "TYPE <- Name" lines per relationship type and
+  direction (best-connected neighbors first), plus "TYPE -> (+N more)" when cut short
+- degree: its total number of relationships
+- source_files: every page it was extracted from (kept by the extractor's upsert)
+
+The extractor's upserts mark the nodes they touch with summary_dirty = true, and refresh()
+recomputes only those (the bulk export writes finished summaries straight into nodes.csv).
+QuestionRouter's lookup template reads the summary and only traverses for nodes without one.
+
+    python -m src.pipeline.summaries              # refresh dirty summaries
+    python -m src.pipeline.summaries --rebuild    # recompute every summary
+"""
+import argparse
+import time
+
+from src.utils.metrics import metrics
+from src.utils.neo4j_client import BUMP_GRAPH_VERSION_CYPHER
+
+# Neighbors per (entity, type, direction), best-connected first. COUNT {} reads the node's
+# degree from its relationship chain, no traversal beyond it.
+# The no-op SET write-locks the batch's nodes before anything is read: an upload that would
+# add a relationship or mark one dirty waits for this transaction, so its flag is set after
+# the summary is written rather than cleared by it.
+DIRTY_NEIGHBORS_CYPHER = """
+MATCH (e:Entity) WHERE e.summary_dirty = true
+WITH e LIMIT $batch
+SET e.summary_dirty = true
+WITH e
+OPTIONAL MATCH (e)-[r]-(other:Entity)
+WITH e, r, other ORDER BY COUNT { (other)--() } DESC
+WITH e, type(r) AS type, startNode(r) = e AS outgoing, collect(other.name) AS names
+RETURN e.name AS name, type, outgoing, size(names) AS total, names[..$top_n] AS names
+"""
+
+SUMMARY_UPDATE_CYPHER = """
+UNWIND $rows AS row
+MATCH (e:Entity {name: row.name})
+SET e.neighbors = row.neighbors, e.degree = row.degree, e.summary_dirty = false
+"""
+
+# Run until it marks nothing, so no single transaction holds the whole graph
+MARK_DIRTY_CYPHER = """
+MATCH (e:Entity) WHERE coalesce(e.summary_dirty, false) = false
+WITH e LIMIT $batch
+SET e.summary_dirty = true
+RETURN count(e) AS marked
+"""
+
+
+def neighbor_lines(groups, top_n):
+    """
+    [(relationship type, outgoing?, total, names best-first)] -> the `neighbors` property.
+    Types are sorted so a summary only changes when its neighbors do.
+    """
+    lines = []
+    for rel_type, outgoing, total, names in sorted(groups, key=lambda g: (g[0], not g[1])):
+        arrow = "->" if outgoing else "<-"
+        lines += [f"{rel_type} {arrow} {name}" for name in names[:top_n]]
+        if total > top_n:
+            lines.append(f"{rel_type} {arrow} (+{total - top_n} more)")
+    return lines
+
+
+def refresh_batch(tx, summarizer):
+    """
+    Transaction function: locks and reads one batch of dirty nodes, writes their summaries and
+    bumps the graph version, all in one transaction. Returns how many summaries were written.
+    """
+    rows = tx.run(DIRTY_NEIGHBORS_CYPHER, {"batch": summarizer.batch_size, "top_n": summarizer.top_n}).data()
+    if not rows:
+        return 0
+    summaries = summarizer.build(rows)
+    tx.run(SUMMARY_UPDATE_CYPHER, {"rows": summaries}).consume()
+    # Query caches (LoreReasoner) hold rows read while these nodes were stale
+    tx.run(BUMP_GRAPH_VERSION_CYPHER).consume()
+    return len(summaries)
+
+
+class EntitySummarizer:
+    """Recomputes the summaries of dirty Entity nodes, batch_size nodes per round trip."""
+    def __init__(self, db, top_n=10, batch_size=500):
+        self.db = db
+        self.top_n = top_n
+        self.batch_size = batch_size
+
+    def refresh(self):
+        """Recomputes every dirty summary; returns how many were written."""
+        start = time.time()
+        refreshed = 0
+        while True:
+            with metrics.timer("summaries.batch"):
+                written = self.db.write_transaction(refresh_batch, self)
+            if not written:
+                break
+            refreshed += written
+        if refreshed:
+            print(f"🗂️ Refreshed {refreshed} entity summaries ({time.time() - start:.1f}s).")
+            metrics.count("summaries.refreshed", refreshed)
+        return refreshed
+
+    def build(self, rows):
+        """DIRTY_NEIGHBORS_CYPHER rows -> SUMMARY_UPDATE_CYPHER rows."""
+        groups = {}
+        for row in rows:
+            entity = groups.setdefault(row["name"], [])
+            # An entity with no relationships comes back as one row with a null type
+            if row["type"] is not None:
+                entity.append((row["type"], row["outgoing"], row["total"], row["names"]))
+        return [
+            {
+                "name": name,
+                "neighbors": neighbor_lines(entity, self.top_n),
+                "degree": sum(group[2] for group in entity),
+            }
+            for name, entity in groups.items()
+        ]
+
+    def rebuild(self):
+        """Marks every entity dirty, then refreshes them all (e.g. after changing top_n)."""
+        while self.db.execute_write(MARK_DIRTY_CYPHER, {"batch": 10000})[0]["marked"]:
+            pass
+        # Lookups fall back to traversing dirty nodes, so cached summary rows are stale now
+        self.db.execute_write(BUMP_GRAPH_VERSION_CYPHER)
+        return self.refresh()
+
+
+if __name__ == "__main__":
+    from src.utils.neo4j_client import Neo4jClient
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every summary, not only the dirty ones")
+    parser.add_argument("--top-n", type=int, default=10, help="Neighbors kept per relationship type and direction")
+    args = parser.parse_args()
+
+    db = Neo4jClient()
+    db.ensure_schema()
+    summarizer = EntitySummarizer(db, top_n=args.top_n)
+    try:
+        summarizer.rebuild() if args.rebuild else summarizer.refresh()
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+QUOTES = str.maketrans({"’": "'", "‘": "'", "“": '"', "”": '"', "`": "'"})
+
+
+def normalize_name(name):
+    """Case, width, quote style and spacing variants of a name all map to the same key."""
+    name = unicodedata.normalize("NFKC", name).translate(QUOTES).casefold()
+    return re.sub(r"\s+", " ", name).strip(" \t.,;:!?\"'()[]")
+
+
+class AliasIndex:
+    """
+    Exact-match first tier for EntityResolver: normalized name/alias -> canonical name.
+    Held in memory and persisted to SQLite next to the Chroma store. The first canonical name
+    to claim an alias keeps it, so an ambiguous alias never moves an entity to another one.
+    With path=None the index lives in memory only.
+    """
+    def __init__(self, path="./data/chroma_db/genshin_entities_aliases.sqlite"):
+        self.lock = threading.Lock()
+        self.names = {}
+        self.conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            with self.conn:
+                self.conn.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, canonical TEXT)")
+            self.names = dict(self.conn.execute("SELECT alias, canonical FROM aliases"))
+
+    def __len__(self):
+        return len(self.names)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+    def lookup(self, name):
+        return self.names.get(normalize_name(name))
+
+    def add_many(self, entries):
+        """
+        entries: (canonical, aliases) pairs. The canonical name is registered as an alias of
+        itself. Returns how many aliases were new.
+        """
+        new = []
+        with self.lock:
+            for canonical, aliases in entries:
+                for alias in (canonical, *aliases):
+                    key = normalize_name(alias) if isinstance(alias, str) else ""
+                    if key and key not in self.names:
+                        self.names[key] = canonical
+                        new.append((key, canonical))
+            if new and self.conn:
+                with self.conn:
+                    self.conn.executemany("INSERT OR IGNORE INTO aliases VALUES (?, ?)", new)
+        return len(new)
@@ -0,0 +1,61 @@
+import os
+import json
+import threading
+
+
+class CrawlState:
+    """
+    On-disk crawl frontier + visited set, so an interrupted crawl picks up where it stopped.
+
+    - frontier.json: per category, the `cmcontinue` token of the next listing page and the
+      titles listed but not scraped yet. Small, rewritten atomically.
+    - visited.txt: append-only, one page URL per line.
+    """
+    def __init__(self, state_dir="data/crawl_state"):
+        os.makedirs(state_dir, exist_ok=True)
+        self.frontier_path = os.path.join(state_dir, "frontier.json")
+        self.visited_path = os.path.join(state_dir, "visited.txt")
+        self.lock = threading.Lock()
+
+        self.frontier = {}
+        if os.path.exists(self.frontier_path):
+            with open(self.frontier_path, "r", encoding="utf-8") as f:
+                self.frontier = json.load(f)
+
+        self.visited = set()
+        if os.path.exists(self.visited_path):
+            with open(self.visited_path, "r", encoding="utf-8") as f:
+                self.visited = {line.rstrip("\n") for line in f if line.strip()}
+        self.visited_file = open(self.visited_path, "a", encoding="utf-8")
+
+    def category(self, name):
+        """The frontier entry for a category, created empty on first use."""
+        return self.frontier.setdefault(name, {"cmcontinue": None, "pending": [], "listed": 0, "done": False})
+
+    def save(self):
+        with self.lock:
+            tmp_path = self.frontier_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.frontier, f, ensure_ascii=False)
+            os.replace(tmp_path, self.frontier_path)
+
+    def mark_visited(self, url):
+        with self.lock:
+            if url in self.visited:
+                return
+            self.visited.add(url)
+            self.visited_file.write(url + "\n")
+            self.visited_file.flush()
+
+    def reset(self):
+        """Forgets all progress so the next crawl starts from scratch."""
+        with self.lock:
+            # Cleared in place: the scraper holds references to both (visited_urls)
+            self.frontier.clear()
+            self.visited.clear()
+            self.visited_file.close()
+            self.visited_file = open(self.visited_path, "w", encoding="utf-8")
+        self.save()
+
+    def close(self):
+        self.visited_file.close()
@@ -0,0 +1,110 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+
+def normalize_text(text):
+    """Unicode width and spacing variants embed the same; case is kept, since the model sees it."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Persistent name -> embedding store, so repeat runs never re-embed a name they've seen.
+    Vectors are rows of one float32 file, memory-mapped with NumPy (<path>.f32); a SQLite
+    table (<path>.sqlite) maps each (model, normalized name) key to its row.
+    The file grows by doubling, so appends are cheap and reads touch only the rows they need.
+    """
+    def __init__(self, path="./data/chroma_db/genshin_entities_embeddings", model_name="all-MiniLM-L6-v2",
+                 initial_rows=1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.vectors_path = path + ".f32"
+        self.model_name = model_name
+        self.initial_rows = initial_rows
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path + ".sqlite", check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        meta = dict(self.conn.execute("SELECT name, value FROM meta"))
+        self.dim = meta.get("dim")
+        self.count = self.conn.execute("SELECT count(*) FROM rows").fetchone()[0]
+        self.matrix = None
+        if self.dim and os.path.exists(self.vectors_path):
+            self.map(os.path.getsize(self.vectors_path) // (4 * self.dim))
+
+    def close(self):
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        self.conn.close()
+
+    def key(self, text):
+        return f"{self.model_name}\0{normalize_text(text)}"
+
+    def map(self, rows):
+        """(Re)maps the vector file with room for `rows` rows, growing it if needed."""
+        if self.matrix is not None:
+            self.matrix.flush()
+        size = rows * self.dim * 4
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def get_many(self, texts):
+        """One entry per text: its cached vector, or None."""
+        keys = [self.key(t) for t in texts]
+        rows = {}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i+500]
+            placeholders = ",".join("?" * len(batch))
+            rows.update(self.conn.execute(f"SELECT key, row FROM rows WHERE key IN ({placeholders})", batch))
+        result = []
+        for key in keys:
+            row = rows.get(key)
+            result.append(None if row is None else np.array(self.matrix[row]))
+        found = sum(r is not None for r in result)
+        self.hits += found
+        self.misses += len(result) - found
+        return result
+
+    def put_many(self, texts, vectors):
+        with self.lock:
+            new = {}
+            for text, vector in zip(texts, vectors):
+                new.setdefault(self.key(text), np.asarray(vector, dtype=np.float32))
+            existing = set()
+            for key in new:
+                if self.conn.execute("SELECT 1 FROM rows WHERE key = ?", (key,)).fetchone():
+                    existing.add(key)
+            new = {k: v for k, v in new.items() if k not in existing}
+            if not new:
+                return
+
+            if self.dim is None:
+                self.dim = len(next(iter(new.values())))
+                with self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (self.dim,))
+            capacity = 0 if self.matrix is None else self.matrix.shape[0]
+            if self.count + len(new) > capacity:
+                self.map(max(self.initial_rows, capacity * 2, self.count + len(new)))
+
+            entries = []
+            for key, vector in new.items():
+                self.matrix[self.count] = vector
+                entries.append((key, self.count))
+                self.count += 1
+            # Vectors hit the file before their rows are committed, so a crash never leaves
+            # a key pointing at an unwritten row
+            self.matrix.flush()
+            with self.conn:
+                self.conn.executemany("INSERT INTO rows VALUES (?, ?)", entries)
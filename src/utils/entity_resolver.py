@@ -1,47 +1,201 @@
-import chromadb
-from chromadb.utils import embedding_functions
+import os
+import numpy as np
+from collections import OrderedDict
+from src.utils.alias_index import AliasIndex, normalize_name
+from src.utils.embedding_cache import EmbeddingCache
+from src.utils.metrics import metrics
 
 class EntityResolver:
-    def __init__(self, collection_name="genshin_entities"):
-        # Local persistent storage
-        self.client = chromadb.PersistentClient(path="./data/chroma_db")
-        # Use a lightweight model for fast local string matching
-        self.emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name, 
-            embedding_function=self.emb_fn
+    """
+    Maps raw entity names to canonical ones in two tiers:
+    1. AliasIndex: exact match on the normalized name against every canonical name and alias
+       seen so far (free, and never merges two different names by accident)
+    2. embedding similarity through Chroma, only for names the first tier doesn't know
+
+    Chroma and the embedding model are only loaded once a name actually reaches the second
+    tier, and embeddings are cached on disk, so names seen in earlier runs never re-embed.
+    """
+    def __init__(self, collection_name="genshin_entities", cache_size=10000, path="./data/chroma_db",
+                 emb_fn=None, alias_index=None, embedding_cache=None, model_name="all-MiniLM-L6-v2"):
+        self.collection_name = collection_name
+        self.path = path
+        self.model_name = model_name
+        # Loaded on first use (load() / embed())
+        self.emb_fn = emb_fn
+        self.client = None
+        self.collection = None
+        self.space = None
+
+        # LRU of (raw_name, threshold) -> canonical name, so repeated names skip the embedding model
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+        # Persisted with the Chroma store; seeded from its canonical names the first time
+        self.aliases = alias_index or AliasIndex(os.path.join(path, f"{collection_name}_aliases.sqlite"))
+        self.embeddings = embedding_cache or EmbeddingCache(
+            os.path.join(path, f"{collection_name}_embeddings"), model_name=model_name
         )
+        self.stats = {"alias_hits": 0, "embedded": 0}
+
+    def load(self):
+        """Opens the Chroma store (importing chromadb alone takes about a second)."""
+        import chromadb
+        # Local persistent storage. Embeddings are always computed here and passed in, so the
+        # collection doesn't need its own embedding function.
+        self.client = chromadb.PersistentClient(path=self.path)
+        self.collection = self.client.get_or_create_collection(name=self.collection_name, embedding_function=None)
+        configuration = getattr(self.collection, "configuration", None) or {}
+        self.space = (configuration.get("hnsw") or {}).get("space") \
+            or (self.collection.metadata or {}).get("hnsw:space", "l2")
+        if not len(self.aliases) and self.collection.count():
+            self.aliases.add_many((name, ()) for name in self.collection.get(include=[])["ids"])
+        return self.collection
+
+    def embed(self, names):
+        """Embeddings for names, from the on-disk cache where possible; the model loads on the first miss."""
+        with metrics.timer("resolver.embed"):
+            return self.embed_batch(names)
+
+    def embed_batch(self, names):
+        embeddings = self.embeddings.get_many(names)
+        missing = [name for name, e in zip(names, embeddings) if e is None]
+        if missing:
+            if self.emb_fn is None:
+                from chromadb.utils import embedding_functions
+                # Use a lightweight model for fast local string matching
+                self.emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=self.model_name)
+            computed = [np.asarray(e, dtype=np.float32) for e in self.emb_fn(missing)]
+            self.embeddings.put_many(missing, computed)
+            self.stats["embedded"] += len(missing)
+            metrics.count("resolver.embedded", len(missing))
+            fresh = iter(computed)
+            embeddings = [next(fresh) if e is None else e for e in embeddings]
+        return embeddings
 
     def resolve_name(self, raw_name, threshold=0.85):
         """
         Takes a raw name and returns the canonical version from the DB if it exists.
         """
+        return self.resolve_many([raw_name], threshold=threshold)[raw_name]
+
+    def resolve_many(self, names, threshold=0.85):
+        """
+        Resolves a batch of raw names with one embedding pass, one Chroma query and one add.
+        Names are resolved in order, so a new name can match one added earlier in the same batch.
+        Returns a dict mapping each distinct input name to its canonical name.
+        """
+        with metrics.timer("resolver.resolve"):
+            resolved = self.resolve_batch(names, threshold)
+        metrics.count("resolver.names", len(resolved))
+        return resolved
+
+    def resolve_batch(self, names, threshold=0.85):
+        """resolve_many's work, without the timing."""
+        # A fresh alias index is seeded from Chroma before it's trusted to say "unknown"
+        if self.collection is None and not len(self.aliases):
+            self.load()
+
+        resolved = {}
+        misses = []
+        for name in dict.fromkeys(names):
+            key = (name, threshold)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                resolved[name] = self.cache[key]
+                continue
+            canonical = self.aliases.lookup(name)
+            if canonical is not None:
+                self.stats["alias_hits"] += 1
+                metrics.count("resolver.alias_hits")
+                resolved[name] = canonical
+                self.remember(name, threshold, canonical)
+            else:
+                misses.append(name)
+
+        # Spelling variants of one new name ("Rex Lapis" / "rex lapis") share one embedding
+        variants = {}
+        for name in misses:
+            variants.setdefault(normalize_name(name), []).append(name)
+        misses = [group[0] for group in variants.values()]
+
+        if not misses:
+            return resolved
+
+        if self.collection is None:
+            self.load()
+        embeddings = self.embed(misses)
         results = self.collection.query(
-            query_texts=[raw_name],
+            query_embeddings=embeddings,
             n_results=1
         )
+        max_distance = 1 - threshold
+
+        new_names, new_embeddings = [], []
+        for i, name in enumerate(misses):
+            canonical = None
+
+            # Check if we have a close match
+            documents = (results.get('documents') or [])[i:i+1]
+            distances = (results.get('distances') or [])[i:i+1]
+            if documents and documents[0] and distances and distances[0]:
+                if distances[0][0] < max_distance:
+                    canonical = documents[0][0]
+
+            # Names that are new in this batch aren't in Chroma yet, so compare against them too
+            if canonical is None:
+                best = None
+                for new_name, new_embedding in zip(new_names, new_embeddings):
+                    distance = self.distance(embeddings[i], new_embedding)
+                    if distance < max_distance and (best is None or distance < best[0]):
+                        best = (distance, new_name)
+                if best:
+                    canonical = best[1]
+
+            # If no match, this name becomes a canonical reference
+            if canonical is None:
+                canonical = name
+                new_names.append(name)
+                new_embeddings.append(embeddings[i])
+
+            resolved[name] = canonical
+            self.remember(name, threshold, canonical)
+
+        for group in variants.values():
+            for name in group[1:]:
+                resolved[name] = resolved[group[0]]
+                self.remember(name, threshold, resolved[name])
+
+        # Next time these names (and their spelling variants) resolve in the first tier
+        self.aliases.add_many((resolved[name], (name,)) for name in misses)
+
+        if new_names:
+            existing = set(self.collection.get(ids=new_names)['ids'])
+            to_add = [(n, e) for n, e in zip(new_names, new_embeddings) if n not in existing]
+            if to_add:
+                self.collection.add(
+                    documents=[n for n, _ in to_add],
+                    ids=[n for n, _ in to_add],
+                    embeddings=[e for _, e in to_add]
+                )
+
+        return resolved
+
+    def register_aliases(self, entries):
+        """
+        Teaches the first tier the aliases the extractor found: entries are (canonical, aliases)
+        pairs. Returns how many aliases were new.
+        """
+        return self.aliases.add_many(entries)
+
+    def remember(self, name, threshold, canonical):
+        self.cache[(name, threshold)] = canonical
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
 
-        # Check if we have a close match
-        if (
-            results.get('documents') 
-            and len(results['documents']) > 0
-            and len(results['documents'][0]) > 0
-            and results.get('distances')
-            and len(results['distances']) > 0
-            and len(results['distances'][0]) > 0
-        ):
-            distance = results['distances'][0][0]
-            if distance < (1 - threshold):
-                return results['documents'][0][0]
-
-
-        # If no match, add this new name as a canonical reference
-        if raw_name not in self.collection.get(ids=[raw_name])['ids']:
-            self.collection.add(
-                documents=[raw_name],
-                ids=[raw_name]
-            )
-
-        return raw_name
\ No newline at end of file
+    def distance(self, a, b):
+        """Same metric the collection's HNSW index uses, so thresholds mean the same thing."""
+        if self.space == "cosine":
+            return 1 - float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+        if self.space == "ip":
+            return 1 - float(np.dot(a, b))
+        return float(np.sum((a - b) ** 2))
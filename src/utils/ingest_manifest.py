@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Chunk states
+EXTRACTED = "extracted"   # LLM output cached, not (successfully) written to Neo4j yet
+UPLOADED = "uploaded"     # Already in the graph, nothing to do
+
+
+class IngestManifest:
+    """
+    SQLite record of what the extractor has already done.
+    Chunks are keyed by a hash of (prompt/model version, chunk text), so editing a page or
+    changing the prompt only re-extracts the chunks that actually changed.
+    """
+    def __init__(self, path="data/ingest_manifest.sqlite", version=""):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.version = version
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    key TEXT PRIMARY KEY,
+                    source_file TEXT,
+                    chunk_index INTEGER,
+                    status TEXT,
+                    extraction TEXT,
+                    updated_at REAL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    source_file TEXT PRIMARY KEY,
+                    file_hash TEXT,
+                    version TEXT,
+                    updated_at REAL
+                )
+            """)
+            # The same chunk text can appear in several pages, and a chunk only counts as uploaded
+            # for the pages recorded here (not for whichever page extracted it first), so every
+            # page lands in source_files even when its own write failed and another page's didn't
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    key TEXT,
+                    source_file TEXT,
+                    PRIMARY KEY (key, source_file)
+                )
+            """)
+
+    def close(self):
+        self.conn.close()
+
+    def chunk_key(self, text):
+        return hashlib.sha256(f"{self.version}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_hash(filepath):
+        """Hashes a file in blocks so large pages never have to be held in memory."""
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def is_file_done(self, source_file, file_hash):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT file_hash, version FROM files WHERE source_file = ?", (source_file,)
+            ).fetchone()
+        return row is not None and row == (file_hash, self.version)
+
+    def mark_file_done(self, source_file, file_hash):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (source_file, file_hash, self.version, time.time()),
+            )
+
+    def lookup(self, key, source_file=None):
+        """
+        Returns (status, extraction) for a chunk key, or (None, None) if it was never seen.
+        With a `source_file`, UPLOADED means uploaded for that page: a chunk uploaded only for
+        other pages (even when this page first extracted it) is EXTRACTED, so its cached
+        extraction is reused but still uploaded under this page.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT c.status, c.extraction, u.key IS NOT NULL FROM chunks c "
+                "LEFT JOIN uploads u ON u.key = c.key AND u.source_file = ? WHERE c.key = ?",
+                (source_file, key),
+            ).fetchone()
+        if row is None:
+            return None, None
+        status, extraction, uploaded_here = row
+        if status == UPLOADED and source_file is not None and not uploaded_here:
+            status = EXTRACTED
+        return status, json.loads(extraction)
+
+    def save_extraction(self, key, source_file, chunk_index, data):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source_file, chunk_index, EXTRACTED, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+
+    def mark_uploaded(self, key, source_file=None):
+        """Records the chunk as uploaded for `source_file` only; other pages sharing it still need theirs."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE chunks SET status = ?, updated_at = ? WHERE key = ?",
+                (UPLOADED, time.time(), key),
+            )
+            if source_file is not None:
+                self.conn.execute("INSERT OR IGNORE INTO uploads VALUES (?, ?)", (key, source_file))
@@ -0,0 +1,114 @@
+import re
+import json
+
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def repair_json(text):
+    """
+    Local fixes for the ways small models break JSON, without another LLM call:
+    markdown fences and surrounding prose, single-quoted strings, Python literals,
+    trailing commas, missing commas between values, and output cut off mid-way
+    (a string cut off is dropped with its key, never kept half-written: "type": "ALLY
+    must not become a real type; a dangling key or comma is dropped; brackets are closed).
+    Returns the parsed value; raises ValueError if it still doesn't parse.
+    """
+    text = text.replace("```json", "").replace("```", "")
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object in the output")
+    text = text[min(starts):]
+
+    out = []
+    stack = []
+    quote = None     # delimiter of the string we're in
+    string_start = 0  # where that string starts in `out`
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+                if ch == "'":
+                    # \' is only an escape in the single-quoted original; JSON wants a bare '
+                    out[-1] = "'"
+                else:
+                    out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                # A double quote inside a single-quoted string
+                out.append('\\"')
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            previous = last_token(out)
+            if previous and (previous in '"}]' or previous.isdigit() or previous in "el"):
+                # "a" "b" / {...} "key": a comma went missing
+                out.append(",")
+            quote = ch
+            string_start = len(out)
+            out.append('"')
+        elif ch in "{[":
+            if last_token(out) in ('}', ']'):
+                out.append(",")
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            strip_trailing(out, ",")
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                # Anything after the top-level value is prose
+                break
+        else:
+            word = re.match(r"[A-Za-z]+", text[i:])
+            if word and word.group() in PYTHON_LITERALS:
+                out.append(PYTHON_LITERALS[word.group()])
+                i += len(word.group())
+                continue
+            out.append(ch)
+        i += 1
+
+    # Cut off mid-way: drop the unfinished string and what can't be completed, close the brackets
+    if quote:
+        del out[string_start:]
+    repaired = "".join(out)
+    if stack:
+        repaired = re.sub(r"[\s,:]+$", "", repaired)
+        if stack[-1] == "}":
+            # A key with no value yet
+            repaired = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"$', r"\1", repaired)
+            repaired = re.sub(r"[\s,]+$", "", repaired)
+        repaired += "".join(reversed(stack))
+
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"still not valid JSON after local repair: {e}") from e
+
+
+def last_token(out):
+    """Last non-space character emitted so far ('' if none)."""
+    for piece in reversed(out):
+        stripped = piece.strip()
+        if stripped:
+            return stripped[-1]
+    return ""
+
+
+def strip_trailing(out, char):
+    """Removes a trailing `char` (and the whitespace around it) from the emitted pieces."""
+    while out and not out[-1].strip():
+        out.pop()
+    if out and out[-1] == char:
+        out.pop()
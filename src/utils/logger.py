@@ -1,4 +1,52 @@
 import logging
 import os
+import json
+import time
 
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, plus any `extra={"fields": {...}}`."""
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class PlainFormatter(logging.Formatter):
+    """The default text format, with any `extra={"fields": {...}}` appended as key=value pairs."""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(
+                f"{key}={json.dumps(value, ensure_ascii=False, default=str)}" for key, value in fields.items()
+            )
+        return line
+
+
+def get_logger(name="teyvat_lore_graph"):
+    """
+    Logger under the package's root logger, which is configured once from the environment:
+    LOG_LEVEL (default INFO) and LOG_FORMAT=json for structured logs (default plain text).
+    """
+    root = logging.getLogger("teyvat_lore_graph")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        if os.getenv("LOG_FORMAT", "").lower() == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(PlainFormatter())
+        root.addHandler(handler)
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        root.propagate = False
+    return logging.getLogger(name) if name != root.name else root
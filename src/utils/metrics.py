@@ -0,0 +1,187 @@
+"""
+Timers and counters for the ingest pipeline, off unless LORE_METRICS=1.
+
+    from src.utils.metrics import metrics
+
+    with metrics.timer("llm.invoke"):
+        response = llm.invoke(prompt)
+    metrics.count("extract.json_failures")
+
+Disabled, timer() hands back a shared no-op and count() returns straight away, so the
+instrumented code pays one attribute check per call. Enabled:
+- every span is logged at DEBUG (JSON with LOG_FORMAT=json, see src.utils.logger)
+- flush() logs a summary and writes Prometheus text to LORE_METRICS_FILE, if set
+- LORE_METRICS_PORT serves the same text over HTTP at /metrics, on LORE_METRICS_HOST
+  (default 127.0.0.1; set 0.0.0.0 to let a Prometheus on another machine scrape it)
+"""
+import os
+import re
+import logging
+import time
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.utils.logger import get_logger
+
+# Upper bounds in seconds: from a Neo4j round trip up to a slow local LLM call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def prometheus_name(name, suffix):
+    return "lore_" + re.sub(r"[^a-zA-Z0-9_]", "_", name) + suffix
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.getenv("LORE_METRICS", "").lower() in ("1", "true", "yes")
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.logger = get_logger("teyvat_lore_graph.metrics")
+        self.server = None
+        self.reset()
+        if enabled:
+            self.enable()
+
+    def enable(self, port=None, host=None):
+        self.enabled = True
+        port = port or os.getenv("LORE_METRICS_PORT")
+        if port and self.server is None:
+            self.serve(int(port), host=host)
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            # name -> [count, sum, max, errors, per-bucket counts (last one is +Inf)...]
+            self.timers = {}
+
+    def timer(self, name):
+        """Context manager timing one span of work (no-op while disabled)."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds, error=False):
+        with self.lock:
+            entry = self.timers.get(name)
+            if entry is None:
+                entry = self.timers[name] = [0, 0.0, 0.0, 0] + [0] * (len(BUCKETS) + 1)
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += error
+            entry[4 + bisect.bisect_left(BUCKETS, seconds)] += 1
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("span", extra={"fields": {"span": name, "ms": round(seconds * 1000, 3), "error": error}})
+
+    def snapshot(self):
+        """{"counters": {name: value}, "timers": {name: {count, total_s, mean_ms, max_ms, errors}}}"""
+        with self.lock:
+            timers = {
+                name: {
+                    "count": e[0], "total_s": round(e[1], 4), "mean_ms": round(e[1] / e[0] * 1000, 3),
+                    "max_ms": round(e[2] * 1000, 3), "errors": e[3],
+                }
+                for name, e in self.timers.items()
+            }
+            return {"counters": dict(self.counters), "timers": timers}
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = prometheus_name(name, "_total")
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name, e in sorted(self.timers.items()):
+                metric = prometheus_name(name, "_seconds")
+                lines.append(f"# TYPE {metric} histogram")
+                # Prometheus buckets are cumulative: spans <= each bound
+                cumulative = 0
+                for bound, n in zip(BUCKETS, e[4:]):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines += [
+                    f'{metric}_bucket{{le="+Inf"}} {e[0]}',
+                    f"{metric}_sum {e[1]:.6f}",
+                    f"{metric}_count {e[0]}",
+                ]
+                errors = prometheus_name(name, "_errors_total")
+                lines += [f"# TYPE {errors} counter", f"{errors} {e[3]}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically writes the Prometheus text file (e.g. for node_exporter's textfile collector)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        """End of a run: logs the summary and writes LORE_METRICS_FILE if configured."""
+        if not self.enabled:
+            return
+        self.logger.info("metrics", extra={"fields": self.snapshot()})
+        path = os.getenv("LORE_METRICS_FILE")
+        if path:
+            self.write_prometheus(path)
+
+    def serve(self, port, host=None):
+        """Serves /metrics on a daemon thread; local-only unless host (or LORE_METRICS_HOST) says otherwise."""
+        host = host or os.getenv("LORE_METRICS_HOST", "127.0.0.1")
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="lore-metrics").start()
+        print(f"📈 Serving metrics on http://{host}:{port}/metrics")
+
+
+metrics = Metrics()
@@ -1,16 +1,75 @@
 import os
-from neo4j import GraphDatabase
+import threading
+from neo4j import GraphDatabase, AsyncGraphDatabase, READ_ACCESS
 from dotenv import load_dotenv
+from src.utils.metrics import metrics
 
 load_dotenv()
 
+# A single bookkeeping node holds a counter that every write to the graph bumps,
+# so caches of query results can tell whether they're still current.
+GRAPH_VERSION_CYPHER = "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.version AS version"
+BUMP_GRAPH_VERSION_CYPHER = """
+MERGE (m:GraphMeta {key: 'graph'})
+SET m.version = coalesce(m.version, 0) + 1
+RETURN m.version AS version
+"""
+
+# Schema the pipeline relies on. All idempotent, so ensure_schema() can run on every start.
+# - the uniqueness constraint backs every MERGE (e:Entity {name: ...}) with an index lookup
+#   instead of a label scan, so upload cost stays flat as the graph grows
+# - entity_names is the full-text index the Cypher prompt and QuestionRouter query
+# - entity_summary_dirty finds the nodes whose summaries need refreshing (src.pipeline.summaries)
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
+    "CREATE CONSTRAINT graph_meta_key_unique IF NOT EXISTS FOR (m:GraphMeta) REQUIRE m.key IS UNIQUE",
+    "CREATE INDEX entity_label IF NOT EXISTS FOR (e:Entity) ON (e.label)",
+    "CREATE FULLTEXT INDEX entity_names IF NOT EXISTS FOR (e:Entity) ON EACH [e.name, e.aliases]",
+    "CREATE INDEX entity_summary_dirty IF NOT EXISTS FOR (e:Entity) ON (e.summary_dirty)",
+]
+AWAIT_INDEXES_CYPHER = "CALL db.awaitIndexes($timeout)"
+
+def run_and_fetch(tx, cypher_query, parameters):
+    """Transaction function: runs one statement and returns its records as dicts."""
+    return tx.run(cypher_query, parameters).data()
+
+
+def run_all(tx, statements):
+    """Transaction function: runs every buffered (cypher, parameters) statement in one transaction."""
+    for cypher_query, parameters in statements:
+        tx.run(cypher_query, parameters).consume()
+
+
+async def arun_and_fetch(tx, cypher_query, parameters):
+    result = await tx.run(cypher_query, parameters)
+    return await result.data()
+
+
 class Neo4jClient:
-    def __init__(self):
+    """
+    Pooled access to the graph for every pipeline stage.
+    - One driver (connection pool) per client; each thread reuses its own session.
+    - execute_read/execute_write run managed transactions, which the driver retries on
+      transient errors (deadlocks, leader changes, dropped connections) for up to
+      max_transaction_retry_time seconds.
+    - iter_query streams records in fetch_size batches instead of materializing them.
+    - bulk_writer() buffers statements and commits them together.
+    """
+    def __init__(self, max_connection_pool_size=50, connection_acquisition_timeout=60,
+                 max_transaction_retry_time=30, fetch_size=1000):
         self.uri = os.getenv("NEO4J_URI")
         self.username = os.getenv("NEO4J_USERNAME")
         self.password = os.getenv("NEO4J_PASSWORD")
-        self.database = os.getenv("NEO4J_DATABASE")
+        # None means the server's default database
+        self.database = os.getenv("NEO4J_DATABASE") or None
+        self.max_connection_pool_size = max_connection_pool_size
+        self.connection_acquisition_timeout = connection_acquisition_timeout
+        self.max_transaction_retry_time = max_transaction_retry_time
+        self.fetch_size = fetch_size
         self.driver = None
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = threading.Lock()
 
     def connect(self):
         try:
@@ -18,7 +77,10 @@ class Neo4jClient:
             self.driver = GraphDatabase.driver(
                 self.uri, 
                 auth=(self.username, self.password),
-                connection_timeout=30 # 30 seconds
+                connection_timeout=30, # 30 seconds
+                max_connection_pool_size=self.max_connection_pool_size,
+                connection_acquisition_timeout=self.connection_acquisition_timeout,
+                max_transaction_retry_time=self.max_transaction_retry_time
             )
             
             self.driver.verify_connectivity()
@@ -30,17 +92,177 @@ class Neo4jClient:
             print(f"Target URI: {self.uri}")
     
     def close(self):
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions = []
+        self.local = threading.local()
         if self.driver:
             self.driver.close()
 
+    def session(self):
+        """This thread's session, opened on first use. Sessions aren't thread-safe, so each thread gets one."""
+        if not self.driver:
+            self.connect()
+            if not self.driver:
+                raise RuntimeError("Database connection is not established.")
+        session = getattr(self.local, "session", None)
+        if session is None or session.closed():
+            session = self.driver.session(database=self.database, fetch_size=self.fetch_size)
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
     def query(self, cypher_query, parameters=None):
+        """Runs one statement in a retried write transaction; kept for callers that don't care about routing."""
+        return self.execute_write(cypher_query, parameters)
+
+    def execute_read(self, cypher_query, parameters=None):
+        with metrics.timer("neo4j.read"):
+            return self.session().execute_read(run_and_fetch, cypher_query, parameters)
+
+    def execute_write(self, cypher_query, parameters=None):
+        with metrics.timer("neo4j.write"):
+            return self.session().execute_write(run_and_fetch, cypher_query, parameters)
+
+    def write_transaction(self, transaction_function, *args):
+        """Runs transaction_function(tx, *args) in one retried write transaction, for reads and writes that must commit together."""
+        with metrics.timer("neo4j.write"):
+            return self.session().execute_write(transaction_function, *args)
+
+    def iter_query(self, cypher_query, parameters=None):
+        """
+        Yields records as dicts while the server streams them (fetch_size at a time), for reads
+        too large to hold in memory. Uses its own session, so the caller can keep querying
+        while iterating. Not retried: records already yielded can't be taken back.
+        """
+        if not self.driver:
+            self.connect()
+            if not self.driver:
+                raise RuntimeError("Database connection is not established.")
+        with self.driver.session(database=self.database, fetch_size=self.fetch_size,
+                                 default_access_mode=READ_ACCESS) as session:
+            with session.begin_transaction() as tx:
+                for record in tx.run(cypher_query, parameters):
+                    yield record.data()
+
+    def bulk_writer(self, max_statements=1000):
+        """
+        Context manager that buffers write statements and commits them in one transaction:
+
+            with db.bulk_writer() as writer:
+                writer.add(cypher, {"rows": rows})
+
+        More than max_statements are committed in several transactions; max_statements=None
+        keeps everything in one, for writes that must commit together.
+        """
+        return BulkWriter(self, max_statements)
+
+    def ensure_schema(self, timeout=300):
+        """
+        Creates the constraints and indexes in SCHEMA_STATEMENTS if they're missing, then waits
+        up to `timeout` seconds for them to come online (populating over an existing graph can
+        take a while). Returns False if any of them couldn't be created or didn't come online
+        in time; the pipeline still runs, just without them.
+        """
+        ok = True
+        for statement in SCHEMA_STATEMENTS:
+            try:
+                # Schema changes can't share a transaction with each other or with data writes
+                self.execute_write(statement)
+            except Exception as e:
+                # Usually duplicate Entity names written before the constraint existed
+                print(f"⚠️ Schema statement failed: {statement}")
+                print(f"   Error details: {e}")
+                ok = False
+        try:
+            self.execute_read(AWAIT_INDEXES_CYPHER, {"timeout": timeout})
+        except Exception as e:
+            # Timed out, or an index failed to populate (SHOW INDEXES has its failure message)
+            print(f"⚠️ Graph indexes are not online yet: {e}")
+            ok = False
+        if ok:
+            print("🧱 Graph constraints and indexes are online.")
+        return ok
+
+    def graph_version(self):
+        """Current value of the write counter (0 for a graph nothing has been written to)."""
+        rows = self.execute_read(GRAPH_VERSION_CYPHER)
+        return rows[0]["version"] if rows else 0
+
+    def bump_graph_version(self):
+        return self.execute_write(BUMP_GRAPH_VERSION_CYPHER)[0]["version"]
+
+class BulkWriter:
+    """
+    Buffers (cypher, parameters) statements and runs them in a single managed write transaction
+    on flush: one commit and one retry scope instead of one per statement. Flushes automatically
+    every max_statements (never if None), and on leaving the `with` block unless it raised.
+    """
+    def __init__(self, client, max_statements=1000):
+        self.client = client
+        self.max_statements = max_statements
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.statements = []
+
+    def add(self, cypher_query, parameters=None):
+        self.statements.append((cypher_query, parameters))
+        if self.max_statements and len(self.statements) >= self.max_statements:
+            self.flush()
+
+    def flush(self):
+        if not self.statements:
+            return
+        statements, self.statements = self.statements, []
+        with metrics.timer("neo4j.bulk_write"):
+            self.client.session().execute_write(run_all, statements)
+        metrics.count("neo4j.statements", len(statements))
+
+
+class AsyncNeo4jClient:
+    """
+    asyncio counterpart of Neo4jClient for serving queries: one pooled driver shared by every
+    coroutine, so concurrent users cost connections from the pool rather than threads.
+    """
+    def __init__(self, max_connection_pool_size=50):
+        self.uri = os.getenv("NEO4J_URI")
+        self.username = os.getenv("NEO4J_USERNAME")
+        self.password = os.getenv("NEO4J_PASSWORD")
+        self.database = os.getenv("NEO4J_DATABASE") or None
+        self.max_connection_pool_size = max_connection_pool_size
+        self.driver = None
+
+    def connect(self):
+        # The async driver connects lazily, on the first query
+        self.driver = AsyncGraphDatabase.driver(
+            self.uri,
+            auth=(self.username, self.password),
+            connection_timeout=30,
+            max_connection_pool_size=self.max_connection_pool_size
+        )
+
+    async def close(self):
+        if self.driver:
+            await self.driver.close()
+
+    async def query(self, cypher_query, parameters=None):
         if not self.driver:
-            raise RuntimeError("Database connection is not established.")
-        with self.driver.session() as session:
-            result = session.run(cypher_query, parameters)
-            return result.data()
-        
+            self.connect()
+        async with self.driver.session(database=self.database) as session:
+            # Serving only reads; a read transaction also keeps generated Cypher from writing
+            return await session.execute_read(arun_and_fetch, cypher_query, parameters)
+
 if __name__ == "__main__":
     client = Neo4jClient()
     client.connect()
+    client.ensure_schema()
     client.close()
\ No newline at end of file
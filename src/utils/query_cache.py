@@ -0,0 +1,120 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+MISSING = object()
+
+
+def normalize_question(question):
+    """Case, spacing and trailing punctuation don't change the answer: "Who is Xiao?" == "who is  xiao"."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+def fingerprint(value):
+    """Stable short hash of any JSON-able value (e.g. query result rows)."""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class QueryCache:
+    """
+    TTL + LRU cache for LoreReasoner, split into namespaces (question -> Cypher, Cypher -> rows, ...).
+    Entries can be tied to a graph version: a lookup with a different version is a miss, so a
+    write to the graph (which bumps the version) invalidates every result read before it.
+    With a `path`, entries also go to SQLite and survive restarts; memory stays the hot tier.
+    """
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.lock = threading.Lock()
+        # (namespace, key) -> (version, created_at, value)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            with self.conn:
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        namespace TEXT,
+                        key TEXT,
+                        version TEXT,
+                        value TEXT,
+                        created_at REAL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                """)
+                if self.ttl:
+                    self.conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+    def get(self, namespace, key, version=None):
+        """The cached value, or None if it's missing, expired or from another graph version."""
+        with self.lock:
+            entry = self.entries.get((namespace, key))
+            if entry is None and self.conn:
+                row = self.conn.execute(
+                    "SELECT version, created_at, value FROM entries WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1], json.loads(row[2]))
+                    self.store(namespace, key, entry)
+
+            value = self.check(namespace, key, entry, version)
+            if value is MISSING:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((namespace, key))
+            self.hits += 1
+            return value
+
+    def set(self, namespace, key, value, version=None):
+        entry = (None if version is None else str(version), time.time(), value)
+        with self.lock:
+            self.store(namespace, key, entry)
+            if self.conn:
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                        (namespace, key, entry[0], json.dumps(value, ensure_ascii=False, default=str), entry[1]),
+                    )
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.conn:
+                with self.conn:
+                    self.conn.execute("DELETE FROM entries")
+
+    def store(self, namespace, key, entry):
+        self.entries[(namespace, key)] = entry
+        self.entries.move_to_end((namespace, key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def check(self, namespace, key, entry, version):
+        """Drops the entry if it expired or belongs to an older graph; returns its value or MISSING."""
+        if entry is None:
+            return MISSING
+        entry_version, created_at, value = entry
+        expired = self.ttl and time.time() - created_at > self.ttl
+        stale = version is not None and entry_version != str(version)
+        if expired or stale:
+            del self.entries[(namespace, key)]
+            if self.conn:
+                with self.conn:
+                    self.conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            return MISSING
+        return value
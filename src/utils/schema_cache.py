@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import time
+import threading
+
+# Full introspection, only run when there is no snapshot yet (or on an explicit refresh)
+ENTITY_LABELS_CYPHER = "MATCH (e:Entity) RETURN e.label AS name, count(*) AS count"
+RELATIONSHIP_TYPES_CYPHER = "MATCH (:Entity)-[r]->(:Entity) RETURN type(r) AS name, count(*) AS count"
+PROPERTY_KEYS_CYPHER = "MATCH (e:Entity) UNWIND keys(e) AS key RETURN DISTINCT key"
+
+WORD = re.compile(r"[a-z]+")
+STOP_WORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "by", "for", "from", "with", "and", "or",
+    "is", "are", "was", "were", "did", "do", "does", "who", "what", "which", "where", "when", "how",
+}
+
+
+def stem(word):
+    """Crude suffix stripping, enough for "members" ~ MEMBER_OF and "create" ~ CREATED."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if len(word) > 3 and word.endswith("e") else word
+
+
+def words(text):
+    """Stemmed lowercase content words."""
+    return {stem(w) for w in WORD.findall(text.lower()) if w not in STOP_WORDS}
+
+
+class GraphSchemaCache:
+    """
+    On-disk snapshot of what the lore graph contains: entity labels and relationship types
+    with (approximate) counts, plus the property keys on Entity nodes.
+
+    The extractor records the labels/types it writes; the file is only rewritten when one of
+    them is new (or on flush), so readers can cheaply check its mtime and reload. LoreReasoner
+    builds its prompt schema from here instead of introspecting Neo4j on startup.
+    With path=None the snapshot lives in memory only.
+    """
+    def __init__(self, path="data/graph_schema.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.data = {"entity_labels": {}, "relationship_types": {}, "property_keys": [], "updated_at": None}
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with self.lock:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data.update(json.load(f))
+            self.mtime = os.path.getmtime(self.path)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            self.data["updated_at"] = time.time()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self.mtime = os.path.getmtime(self.path)
+
+    def reload_if_changed(self):
+        """Picks up types another process (the extractor) added since we last looked."""
+        if self.path and os.path.exists(self.path) and os.path.getmtime(self.path) != self.mtime:
+            self.load()
+
+    def is_empty(self):
+        return not self.data["relationship_types"] and not self.data["entity_labels"]
+
+    def refresh(self, query):
+        """Full introspection through `query` (Neo4jClient.query or Neo4jGraph.query)."""
+        print("🗺️ Introspecting graph schema...")
+        labels = {row["name"]: row["count"] for row in query(ENTITY_LABELS_CYPHER) if row["name"]}
+        rel_types = {row["name"]: row["count"] for row in query(RELATIONSHIP_TYPES_CYPHER)}
+        keys = sorted(row["key"] for row in query(PROPERTY_KEYS_CYPHER))
+        with self.lock:
+            self.data["entity_labels"] = labels
+            self.data["relationship_types"] = rel_types
+            self.data["property_keys"] = keys
+        self.save()
+
+    def record(self, entity_labels=(), relationship_types=(), property_keys=()):
+        """
+        Adds one write's labels/types to the counts. Saves right away only if something new
+        appeared; returns the new names.
+        """
+        new = []
+        with self.lock:
+            for field, names in (("entity_labels", entity_labels), ("relationship_types", relationship_types)):
+                counts = self.data[field]
+                for name in names:
+                    if not name:
+                        continue
+                    if name not in counts:
+                        new.append(name)
+                    counts[name] = counts.get(name, 0) + 1
+            for key in property_keys:
+                if key not in self.data["property_keys"]:
+                    self.data["property_keys"].append(key)
+                    new.append(key)
+        if new:
+            self.save()
+        return new
+
+    def flush(self):
+        """Persists the updated counts (new names are already saved by record)."""
+        self.save()
+
+    def ranked_relationship_types(self, question=None, top_k=15):
+        """
+        The top_k relationship types most relevant to the question: those sharing words with it
+        first, then the most frequent ones.
+        """
+        counts = self.data["relationship_types"]
+        asked = words(question or "")
+
+        def score(rel_type):
+            return (len(asked & words(rel_type.replace("_", " "))), counts[rel_type])
+
+        return sorted(counts, key=score, reverse=True)[:top_k]
+
+    def prompt_schema(self, question=None, top_k=15, top_labels=20):
+        """Compact schema for the Cypher prompt: a few lines instead of the full introspected schema."""
+        labels = sorted(self.data["entity_labels"], key=self.data["entity_labels"].get, reverse=True)
+        rel_types = self.ranked_relationship_types(question, top_k)
+        keys = ", ".join(self.data["property_keys"]) or "name, aliases, label"
+        return "\n".join([
+            f"Nodes: (:Entity {{{keys}}})",
+            f"Entity.label values: {', '.join(labels[:top_labels])}",
+            "Relationships, all (:Entity)-[:TYPE]->(:Entity): " + ", ".join(rel_types),
+        ])